@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Sustained-rate load generator for the Moose ingest endpoints.
+
+Generates synthetic blob, log or event records with the connector generators
+(random_blob_source, random_log_source, random_event_source) and posts them to
+/ingest/<Source> at a target rate, spread over several worker processes. Each
+worker paces itself against its share of the rate, so the achieved throughput
+falls below the target once the pipeline (or the generators) saturate.
+
+Reports, every interval and at the end:
+- achieved throughput (records/s accepted vs. target)
+- ingest HTTP latency percentiles (p50/p90/p99/max)
+- error rate and a breakdown of response status codes
+
+Run it from the data-warehouse virtualenv, where the connectors package is installed.
+
+Usage:
+    python load-generator.py --source events --rate 50000 --duration 60 --workers 8
+"""
+
+import argparse
+import logging
+import multiprocessing
+import queue
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import requests
+from connectors.random import (
+    get_workload_profile, random_blob_source, random_event_source, random_log_source, WORKLOAD_PROFILES
+)
+from connectors.serialization import encode_columns, encode_records
+
+# Set up logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Source name -> (record generator, ingest endpoint)
+SOURCES: Dict[str, tuple] = {
+    "blobs": (random_blob_source, "BlobSource"),
+    "logs": (random_log_source, "LogSource"),
+    "events": (random_event_source, "EventSource"),
+}
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# ============================================================================
+# WORKER PROCESS
+# ============================================================================
+
+def new_report(worker_id: int) -> Dict[str, Any]:
+    return {
+        "worker": worker_id,
+        "records": 0,         # records in requests that got a 2xx response
+        "requests": 0,
+        "errors": 0,          # non-2xx responses and transport failures
+        "latencies_ms": [],
+        "statuses": Counter(),
+        "started": time.time(),  # wall clock, comparable across processes
+        "ended": None,
+    }
+
+def make_batch_encoder(source: str, batch_size: int, profile: Optional[str], seed: Optional[int]) -> Callable[[], bytes]:
+    """
+    Return a callable producing one encoded batch. Without a workload profile,
+    records come from the connector's random_*_source generators; with one, the
+    profile generates whole batches (sessions, traces) as columns.
+    """
+    generate, _ = SOURCES[source]
+    if profile is None:
+        return lambda: encode_records(generate() for _ in range(batch_size))
+
+    workload = get_workload_profile(profile)
+    columns = workload.event_columns if source == "events" else workload.log_columns
+    rng = np.random.default_rng(seed)
+    return lambda: encode_columns(columns(batch_size, rng))
+
+def make_body_source(encode_batch: Callable[[], bytes], body_pool: int) -> Callable[[], bytes]:
+    """
+    Return a callable producing request bodies. With a body pool, `body_pool`
+    batches are generated up front and cycled, so record generation does not cap
+    the request rate; otherwise every request carries freshly generated records.
+    """
+    if body_pool > 0:
+        bodies = [encode_batch() for _ in range(body_pool)]
+        position = 0
+
+        def next_pooled_body() -> bytes:
+            nonlocal position
+            body = bodies[position % len(bodies)]
+            position += 1
+            return body
+        return next_pooled_body
+
+    return encode_batch
+
+def run_worker(
+    worker_id: int,
+    source: str,
+    url: str,
+    rate: float,
+    duration: float,
+    batch_size: int,
+    body_pool: int,
+    profile: Optional[str],
+    timeout: float,
+    report_interval: float,
+    seed: Optional[int],
+    reports: "multiprocessing.Queue",
+) -> None:
+    """Post batches to `url` at `rate` records/s for `duration` seconds."""
+    if seed is not None:
+        seed += worker_id
+        random.seed(seed)
+
+    next_body = make_body_source(make_batch_encoder(source, batch_size, profile, seed), body_pool)
+    session = requests.Session()
+
+    report = new_report(worker_id)
+    start = time.perf_counter()
+    deadline = start + duration
+    next_report = start + report_interval
+    records_due = 0
+
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+
+        # Pace against the schedule rather than the previous request, so a slow
+        # response is caught up on instead of permanently lowering the rate.
+        send_at = start + records_due / rate
+        if send_at > now:
+            time.sleep(min(send_at, deadline) - now)
+            continue
+
+        body = next_body()
+        records_due += batch_size
+        sent = time.perf_counter()
+        try:
+            response = session.post(url, data=body, headers=JSON_HEADERS, timeout=timeout)
+            status = str(response.status_code)
+            ok = response.ok
+        except requests.RequestException as e:
+            status = type(e).__name__
+            ok = False
+        report["latencies_ms"].append((time.perf_counter() - sent) * 1000)
+        report["requests"] += 1
+        report["statuses"][status] += 1
+        if ok:
+            report["records"] += batch_size
+        else:
+            report["errors"] += 1
+
+        if time.perf_counter() >= next_report:
+            report["ended"] = time.time()
+            reports.put(report)
+            report = new_report(worker_id)
+            next_report += report_interval
+
+    report["ended"] = time.time()
+    reports.put(report)
+    reports.put(None)
+
+# ============================================================================
+# REPORTING
+# ============================================================================
+
+def merge_reports(total: Dict[str, Any], report: Dict[str, Any]) -> None:
+    total["records"] += report["records"]
+    total["requests"] += report["requests"]
+    total["errors"] += report["errors"]
+    total["latencies_ms"].extend(report["latencies_ms"])
+    total["statuses"].update(report["statuses"])
+    if total["ended"] is None:
+        total["started"], total["ended"] = report["started"], report["ended"]
+    else:
+        total["started"] = min(total["started"], report["started"])
+        total["ended"] = max(total["ended"], report["ended"])
+
+def latency_summary(latencies_ms: List[float]) -> str:
+    if not latencies_ms:
+        return "no requests"
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return f"p50={p50:.1f}ms p90={p90:.1f}ms p99={p99:.1f}ms max={max(latencies_ms):.1f}ms"
+
+def error_rate(stats: Dict[str, Any]) -> float:
+    return stats["errors"] / stats["requests"] * 100 if stats["requests"] else 0.0
+
+def log_interval(stats: Dict[str, Any], elapsed: float, target_rate: float) -> None:
+    throughput = stats["records"] / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"{throughput:,.0f}/{target_rate:,.0f} records/s | "
+        f"{stats['requests']} requests | errors {error_rate(stats):.1f}% | "
+        f"{latency_summary(stats['latencies_ms'])}"
+    )
+
+def log_summary(stats: Dict[str, Any], target_rate: float) -> None:
+    # Measured over the workers' sending window, excluding process start-up
+    elapsed = stats["ended"] - stats["started"] if stats["ended"] is not None else 0.0
+    throughput = stats["records"] / elapsed if elapsed > 0 else 0.0
+    logger.info("=" * 50)
+    logger.info("Load generation summary")
+    logger.info(f"Duration:            {elapsed:.1f}s")
+    logger.info(f"Records accepted:    {stats['records']:,}")
+    logger.info(f"Achieved throughput: {throughput:,.0f} records/s "
+                f"({throughput / target_rate * 100:.1f}% of {target_rate:,.0f} target)")
+    logger.info(f"Requests:            {stats['requests']:,}")
+    logger.info(f"Latency:             {latency_summary(stats['latencies_ms'])}")
+    logger.info(f"Error rate:          {error_rate(stats):.2f}% ({stats['errors']:,} failed requests)")
+    logger.info(f"Status codes:        {dict(stats['statuses'].most_common())}")
+    logger.info("=" * 50)
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Sustained-rate load generator for Moose ingest")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="events",
+                        help="record type to generate (default: events)")
+    parser.add_argument("--rate", type=float, default=10000,
+                        help="target records per second across all workers (default: 10000)")
+    parser.add_argument("--duration", type=float, default=60,
+                        help="seconds to run (default: 60)")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="records per ingest request (default: 1000)")
+    parser.add_argument("--body-pool", type=int, default=0,
+                        help="pre-generate this many request bodies per worker and reuse them, "
+                             "to measure ingest without generator overhead (default: 0, generate live)")
+    parser.add_argument("--profile", choices=sorted(WORKLOAD_PROFILES), default=None,
+                        help="workload profile for events/logs, e.g. realistic (default: independent uniform records)")
+    parser.add_argument("--ingest-url", default="http://localhost:4200/ingest",
+                        help="ingest base URL (default: http://localhost:4200/ingest)")
+    parser.add_argument("--timeout", type=float, default=30,
+                        help="per-request timeout in seconds (default: 30)")
+    parser.add_argument("--report-interval", type=float, default=5,
+                        help="seconds between progress reports (default: 5)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for reproducible records (each worker uses seed + worker index)")
+    args = parser.parse_args()
+
+    if args.rate <= 0 or args.duration <= 0 or args.workers < 1 or args.batch_size < 1:
+        parser.error("--rate, --duration, --workers and --batch-size must be positive")
+    if args.profile and args.source == "blobs":
+        parser.error("--profile applies to events and logs only")
+    return args
+
+def main():
+    """
+    Start the worker processes and aggregate their reports until all finish.
+    """
+    args = parse_args()
+    _, endpoint = SOURCES[args.source]
+    url = f"{args.ingest_url.rstrip('/')}/{endpoint}"
+
+    logger.info(f"Load generator: {args.rate:,.0f} {args.source} records/s to {url} "
+                f"for {args.duration:.0f}s with {args.workers} workers, {args.batch_size} records/request")
+
+    context = multiprocessing.get_context("spawn")
+    reports = context.Queue()
+    workers = [
+        context.Process(
+            target=run_worker,
+            args=(worker_id, args.source, url, args.rate / args.workers, args.duration,
+                  args.batch_size, args.body_pool, args.profile, args.timeout, args.report_interval,
+                  args.seed, reports),
+            daemon=True,
+        )
+        for worker_id in range(args.workers)
+    ]
+
+    total = new_report(-1)
+    interval = new_report(-1)
+    running = len(workers)
+    for worker in workers:
+        worker.start()
+    interval_start = time.perf_counter()
+
+    try:
+        while running:
+            try:
+                report = reports.get(timeout=args.report_interval)
+            except queue.Empty:
+                report = False
+                if not any(worker.is_alive() for worker in workers):
+                    logger.error("Worker processes exited without reporting")
+                    break
+
+            if report is None:
+                running -= 1
+            elif report:
+                merge_reports(total, report)
+                merge_reports(interval, report)
+
+            now = time.perf_counter()
+            if now - interval_start >= args.report_interval:
+                log_interval(interval, now - interval_start, args.rate)
+                interval = new_report(-1)
+                interval_start = now
+    except KeyboardInterrupt:
+        logger.warning("Interrupted, stopping workers...")
+        for worker in workers:
+            worker.terminate()
+
+    for worker in workers:
+        worker.join()
+    log_summary(total, args.rate)
+
+if __name__ == "__main__":
+    main()
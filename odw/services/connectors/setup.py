@@ -7,6 +7,7 @@ setup(
     packages=["connectors"],
     python_requires=">=3.12",
     install_requires=[
-        # Add your dependencies here
+        "numpy>=1.26",
+        "orjson>=3.9",
     ],
 )
\ No newline at end of file
@@ -1 +1,20 @@
-from .s3_connector import S3Connector, S3ConnectorConfig, S3FileContent
\ No newline at end of file
+from typing import TYPE_CHECKING
+import importlib
+
+if TYPE_CHECKING:
+    from .s3_connector import S3Connector, S3ConnectorConfig, S3FileContent
+
+# Exports resolved on first access, so importing the package (or any of its
+# synthetic connectors) does not load boto3 and the rest of the S3 stack.
+_LAZY_EXPORTS = {
+    "S3Connector": ".s3_connector",
+    "S3ConnectorConfig": ".s3_connector",
+    "S3FileContent": ".s3_connector",
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,24 @@
+from typing import AsyncIterator, Iterator, TypeVar
+import asyncio
+
+R = TypeVar('R')
+
+# Helpers behind the connectors' asyncio interface (aextract / aextract_iter).
+
+_DONE = object()
+
+async def iterate_in_thread(iterator: Iterator[R]) -> AsyncIterator[R]:
+    """
+    Drive a blocking iterator from asyncio, running each step in a worker thread
+    so the event loop stays free while the next item is produced.
+    """
+    try:
+        while True:
+            item = await asyncio.to_thread(next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,103 @@
+from dataclasses import dataclass, field
+from typing import BinaryIO, NamedTuple, Optional, Union
+import base64
+
+# Binary file contents (images, PDFs, Word documents) on their way to the LLM.
+#
+# The bytes read from S3 are carried as they are, with their real size and MIME
+# type, and base64-encoded only when an LLM request is built. Records that have
+# to pass through the ingest API (the UnstructuredData staging table) carry a
+# short reference to the version of the object that was read instead of the
+# encoded file:
+#
+#   [S3_OBJECT]<mime type>;etag=<etag>;<s3 path>
+#
+# References written before the ETag was added ("[S3_OBJECT]<mime type>;<s3 path>")
+# still parse, with no ETag. The legacy inline form
+# "[IMAGE_DATA]data:<mime>;base64,<data>" (and [PDF_DATA] / [DOC_DATA]), which
+# staging records held before references, is still produced by
+# S3FileReader.read_file for callers that want one string, and still accepted
+# wherever a reference is.
+
+REFERENCE_PREFIX = "[S3_OBJECT]"
+ETAG_FIELD = "etag="
+
+# Bytes read per step when base64-encoding a file; a multiple of 3, so the
+# encoded steps concatenate without padding in between
+ENCODE_CHUNK_SIZE = 3 * 1024 * 1024
+
+Bytes = Union[bytes, bytearray, memoryview]
+
+def inline_marker(mime_type: str) -> str:
+    """The legacy marker for inline data URLs of this MIME type."""
+    if mime_type.startswith("image/"):
+        return "[IMAGE_DATA]"
+    if mime_type == "application/pdf":
+        return "[PDF_DATA]"
+    return "[DOC_DATA]"
+
+def is_reference(content: str) -> bool:
+    return content.startswith(REFERENCE_PREFIX)
+
+class ObjectReference(NamedTuple):
+    """A parsed [S3_OBJECT] reference; etag is None for references without one."""
+    mime_type: str
+    file_path: str
+    etag: Optional[str] = None
+
+def make_reference(mime_type: str, file_path: str, etag: Optional[str] = None) -> str:
+    if etag:
+        return f"{REFERENCE_PREFIX}{mime_type};{ETAG_FIELD}{etag};{file_path}"
+    return f"{REFERENCE_PREFIX}{mime_type};{file_path}"
+
+def parse_reference(content: str) -> ObjectReference:
+    """MIME type, S3 path and ETag of a reference, with or without the ETag."""
+    mime_type, _, rest = content[len(REFERENCE_PREFIX):].partition(";")
+    etag = None
+    # S3 paths start with a scheme, so they never start with the ETag field
+    if rest.startswith(ETAG_FIELD):
+        etag, _, rest = rest[len(ETAG_FIELD):].partition(";")
+    if not rest or etag == "":
+        raise ValueError(f"Invalid S3 object reference: {content[:200]}")
+    return ObjectReference(mime_type, rest, etag)
+
+def base64_from_file(file: BinaryIO, chunk_size: int = ENCODE_CHUNK_SIZE) -> str:
+    """
+    Base64-encode a file from its current position, a chunk at a time, so the
+    raw bytes are never held in memory alongside their encoding.
+    """
+    if chunk_size % 3:
+        raise ValueError("chunk_size must be a multiple of 3")
+    encoded = []
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        encoded.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(encoded)
+
+@dataclass
+class BinaryPayload:
+    """The bytes of a binary file, its MIME type, where it came from and which version it is."""
+    data: Bytes = field(repr=False)
+    mime_type: str
+    file_path: Optional[str] = None
+    etag: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return memoryview(self.data).nbytes
+
+    def base64(self) -> str:
+        """The data base64-encoded, for the request being serialized; not kept."""
+        return base64.b64encode(self.data).decode("ascii")
+
+    def data_url(self) -> str:
+        """The legacy inline form, e.g. "[PDF_DATA]data:application/pdf;base64,..."."""
+        return f"{inline_marker(self.mime_type)}data:{self.mime_type};base64,{self.base64()}"
+
+    def reference(self) -> str:
+        """A short [S3_OBJECT] reference to this version of the object, to stage instead of the data."""
+        if not self.file_path:
+            raise ValueError("Payload has no file path to reference")
+        return make_reference(self.mime_type, self.file_path, self.etag)
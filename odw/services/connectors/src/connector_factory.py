@@ -1,34 +1,83 @@
 from enum import Enum
-from typing import TypeVar, Union, Optional, Generic
-from .blob_connector import BlobConnector, BlobConnectorConfig
-from .logs_connector import LogsConnector, LogsConnectorConfig
-from .events_connector import EventsConnector, EventsConnectorConfig
-from .s3_connector import S3Connector, S3ConnectorConfig
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, TypeVar, Union, Optional, Generic
+import importlib
+import importlib.metadata
+
+if TYPE_CHECKING:
+    from .blob_connector import BlobConnector, BlobConnectorConfig
+    from .logs_connector import LogsConnector, LogsConnectorConfig
+    from .events_connector import EventsConnector, EventsConnectorConfig
+    from .s3_connector import S3Connector, S3ConnectorConfig
 
 T = TypeVar('T')
 
 class ConnectorType(Enum):
     Blob = "Blob"
-    Logs = "Logs" 
+    Logs = "Logs"
     Events = "Events"
     S3 = "S3"
 
 # Add unions for future connector types
-Connector = Union[BlobConnector[T], LogsConnector[T], EventsConnector[T], S3Connector[T]]
+Connector = Union["BlobConnector[T]", "LogsConnector[T]", "EventsConnector[T]", "S3Connector[T]"]
+ConnectorConfig = Union["BlobConnectorConfig", "LogsConnectorConfig", "EventsConnectorConfig", "S3ConnectorConfig"]
+
+# Factory for one connector type: config (or None for the defaults) -> connector
+ConnectorFactoryFunction = Callable[[Optional[Any]], Any]
+
+# Entry point group third-party packages use to add connector types, e.g. in setup.py:
+#   entry_points={"connectors.plugins": ["Kafka = my_package.kafka:KafkaConnector"]}
+# The entry point must load a callable taking the config and returning a connector.
+ENTRY_POINT_GROUP = "connectors.plugins"
+
+# Built-in connectors: type -> (module, connector class, config class, default config args).
+# Modules are imported the first time their type is created, so the synthetic
+# connectors never pull in boto3 and the other S3 dependencies.
+_BUILTIN_CONNECTORS: Dict[str, tuple] = {
+    ConnectorType.Blob.value: (".blob_connector", "BlobConnector", "BlobConnectorConfig", ()),
+    ConnectorType.Logs.value: (".logs_connector", "LogsConnector", "LogsConnectorConfig", ()),
+    ConnectorType.Events.value: (".events_connector", "EventsConnector", "EventsConnectorConfig", ()),
+    ConnectorType.S3.value: (".s3_connector", "S3Connector", "S3ConnectorConfig", ("s3://bucket/*",)),
+}
+
+# Loaded factories, filled on first use and by register_connector
+_factories: Dict[str, ConnectorFactoryFunction] = {}
+
+def register_connector(name: str, factory: ConnectorFactoryFunction) -> None:
+    """Register a connector factory under `name`, overriding any built-in or entry point."""
+    _factories[name] = factory
+
+def _create_builtin(connector_class: type, config_class: type, default_args: tuple, config: Optional[Any]) -> Any:
+    return connector_class(config or config_class(*default_args))
+
+def _load_factory(name: str) -> ConnectorFactoryFunction:
+    if name in _factories:
+        return _factories[name]
+
+    if name in _BUILTIN_CONNECTORS:
+        module_name, connector_name, config_name, default_args = _BUILTIN_CONNECTORS[name]
+        module = importlib.import_module(module_name, __package__)
+        factory = partial(
+            _create_builtin, getattr(module, connector_name), getattr(module, config_name), default_args
+        )
+    else:
+        plugins = importlib.metadata.entry_points(group=ENTRY_POINT_GROUP, name=name)
+        if not plugins:
+            raise ValueError(f"Unknown connector type: {name}")
+        factory = next(iter(plugins)).load()
+
+    _factories[name] = factory
+    return factory
 
 class ConnectorFactory(Generic[T]):
     @staticmethod
     def create(
-        connector_type: ConnectorType,
-        config: Optional[Union[BlobConnectorConfig, LogsConnectorConfig, EventsConnectorConfig, S3ConnectorConfig]] = None
-    ):
-        if connector_type == ConnectorType.Blob:
-            return BlobConnector[T](config or BlobConnectorConfig())
-        elif connector_type == ConnectorType.Logs:
-            return LogsConnector[T](config or LogsConnectorConfig())
-        elif connector_type == ConnectorType.Events:
-            return EventsConnector[T](config or EventsConnectorConfig())
-        elif connector_type == ConnectorType.S3:
-            return S3Connector[T](config or S3ConnectorConfig("s3://bucket/*"))
-        else:
-            raise ValueError(f"Unknown connector type: {connector_type}")
\ No newline at end of file
+        connector_type: Union[ConnectorType, str],
+        config: Optional[ConnectorConfig] = None
+    ) -> Connector:
+        """
+        Create a connector of `connector_type`: a ConnectorType or the name of a
+        connector registered under the "connectors.plugins" entry point group.
+        """
+        name = connector_type.value if isinstance(connector_type, ConnectorType) else connector_type
+        return _load_factory(name)(config)
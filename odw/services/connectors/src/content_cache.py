@@ -0,0 +1,88 @@
+from typing import NamedTuple, Optional, Union
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+
+class CachedContent(NamedTuple):
+    etag: str
+    data: bytes
+
+class ContentCache:
+    """
+    On-disk cache of S3 object bodies, as downloaded, keyed by bucket, key and ETag.
+    Bodies are stored as files next to a SQLite index; once their total size
+    exceeds `max_bytes`, the least recently used entries are evicted. Safe to
+    share between threads, and between processes using the same directory.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "index.db"), check_same_thread=False, isolation_level=None, timeout=30
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS bodies ("
+            " bucket TEXT NOT NULL, key TEXT NOT NULL, etag TEXT NOT NULL,"
+            " size INTEGER NOT NULL, accessed REAL NOT NULL, PRIMARY KEY (bucket, key))"
+        )
+
+    def get(self, bucket: str, key: str) -> Optional[CachedContent]:
+        """The cached body of an object, whatever its ETag; the caller decides if it is current."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag FROM bodies WHERE bucket = ? AND key = ?", (bucket, key)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE bodies SET accessed = ? WHERE bucket = ? AND key = ?", (time.time(), bucket, key)
+            )
+        try:
+            with open(self._path(bucket, key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            # Evicted by another process between the lookup and the read
+            return None
+        return CachedContent(etag=row[0], data=data)
+
+    def put(self, bucket: str, key: str, etag: str, data: Union[bytes, bytearray]) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(bucket, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO bodies (bucket, key, etag, size, accessed) VALUES (?, ?, ?, ?, ?)",
+                (bucket, key, etag, len(data), time.time())
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM bodies").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for bucket, key, size in self._db.execute(
+            "SELECT bucket, key, size FROM bodies ORDER BY accessed"
+        ).fetchall():
+            self._db.execute("DELETE FROM bodies WHERE bucket = ? AND key = ?", (bucket, key))
+            try:
+                os.remove(self._path(bucket, key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def _path(self, bucket: str, key: str) -> str:
+        digest = hashlib.sha256(f"{bucket}/{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "bodies", digest[:2], digest)
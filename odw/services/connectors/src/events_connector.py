@@ -1,19 +1,168 @@
-from typing import List, TypeVar, Generic, Optional
-from .random import random_event_source, EventSource
+from typing import AsyncIterator, Iterator, List, TypeVar, Generic, Optional, Union
+from functools import partial
+import asyncio
+import numpy as np
+from .random import (
+    random_event_source, random_event_record, random_event_columns, records_from_columns, rechunk_columns,
+    get_workload_profile, ColumnBatch, RecordType, WorkloadProfile, EventSource, EventRecord
+)
+from .aio import iterate_in_thread
+from .parallel import (
+    EXTRACT_CHUNK_SIZE, chunk_rng, chunk_seeds, chunk_sizes, generate_in_processes, parallel_starmap
+)
+from .serialization import JsonFormat, encode_columns, encode_records
 
 T = TypeVar('T')
 
 class EventsConnectorConfig:
-    def __init__(self, batch_size: Optional[int] = None):
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        columnar: bool = False,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        record_type: RecordType = RecordType.Model,
+        profile: Optional[Union[str, WorkloadProfile]] = None
+    ):
         self.batch_size = batch_size
+        # Generate the batch column-wise with NumPy instead of row by row
+        self.columnar = columnar
+        # Number of processes to split generation across (1 = in-process)
+        self.workers = workers
+        # Base seed for the columnar generators: the same seed and chunk size give the same
+        # records (timestamps aside) for any worker count, and with a profile for any chunk
+        # size too; row-by-row generation is not seeded
+        self.seed = seed
+        # Output Pydantic models, or lightweight slotted records validated only on to_source()
+        self.record_type = record_type
+        # Workload profile (name or instance) shaping the data, e.g. "realistic"; implies columnar.
+        # The profile generates the whole batch, so sessions are not cut at chunk boundaries
+        self.profile = profile
 
 class EventsConnector(Generic[T]):
     def __init__(self, config: EventsConnectorConfig):
         self._batch_size = config.batch_size or 1000
+        self._columnar = config.columnar
+        self._workers = config.workers or 1
+        self._seed = config.seed
+        self._record_type = config.record_type
+        self._profile = get_workload_profile(config.profile) if config.profile else None
 
-    def extract(self) -> List[EventSource]:
+    def extract(self) -> List[Union[EventSource, EventRecord]]:
         print("Extracting data from Events")
-        data: List[EventSource] = []
-        for i in range(self._batch_size):
-            data.append(random_event_source())
-        return data 
\ No newline at end of file
+        # Chunks of a fixed size, shared by the workers, so a seeded batch is the same for any worker count
+        return [item for chunk in self._chunks(EXTRACT_CHUNK_SIZE) for item in chunk]
+
+    def extract_iter(self, chunk_size: int = 1000) -> Iterator[List[Union[EventSource, EventRecord]]]:
+        """
+        Extract the batch lazily in chunks of at most `chunk_size` records, so only
+        one chunk is held in memory at a time regardless of the batch size.
+        """
+        print(f"Extracting data from Events in chunks of {chunk_size}")
+        yield from self._chunks(chunk_size)
+
+    def extract_json_iter(self, chunk_size: int = 1000, json_format: JsonFormat = JsonFormat.Array) -> Iterator[bytes]:
+        """
+        Extract the batch as ready-to-send JSON request bodies, one per chunk. In
+        columnar mode rows are encoded straight from the columns, and with workers
+        the encoding happens in the worker processes.
+        """
+        print(f"Extracting data from Events as {json_format.value} in chunks of {chunk_size}")
+        yield from self._chunks(chunk_size, json_format)
+
+    async def aextract(self) -> List[Union[EventSource, EventRecord]]:
+        """Async extract(). Generation is CPU-bound, so it runs in a worker thread to keep the event loop free."""
+        return await asyncio.to_thread(self.extract)
+
+    async def aextract_iter(self, chunk_size: int = 1000) -> AsyncIterator[List[Union[EventSource, EventRecord]]]:
+        """Async extract_iter(). Each chunk is generated in a worker thread."""
+        async for chunk in iterate_in_thread(self.extract_iter(chunk_size)):
+            yield chunk
+
+    def extract_columns(self) -> ColumnBatch:
+        """Extract the batch as columns without materializing rows."""
+        if self._profile is not None:
+            return next(self._profile_batches(self._batch_size))
+        return random_event_columns(self._batch_size, chunk_rng(chunk_seeds(self._seed, 1)[0]))
+
+    def extract_columns_iter(self, chunk_size: int = 100_000) -> Iterator[ColumnBatch]:
+        """
+        Extract the batch as column batches of at most `chunk_size` rows, e.g. for
+        bulk loads that write columnar files. Generated in worker processes when
+        `workers` is set.
+        """
+        print(f"Extracting data from Events as columns in chunks of {chunk_size}")
+        if self._profile is not None:
+            yield from self._profile_batches(chunk_size)
+            return
+        if self._workers > 1:
+            yield from generate_in_processes(_generate_columns, self._batch_size, chunk_size, self._workers, self._seed)
+            return
+
+        sizes = chunk_sizes(self._batch_size, chunk_size)
+        for size, seed in zip(sizes, chunk_seeds(self._seed, len(sizes))):
+            yield _generate_columns(size, seed)
+
+    def _chunks(self, chunk_size: int, json_format: Optional[JsonFormat] = None) -> Iterator[Union[List[EventSource], List[EventRecord], bytes]]:
+        if self._profile is not None:
+            for columns in self._profile_batches(chunk_size):
+                yield _from_columns(columns, self._record_type, json_format)
+            return
+        if self._workers > 1:
+            yield from generate_in_processes(
+                partial(_generate_chunk, self._columnar, self._record_type, json_format=json_format),
+                self._batch_size,
+                chunk_size,
+                self._workers,
+                self._seed
+            )
+            return
+
+        sizes = chunk_sizes(self._batch_size, chunk_size)
+        for size, seed in zip(sizes, chunk_seeds(self._seed, len(sizes))):
+            yield _generate_chunk(self._columnar, self._record_type, size, seed, json_format)
+
+    def _profile_batches(self, chunk_size: int) -> Iterator[ColumnBatch]:
+        # The profile plans the whole batch at once and generates it in its own blocks
+        # (on the pool with workers); the output is only split into chunks afterwards
+        seed = np.random.SeedSequence(self._seed) if self._seed is not None else None
+        starmap = parallel_starmap(self._batch_size, self._workers)
+        return rechunk_columns(self._profile.event_batches(self._batch_size, seed, starmap), chunk_size)
+
+def _from_columns(
+    columns: ColumnBatch,
+    record_type: RecordType,
+    json_format: Optional[JsonFormat] = None
+) -> Union[List[EventSource], List[EventRecord], bytes]:
+    """Records, or their encoded JSON body when `json_format` is set, for one column batch."""
+    if json_format is not None:
+        return encode_columns(columns, json_format)
+    # Records that are only going to be encoded never need validating
+    return records_from_columns(EventRecord if record_type == RecordType.Slotted else EventSource, columns)
+
+def _generate_chunk(
+    columnar: bool,
+    record_type: RecordType,
+    size: int,
+    seed: Optional[np.random.SeedSequence] = None,
+    json_format: Optional[JsonFormat] = None
+) -> Union[List[EventSource], List[EventRecord], bytes]:
+    """
+    Generate one chunk of records, or its encoded JSON body when `json_format` is
+    set. Module-level so worker processes can run it.
+    """
+    if columnar:
+        return _from_columns(random_event_columns(size, chunk_rng(seed)), record_type, json_format)
+    # Records that are only going to be encoded never need validating
+    slotted = record_type == RecordType.Slotted or json_format is not None
+    generate = random_event_record if slotted else random_event_source
+    data = []
+    for i in range(size):
+        data.append(generate())
+    if json_format is not None:
+        return encode_records(data, json_format)
+    return data
+
+def _generate_columns(size: int, seed: Optional[np.random.SeedSequence] = None) -> ColumnBatch:
+    """Generate one column batch. Module-level so worker processes can run it."""
+    return random_event_columns(size, chunk_rng(seed))
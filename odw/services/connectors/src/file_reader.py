@@ -1,6 +1,6 @@
 from typing import Tuple
 from moose_lib import cli_log, CliLogData
-from .s3_file_reader import S3FileReader
+from .s3_file_reader import S3FileReader, get_s3_file_reader
 
 class FileReader:
     """
@@ -35,8 +35,7 @@ class FileReader:
         ))
         
         try:
-            s3_reader = S3FileReader()
-            return s3_reader.read_file(file_path)
+            return get_s3_file_reader().read_file(file_path)
         except Exception as e:
             cli_log(CliLogData(
                 action="FileReader",
@@ -0,0 +1,120 @@
+from typing import List, NamedTuple, Optional
+import threading
+import sqlite3
+import time
+import os
+
+class IndexedObject(NamedTuple):
+    key: str
+    size: int
+    etag: str
+    last_modified: str
+
+def _prefix_end(prefix: str) -> str:
+    # Smallest string greater than every string starting with `prefix` (keys are valid UTF-8)
+    return prefix + "\U0010ffff"
+
+class ListingIndex:
+    """
+    Persistent SQLite index of bucket listings (key, size, ETag, LastModified), so
+    resolving patterns over a bucket that was listed recently is a local range scan
+    instead of another pass over list_objects_v2.
+
+    Each listed prefix is refreshed on demand once it is older than `ttl`: normally
+    incrementally, listing only the keys after the last key seen (StartAfter), which
+    picks up new objects in key order; and in full every `full_refresh_interval`,
+    which also picks up deleted and overwritten objects. Between full refreshes the
+    index can therefore miss changes to keys it has already seen.
+    """
+
+    def __init__(self, path: str, ttl: float = 30.0, full_refresh_interval: float = 600.0):
+        self.path = path
+        self.ttl = ttl
+        self.full_refresh_interval = full_refresh_interval
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            " bucket TEXT NOT NULL, prefix TEXT NOT NULL, last_key TEXT NOT NULL,"
+            " refreshed_at REAL NOT NULL, full_refreshed_at REAL NOT NULL, PRIMARY KEY (bucket, prefix));"
+            "CREATE TABLE IF NOT EXISTS objects ("
+            " bucket TEXT NOT NULL, key TEXT NOT NULL, size INTEGER NOT NULL, etag TEXT NOT NULL,"
+            " last_modified TEXT NOT NULL, PRIMARY KEY (bucket, key));"
+        )
+
+    def objects(self, s3_client, bucket: str, prefix: str, max_age: Optional[float] = None) -> List[IndexedObject]:
+        """
+        Objects under `prefix`, in key order, from the index. The covering listing is
+        refreshed first if it is older than `max_age` (default: the index's ttl); a
+        prefix no listing covers yet is listed in full.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        with self._lock:
+            listing = self._covering_listing(bucket, prefix)
+            now = time.time()
+            if listing is None:
+                self._full_refresh(s3_client, bucket, prefix)
+            else:
+                listed_prefix, last_key, refreshed_at, full_refreshed_at = listing
+                if now - full_refreshed_at > self.full_refresh_interval:
+                    self._full_refresh(s3_client, bucket, listed_prefix)
+                elif now - refreshed_at > max_age:
+                    self._incremental_refresh(s3_client, bucket, listed_prefix, last_key)
+
+            rows = self._db.execute(
+                "SELECT key, size, etag, last_modified FROM objects WHERE bucket = ? AND key >= ? AND key < ? ORDER BY key",
+                (bucket, prefix, _prefix_end(prefix))
+            ).fetchall()
+        return [IndexedObject(*row) for row in rows]
+
+    def invalidate(self, bucket: str, prefix: str = "") -> None:
+        """Drop the listings under `prefix`, so the next lookup lists S3 in full."""
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM listings WHERE bucket = ? AND prefix >= ? AND prefix < ?", (bucket, prefix, _prefix_end(prefix))
+            )
+
+    def _covering_listing(self, bucket: str, prefix: str):
+        # The longest listed prefix that `prefix` starts with
+        listings = self._db.execute(
+            "SELECT prefix, last_key, refreshed_at, full_refreshed_at FROM listings WHERE bucket = ?", (bucket,)
+        ).fetchall()
+        covering = [listing for listing in listings if prefix.startswith(listing[0])]
+        return max(covering, key=lambda listing: len(listing[0])) if covering else None
+
+    def _full_refresh(self, s3_client, bucket: str, prefix: str) -> None:
+        rows = list(self._list(s3_client, bucket, prefix, start_after=None))
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "DELETE FROM objects WHERE bucket = ? AND key >= ? AND key < ?", (bucket, prefix, _prefix_end(prefix))
+            )
+            self._db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?)", rows)
+            # A full listing of this prefix supersedes the listings of the prefixes under it
+            self._db.execute(
+                "DELETE FROM listings WHERE bucket = ? AND prefix > ? AND prefix < ?", (bucket, prefix, _prefix_end(prefix))
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO listings VALUES (?, ?, ?, ?, ?)",
+                (bucket, prefix, rows[-1][1] if rows else "", now, now)
+            )
+
+    def _incremental_refresh(self, s3_client, bucket: str, prefix: str, last_key: str) -> None:
+        rows = list(self._list(s3_client, bucket, prefix, start_after=last_key or None))
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.execute(
+                "UPDATE listings SET last_key = ?, refreshed_at = ? WHERE bucket = ? AND prefix = ?",
+                (rows[-1][1] if rows else last_key, time.time(), bucket, prefix)
+            )
+
+    def _list(self, s3_client, bucket: str, prefix: str, start_after: Optional[str]):
+        request = {"Bucket": bucket, "Prefix": prefix}
+        if start_after:
+            request["StartAfter"] = start_after
+        for page in s3_client.get_paginator("list_objects_v2").paginate(**request):
+            for obj in page.get("Contents", []):
+                yield (bucket, obj["Key"], obj.get("Size", 0), obj.get("ETag", ""), obj["LastModified"].isoformat())
@@ -0,0 +1,26 @@
+from typing import Any, Dict, Tuple
+import threading
+import os
+
+# Parsed moose.config.toml, shared by every reader of it in the process.
+#
+# Kept apart from the S3 client registry so that helpers which only need a config
+# section (Temporal, Redpanda, ClickHouse) do not import boto3; toml is imported
+# on the first parse.
+
+_config_lock = threading.Lock()
+_config_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+def load_moose_config(config_path: str = "moose.config.toml") -> Dict[str, Any]:
+    """Parsed moose.config.toml, re-read only when the file changes. Raises FileNotFoundError if missing."""
+    path = os.path.abspath(config_path)
+    mtime = os.path.getmtime(path)
+    with _config_lock:
+        cached = _config_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            import toml
+
+            with open(path, 'r') as f:
+                cached = (mtime, toml.load(f))
+            _config_cache[path] = cached
+        return cached[1]
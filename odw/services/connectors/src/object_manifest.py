@@ -0,0 +1,63 @@
+from typing import Iterable, List, Optional, Tuple
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+
+def manifest_scope(*parts: Optional[str]) -> str:
+    """Short stable hash of whatever decides a file's output, e.g. the processing instructions."""
+    return hashlib.sha256("\0".join(part or "" for part in parts).encode("utf-8")).hexdigest()[:16]
+
+class ObjectManifest:
+    """
+    Persistent SQLite record of the S3 objects already processed, keyed by path,
+    ETag and a scope (e.g. a hash of the processing instructions). An object counts
+    as processed only at the ETag it had when it was processed, so new objects and
+    objects overwritten since are pending again, and so is everything after the
+    scope changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS processed ("
+            " scope TEXT NOT NULL, path TEXT NOT NULL, etag TEXT NOT NULL, processed_at REAL NOT NULL,"
+            " PRIMARY KEY (scope, path))"
+        )
+        self._db.commit()
+
+    def pending(self, objects: Iterable[Tuple[str, Optional[str]]], scope: str) -> List[str]:
+        """The paths of (path, ETag) pairs not processed at that ETag; an unknown ETag counts as pending."""
+        objects = list(objects)
+        processed = {}
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters
+            for i in range(0, len(objects), 500):
+                paths = [path for path, _ in objects[i:i + 500]]
+                processed.update(self._db.execute(
+                    f"SELECT path, etag FROM processed WHERE scope = ? AND path IN ({', '.join('?' * len(paths))})",
+                    [scope, *paths]
+                ).fetchall())
+        return [path for path, etag in objects if not etag or processed.get(path) != etag]
+
+    def mark_processed(self, objects: Iterable[Tuple[str, Optional[str]]], scope: str) -> int:
+        """Record (path, ETag) pairs as processed; returns how many were recorded."""
+        now = time.time()
+        rows = [(scope, path, etag, now) for path, etag in objects if etag]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO processed VALUES (?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def forget(self, scope: Optional[str] = None) -> None:
+        """Drop the records of one scope, or all of them, so those objects are processed again."""
+        with self._lock, self._db:
+            if scope is None:
+                self._db.execute("DELETE FROM processed")
+            else:
+                self._db.execute("DELETE FROM processed WHERE scope = ?", (scope,))
@@ -0,0 +1,140 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, TypeVar
+import itertools
+import multiprocessing
+import threading
+import numpy as np
+
+R = TypeVar('R')
+
+# Chunk generator run inside a worker process: (chunk_size, seed) -> records
+ChunkGenerator = Callable[[int, Optional[np.random.SeedSequence]], List[R]]
+
+# Chunk size extract() generates with, fixed so that a seeded batch does not depend on the worker count
+EXTRACT_CHUNK_SIZE = 10_000
+
+def chunk_sizes(batch_size: int, chunk_size: int) -> List[int]:
+    """Split `batch_size` records into chunk sizes of at most `chunk_size`."""
+    full, rest = divmod(batch_size, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+def chunk_seeds(seed: Optional[int], count: int) -> List[Optional[np.random.SeedSequence]]:
+    """
+    Derive one independent seed per chunk from a base seed. Chunk seeds depend only
+    on the base seed and chunk index, so columnar output is reproducible for a
+    given seed and chunk size no matter how many workers generate it.
+    """
+    if seed is None:
+        return [None] * count
+    return np.random.SeedSequence(seed).spawn(count)
+
+def chunk_rng(seed: Optional[np.random.SeedSequence]) -> np.random.Generator:
+    """
+    NumPy generator for one chunk of the columnar generators; without a seed, fresh
+    entropy is used. The row-by-row generators draw from the process-wide `random`
+    module, uuid4() and the clock, which are deliberately left unseeded.
+    """
+    return np.random.default_rng(seed)
+
+# Process pool shared by every connector in this process. Spawning workers costs
+# far more than generating a typical batch, so the pool is started on first use
+# and kept for the life of the process instead of once per extract call.
+_pool_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    The shared generation pool, with at least `workers` processes. The first
+    request for more processes replaces it with a larger pool; chunks already
+    submitted to the old one still complete.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # "spawn" is safe to use from threaded hosts such as the workflow worker
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+def shutdown_process_pool() -> None:
+    """Stop the shared pool's processes; the next parallel extract starts a new pool."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        pool, _pool, _pool_workers = _pool, None, 0
+    if pool is not None:
+        pool.shutdown()
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker died: the pool refuses new work, so drop it for the next caller
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool, _pool_workers = None, 0
+
+def map_in_processes(function: Callable[..., R], tasks: Iterable[tuple], workers: int) -> Iterator[R]:
+    """
+    Run `function(*task)` for each task on the shared pool with `workers`
+    processes, yielding results in task order as they complete. At most two tasks
+    per worker are in flight, so memory stays bounded when the consumer is slower
+    than the pool. `function` must be picklable (a module-level function, a
+    functools.partial of one, or a method of a picklable object).
+    """
+    pool = get_process_pool(workers)
+    pending: Deque[Future] = deque()
+    tasks = iter(tasks)
+    try:
+        for task in tasks:
+            pending.append(pool.submit(function, *task))
+            if len(pending) >= workers * 2:
+                break
+
+        while pending:
+            result = pending.popleft().result()
+            next_task = next(tasks, None)
+            if next_task is not None:
+                pending.append(pool.submit(function, *next_task))
+            yield result
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise
+    finally:
+        # The consumer stopped early or a task failed: drop the tasks not started yet
+        for future in pending:
+            future.cancel()
+
+def parallel_starmap(batch_size: int, workers: int) -> Callable[[Callable[..., R], Iterable[tuple]], Iterator[R]]:
+    """
+    The starmap to generate a batch of `batch_size` records with: the shared pool
+    for `workers` > 1, or plain itertools.starmap for one worker or a batch smaller
+    than EXTRACT_CHUNK_SIZE, where a round trip through the pool costs more than it saves.
+    """
+    if workers <= 1 or batch_size < EXTRACT_CHUNK_SIZE:
+        return itertools.starmap
+    return lambda function, tasks: map_in_processes(function, tasks, workers)
+
+def generate_in_processes(
+    generate_chunk: ChunkGenerator,
+    batch_size: int,
+    chunk_size: int,
+    workers: int,
+    seed: Optional[int] = None
+) -> Iterator[List[R]]:
+    """
+    Generate `batch_size` records on the shared pool with `workers` processes,
+    yielding chunks in order as they complete (see map_in_processes()). A batch
+    smaller than EXTRACT_CHUNK_SIZE, or of a single chunk, is generated in this
+    process, where it is faster than a round trip through the pool; the seeded
+    output is the same either way.
+
+    `generate_chunk` must be picklable (a module-level function or a
+    functools.partial of one).
+    """
+    sizes = chunk_sizes(batch_size, chunk_size)
+    seeds = chunk_seeds(seed, len(sizes))
+    starmap = parallel_starmap(batch_size, workers if len(sizes) > 1 else 1)
+    yield from starmap(generate_chunk, zip(sizes, seeds))
@@ -1,11 +1,16 @@
-from typing import List, Optional
+from typing import Any, Callable, ClassVar, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Type, TypeVar, Union
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 from enum import Enum
+import numpy as np
+import itertools
 import random
 import string
 import uuid
 import json
+from .parallel import EXTRACT_CHUNK_SIZE, chunk_sizes
 
 class LogLevel(str, Enum):
     INFO = "INFO"
@@ -47,6 +52,60 @@ class EventSource(BaseModel):
     ip_address: Optional[str]
     user_agent: Optional[str]
 
+class RecordType(str, Enum):
+    Model = "model"      # Pydantic models, validated on construction
+    Slotted = "slotted"  # Lightweight slotted records, validated only on to_source()
+
+class _Record:
+    """
+    Base for the slotted record types. Connector output is valid by construction,
+    so records skip validation and only convert to their Pydantic source model
+    when to_source() is called, e.g. at the ingest boundary.
+    """
+    __slots__ = ()
+    source_model: ClassVar[Type[BaseModel]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_source(self) -> BaseModel:
+        return self.source_model.model_validate(self.to_dict())
+
+@dataclass(slots=True)
+class BlobRecord(_Record):
+    source_model: ClassVar[Type[BaseModel]] = BlobSource
+    id: str
+    bucket_name: str
+    file_path: str
+    file_name: str
+    file_size: int
+    permissions: List[str]
+    content_type: Optional[str]
+    ingested_at: str
+
+@dataclass(slots=True)
+class LogRecord(_Record):
+    source_model: ClassVar[Type[BaseModel]] = LogSource
+    id: str
+    timestamp: str
+    level: LogLevel
+    message: str
+    source: Optional[str]
+    trace_id: Optional[str]
+
+@dataclass(slots=True)
+class EventRecord(_Record):
+    source_model: ClassVar[Type[BaseModel]] = EventSource
+    id: str
+    event_name: str
+    timestamp: str
+    distinct_id: str
+    session_id: Optional[str]
+    project_id: str
+    properties: Optional[str]
+    ip_address: Optional[str]
+    user_agent: Optional[str]
+
 def random_string(length: int) -> str:
     return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
@@ -103,6 +162,89 @@ ACTIVE_TRACE_IDS = [
     "req_c9d0e1f2"     # Background cleanup
 ]
 
+# Log messages by level
+INFO_MESSAGES = [
+    "Application started successfully",
+    "User session created",
+    "Database connection established",
+    "Transaction completed successfully",
+    "Scheduled job executed",
+    "API endpoint called",
+    "Cache refreshed",
+    "Service health check passed"
+]
+
+DEBUG_MESSAGES = [
+    "Cache miss for key user_12345",
+    "API response time: 234ms",
+    "Memory usage: 85%",
+    "Thread pool size: 10",
+    "SQL query executed in 45ms",
+    "Processing batch of 500 records",
+    "Variable state: user_id=12345, status=active",
+    "Function entered with parameters: limit=100, offset=0"
+]
+
+ERROR_MESSAGES = [
+    "Failed to connect to external service",
+    "Invalid authentication token",
+    "Data validation failed",
+    "Database timeout exceeded",
+    "HTTP 500 Internal Server Error",
+    "Out of memory exception",
+    "Connection refused by upstream server",
+    "File not found: /path/to/config.yaml"
+]
+
+WARN_MESSAGES = [
+    "Deprecated API endpoint called",
+    "Rate limit approaching for user",
+    "Disk space running low",
+    "SSL certificate expires soon",
+    "High memory usage detected",
+    "Slow query detected",
+    "Failed login attempt",
+    "Configuration value not set, using default"
+]
+
+LOG_MESSAGES = {
+    LogLevel.INFO: INFO_MESSAGES,
+    LogLevel.DEBUG: DEBUG_MESSAGES,
+    LogLevel.ERROR: ERROR_MESSAGES,
+    LogLevel.WARN: WARN_MESSAGES
+}
+
+# --- Event simulation arrays ---
+EVENT_NAMES = [
+    "pageview", "signup", "login", "logout", "click", "purchase", "add_to_cart", 
+    "remove_from_cart", "checkout_started", "checkout_completed", "form_submitted",
+    "video_played", "video_paused", "search", "share", "download", "feature_used",
+    "experiment_viewed", "error_occurred", "session_started", "session_ended"
+]
+
+BROWSERS = ["Chrome", "Firefox", "Safari", "Edge", "Opera"]
+REFERRERS = [
+    "https://google.com/search", "https://facebook.com", "https://twitter.com",
+    "https://linkedin.com", "https://github.com", "direct", "email_campaign",
+    "https://reddit.com", "https://stackoverflow.com", "organic_search"
+]
+
+SIGNUP_METHODS = ["email", "google_oauth", "github_oauth", "facebook_oauth", "manual"]
+DEVICES = ["desktop", "mobile", "tablet"]
+OPERATING_SYSTEMS = ["Windows", "macOS", "Linux", "iOS", "Android"]
+PROJECT_IDS = ["proj_web", "proj_mobile", "proj_api", "proj_admin"]
+PAGES = ["/home", "/about", "/products", "/pricing", "/contact", "/blog", "/docs"]
+ELEMENT_TYPES = ["button", "link", "image", "form"]
+ELEMENT_TEXTS = ["Get Started", "Learn More", "Sign Up", "Download"]
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15",
+    "Mozilla/5.0 (Android 11; Mobile; rv:68.0) Gecko/68.0 Firefox/88.0"
+]
+
 def get_content_type(file_name: str) -> Optional[str]:
     """Determine content type based on file extension"""
     extension = file_name.split('.')[-1].lower() if '.' in file_name else ''
@@ -124,60 +266,9 @@ def get_content_type(file_name: str) -> Optional[str]:
 
 def generate_log_message(level: LogLevel) -> str:
     """Generate realistic log messages based on level"""
-    info_messages = [
-        "Application started successfully",
-        "User session created",
-        "Database connection established",
-        "Transaction completed successfully",
-        "Scheduled job executed",
-        "API endpoint called",
-        "Cache refreshed",
-        "Service health check passed"
-    ]
-
-    debug_messages = [
-        "Cache miss for key user_12345",
-        "API response time: 234ms",
-        "Memory usage: 85%",
-        "Thread pool size: 10",
-        "SQL query executed in 45ms",
-        "Processing batch of 500 records",
-        "Variable state: user_id=12345, status=active",
-        "Function entered with parameters: limit=100, offset=0"
-    ]
-
-    error_messages = [
-        "Failed to connect to external service",
-        "Invalid authentication token",
-        "Data validation failed",
-        "Database timeout exceeded",
-        "HTTP 500 Internal Server Error",
-        "Out of memory exception",
-        "Connection refused by upstream server",
-        "File not found: /path/to/config.yaml"
-    ]
-
-    warn_messages = [
-        "Deprecated API endpoint called",
-        "Rate limit approaching for user",
-        "Disk space running low",
-        "SSL certificate expires soon",
-        "High memory usage detected",
-        "Slow query detected",
-        "Failed login attempt",
-        "Configuration value not set, using default"
-    ]
+    return random.choice(LOG_MESSAGES[level])
 
-    if level == LogLevel.INFO:
-        return random.choice(info_messages)
-    elif level == LogLevel.DEBUG:
-        return random.choice(debug_messages)
-    elif level == LogLevel.ERROR:
-        return random.choice(error_messages)
-    else:
-        return random.choice(warn_messages)
-
-def random_blob_source() -> BlobSource:
+def _random_blob_fields() -> Dict[str, Any]:
     bucket = random.choice(BUCKET_NAMES)
     file_name = random.choice(FILE_NAMES)
 
@@ -192,7 +283,7 @@ def random_blob_source() -> BlobSource:
 
     file_size = random.randint(256, 10 * 1024 * 1024)  # 256 bytes to 10 MB
 
-    return BlobSource(
+    return dict(
         id=str(uuid.uuid4()),
         bucket_name=bucket,
         file_path=file_path,
@@ -203,7 +294,7 @@ def random_blob_source() -> BlobSource:
         ingested_at=datetime.now().isoformat()
     )
 
-def random_log_source() -> LogSource:
+def _random_log_fields() -> Dict[str, Any]:
     level = random_log_level()
     message = generate_log_message(level)
     source = random.choice(LOG_SOURCES)
@@ -212,7 +303,7 @@ def random_log_source() -> LogSource:
     # 70% chance to have a trace_id from active traces (simulating distributed operations)
     trace_id = random.choice(ACTIVE_TRACE_IDS) if random.random() > 0.3 else None
 
-    return LogSource(
+    return dict(
         id=str(uuid.uuid4()),
         timestamp=datetime.now().isoformat(),
         level=level,
@@ -221,27 +312,9 @@ def random_log_source() -> LogSource:
         trace_id=trace_id
     )
 
-def random_event_source() -> EventSource:
-    """Generate a structured EventSource object following PostHog model"""
-    event_names = [
-        "pageview", "signup", "login", "logout", "click", "purchase", "add_to_cart", 
-        "remove_from_cart", "checkout_started", "checkout_completed", "form_submitted",
-        "video_played", "video_paused", "search", "share", "download", "feature_used",
-        "experiment_viewed", "error_occurred", "session_started", "session_ended"
-    ]
-    
-    browsers = ["Chrome", "Firefox", "Safari", "Edge", "Opera"]
-    referrers = [
-        "https://google.com/search", "https://facebook.com", "https://twitter.com",
-        "https://linkedin.com", "https://github.com", "direct", "email_campaign",
-        "https://reddit.com", "https://stackoverflow.com", "organic_search"
-    ]
-    
-    signup_methods = ["email", "google_oauth", "github_oauth", "facebook_oauth", "manual"]
-    devices = ["desktop", "mobile", "tablet"]
-    operating_systems = ["Windows", "macOS", "Linux", "iOS", "Android"]
-    
-    event_name = random.choice(event_names)
+def _random_event_fields() -> Dict[str, Any]:
+    """Generate the fields of a structured event following PostHog model"""
+    event_name = random.choice(EVENT_NAMES)
     timestamp = datetime.now().isoformat()
     
     # Generate user IDs (mix of identified and anonymous)
@@ -251,47 +324,38 @@ def random_event_source() -> EventSource:
         distinct_id = str(uuid.uuid4())
     
     session_id = str(uuid.uuid4())
-    project_id = f"proj_{random.choice(['web', 'mobile', 'api', 'admin'])}"
+    project_id = random.choice(PROJECT_IDS)
     
     # Generate realistic properties based on event type
     properties = {
-        "browser": random.choice(browsers),
-        "device_type": random.choice(devices),
-        "os": random.choice(operating_systems),
-        "referrer": random.choice(referrers)
+        "browser": random.choice(BROWSERS),
+        "device_type": random.choice(DEVICES),
+        "os": random.choice(OPERATING_SYSTEMS),
+        "referrer": random.choice(REFERRERS)
     }
     
     # Add event-specific properties
     if event_name == "signup":
-        properties["signup_method"] = random.choice(signup_methods)
+        properties["signup_method"] = random.choice(SIGNUP_METHODS)
     elif event_name == "purchase":
         properties["amount"] = round(random.uniform(10.0, 500.0), 2)
         properties["currency"] = "USD"
         properties["product_count"] = random.randint(1, 5)
     elif event_name == "pageview":
-        pages = ["/home", "/about", "/products", "/pricing", "/contact", "/blog", "/docs"]
-        properties["page"] = random.choice(pages)
+        properties["page"] = random.choice(PAGES)
         properties["page_title"] = f"Page {properties['page'].replace('/', '').title()}"
     elif event_name == "click":
-        properties["element_type"] = random.choice(["button", "link", "image", "form"])
-        properties["element_text"] = random.choice(["Get Started", "Learn More", "Sign Up", "Download"])
+        properties["element_type"] = random.choice(ELEMENT_TYPES)
+        properties["element_text"] = random.choice(ELEMENT_TEXTS)
     
     # Generate IP address and user agent
     ip_address = f"{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}.{random.randint(1,255)}"
-    
-    user_agents = [
-        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
-        "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36",
-        "Mozilla/5.0 (iPhone; CPU iPhone OS 14_6 like Mac OS X) AppleWebKit/605.1.15",
-        "Mozilla/5.0 (Android 11; Mobile; rv:68.0) Gecko/68.0 Firefox/88.0"
-    ]
-    user_agent = random.choice(user_agents)
+    user_agent = random.choice(USER_AGENTS)
     
     # Serialize properties as JSON string for ClickHouse compatibility
     properties_json = json.dumps(properties)
     
-    return EventSource(
+    return dict(
         id=str(uuid.uuid4()),
         event_name=event_name,
         timestamp=timestamp,
@@ -302,3 +366,696 @@ def random_event_source() -> EventSource:
         ip_address=ip_address,
         user_agent=user_agent
     )
+
+def random_blob_source() -> BlobSource:
+    return BlobSource(**_random_blob_fields())
+
+def random_blob_record() -> BlobRecord:
+    return BlobRecord(**_random_blob_fields())
+
+def random_log_source() -> LogSource:
+    return LogSource(**_random_log_fields())
+
+def random_log_record() -> LogRecord:
+    return LogRecord(**_random_log_fields())
+
+def random_event_source() -> EventSource:
+    """Generate a structured EventSource object following PostHog model"""
+    return EventSource(**_random_event_fields())
+
+def random_event_record() -> EventRecord:
+    return EventRecord(**_random_event_fields())
+
+# --- Columnar batch generation ---
+#
+# The random_*_columns functions below generate a whole batch at once with NumPy
+# instead of building one record at a time. Each returns a dict of column name ->
+# numpy array (string columns are object arrays of Python str), so callers that
+# only need columns never pay for per-row objects. Use records_from_columns to
+# materialize rows when they are needed.
+
+ColumnBatch = Dict[str, np.ndarray]
+M = TypeVar('M', BaseModel, _Record)
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+_UUID_HEX_POSITIONS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+_RANDOM_STRING_ALPHABET = np.frombuffer((string.ascii_lowercase + string.digits).encode(), dtype=np.uint8)
+
+def _choice_column(rng: np.random.Generator, values: List, size: int) -> np.ndarray:
+    """Pick `size` values uniformly from `values` as an object array."""
+    table = np.empty(len(values), dtype=object)
+    table[:] = values
+    return table[rng.integers(0, len(values), size=size)]
+
+def random_uuid_column(size: int, rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """Generate `size` random (version 4) UUID strings in bulk."""
+    rng = rng or np.random.default_rng()
+    raw = np.frombuffer(rng.bytes(size * 16), dtype=np.uint8).reshape(size, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+
+    nibbles = np.empty((size, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = _HEX_DIGITS[raw >> 4]
+    nibbles[:, 1::2] = _HEX_DIGITS[raw & 0x0F]
+
+    chars = np.full((size, 36), ord('-'), dtype=np.uint8)
+    chars[:, _UUID_HEX_POSITIONS] = nibbles
+    return chars.view('S36').ravel().astype('U36').astype(object)
+
+def timestamp_column(size: int, start: Optional[datetime] = None) -> np.ndarray:
+    """
+    Generate ISO-8601 timestamps for a batch, one microsecond apart starting at
+    `start` (defaults to now), matching datetime.isoformat() output.
+    """
+    base = np.datetime64(start or datetime.now(), 'us')
+    stamps = base + np.arange(size).astype('timedelta64[us]')
+    return np.datetime_as_string(stamps, unit='us').astype(object)
+
+def _random_path_column(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Vectorized equivalent of the folder path built in random_blob_source."""
+    if size == 0:
+        # The reshapes below cannot infer a row width from an empty batch
+        return np.empty(0, dtype=object)
+    max_depth, max_len = 3, 8
+    depth = rng.integers(1, max_depth + 1, size=size)
+    lengths = rng.integers(3, max_len + 1, size=(size, max_depth))
+    lengths[np.arange(max_depth) >= depth[:, None]] = 0
+
+    # Lay out "/" + up to three "<folder>/" slots, then compact each row so the
+    # unused slot positions collapse out of the string.
+    slot_width = max_len + 1
+    random_bytes = np.frombuffer(rng.bytes(size * max_depth * slot_width), dtype=np.uint8)
+    chars = _RANDOM_STRING_ALPHABET[random_bytes % len(_RANDOM_STRING_ALPHABET)].reshape(size, max_depth, slot_width)
+    offsets = np.arange(slot_width)
+    valid = offsets < (lengths[:, :, None] + 1)
+    valid &= lengths[:, :, None] > 0
+    slash = offsets == lengths[:, :, None]
+    chars[slash] = ord('/')
+
+    chars = np.concatenate([np.full((size, 1), ord('/'), dtype=np.uint8), chars.reshape(size, -1)], axis=1)
+    valid = np.concatenate([np.ones((size, 1), dtype=bool), valid.reshape(size, -1)], axis=1)
+    rows, cols = np.nonzero(valid)
+    compact = np.zeros_like(chars)
+    compact[rows, np.cumsum(valid, axis=1)[rows, cols] - 1] = chars[rows, cols]
+    return compact.view(f'S{compact.shape[1]}').ravel().astype(str).astype(object)
+
+def _random_permissions_column(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Vectorized equivalent of random.sample(BLOB_PERMISSIONS, randint(1, 4))."""
+    n = len(BLOB_PERMISSIONS)
+    # Every (count, ordering) pair maps to one pre-built permission list.
+    prefixes = np.empty((n, n ** n), dtype=object)
+    for order in itertools.permutations(range(n)):
+        code = sum(index * n ** position for position, index in enumerate(order))
+        for count in range(1, n + 1):
+            prefixes[count - 1, code] = tuple(BLOB_PERMISSIONS[i] for i in order[:count])
+
+    count = rng.integers(1, n + 1, size=size)
+    order = np.argsort(rng.random((size, n)), axis=1)
+    codes = (order * (n ** np.arange(n))).sum(axis=1)
+    column = np.empty(size, dtype=object)
+    column[:] = list(map(list, prefixes[count - 1, codes]))
+    return column
+
+def random_blob_columns(size: int, rng: Optional[np.random.Generator] = None) -> ColumnBatch:
+    """Generate a batch of BlobSource fields as columns."""
+    rng = rng or np.random.default_rng()
+    file_index = rng.integers(0, len(FILE_NAMES), size=size)
+    file_names = np.array(FILE_NAMES, dtype=object)
+    content_types = np.array([get_content_type(name) for name in FILE_NAMES], dtype=object)
+
+    return {
+        "id": random_uuid_column(size, rng),
+        "bucket_name": _choice_column(rng, BUCKET_NAMES, size),
+        "file_path": _random_path_column(rng, size),
+        "file_name": file_names[file_index],
+        "file_size": rng.integers(256, 10 * 1024 * 1024, size=size, endpoint=True),
+        "permissions": _random_permissions_column(rng, size),
+        "content_type": content_types[file_index],
+        "ingested_at": timestamp_column(size)
+    }
+
+def random_log_columns(size: int, rng: Optional[np.random.Generator] = None) -> ColumnBatch:
+    """Generate a batch of LogSource fields as columns."""
+    rng = rng or np.random.default_rng()
+    levels = list(LogLevel)
+    level_index = rng.integers(0, len(levels), size=size)
+
+    # All levels have the same number of messages, so a 2-D lookup picks a
+    # message for each row's level in one step.
+    messages = np.array([LOG_MESSAGES[level] for level in levels], dtype=object)
+    message_index = rng.integers(0, messages.shape[1], size=size)
+
+    trace_ids = _choice_column(rng, ACTIVE_TRACE_IDS, size)
+    trace_ids[rng.random(size) <= 0.3] = None
+
+    return {
+        "id": random_uuid_column(size, rng),
+        "timestamp": timestamp_column(size),
+        "level": np.array(levels, dtype=object)[level_index],
+        "message": messages[level_index, message_index],
+        "source": _choice_column(rng, LOG_SOURCES, size),
+        "trace_id": trace_ids
+    }
+
+def _event_properties_column(
+    rng: np.random.Generator,
+    event_names: np.ndarray,
+    size: int,
+    base_index: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Build the JSON properties column for a batch of events. The shared properties
+    have few enough combinations to pre-render, so rows are assembled by string
+    concatenation rather than json.dumps per row. `base_index` pins the shared
+    browser/device/os/referrer combination per row (e.g. per session).
+    """
+    base = np.array([
+        json.dumps({"browser": b, "device_type": d, "os": o, "referrer": r})[:-1]
+        for b in BROWSERS for d in DEVICES for o in OPERATING_SYSTEMS for r in REFERRERS
+    ], dtype=object)
+    if base_index is None:
+        base_index = rng.integers(0, len(base), size=size)
+    properties = base[base_index]
+
+    suffixes = np.full(size, "}", dtype=object)
+
+    is_signup = event_names == "signup"
+    suffixes[is_signup] = _choice_column(
+        rng, [f', "signup_method": {json.dumps(m)}}}' for m in SIGNUP_METHODS], int(is_signup.sum())
+    )
+
+    is_pageview = event_names == "pageview"
+    suffixes[is_pageview] = _choice_column(
+        rng,
+        [f', "page": "{page}", "page_title": "Page {page.replace("/", "").title()}"}}' for page in PAGES],
+        int(is_pageview.sum())
+    )
+
+    is_click = event_names == "click"
+    suffixes[is_click] = _choice_column(
+        rng,
+        [f', "element_type": "{t}", "element_text": "{text}"}}' for t in ELEMENT_TYPES for text in ELEMENT_TEXTS],
+        int(is_click.sum())
+    )
+
+    is_purchase = event_names == "purchase"
+    purchases = int(is_purchase.sum())
+    amounts = np.round(rng.uniform(10.0, 500.0, size=purchases), 2).tolist()
+    counts = rng.integers(1, 6, size=purchases).tolist()
+    suffixes[is_purchase] = [
+        f', "amount": {amount!r}, "currency": "USD", "product_count": {count}}}'
+        for amount, count in zip(amounts, counts)
+    ]
+
+    return properties + suffixes
+
+def _ip_address_column(rng: np.random.Generator, size: int) -> np.ndarray:
+    octets = np.array([str(i) for i in range(256)], dtype=object)
+    parts = octets[rng.integers(1, 256, size=(4, size))]
+    return parts[0] + "." + parts[1] + "." + parts[2] + "." + parts[3]
+
+def random_event_columns(size: int, rng: Optional[np.random.Generator] = None) -> ColumnBatch:
+    """Generate a batch of EventSource fields as columns."""
+    rng = rng or np.random.default_rng()
+    event_names = _choice_column(rng, EVENT_NAMES, size)
+
+    # 70% identified users, 30% anonymous
+    user_ids = np.array([f"user_{i}" for i in range(1000, 10000)], dtype=object)
+    distinct_ids = user_ids[rng.integers(0, len(user_ids), size=size)]
+    anonymous = rng.random(size) <= 0.3
+    distinct_ids[anonymous] = random_uuid_column(int(anonymous.sum()), rng)
+
+    return {
+        "id": random_uuid_column(size, rng),
+        "event_name": event_names,
+        "timestamp": timestamp_column(size),
+        "distinct_id": distinct_ids,
+        "session_id": random_uuid_column(size, rng),
+        "project_id": _choice_column(rng, PROJECT_IDS, size),
+        "properties": _event_properties_column(rng, event_names, size),
+        "ip_address": _ip_address_column(rng, size),
+        "user_agent": _choice_column(rng, USER_AGENTS, size)
+    }
+
+def column_batch_size(columns: ColumnBatch) -> int:
+    """Number of rows in a column batch."""
+    return len(next(iter(columns.values()))) if columns else 0
+
+def records_from_columns(model: Type[M], columns: ColumnBatch) -> List[M]:
+    """
+    Materialize a column batch into model or record instances. The generated data
+    is valid by construction, so Pydantic models are built with model_construct
+    and skip validation.
+    """
+    names = list(columns.keys())
+    rows = zip(*(column.tolist() for column in columns.values()))
+    construct = model.model_construct if issubclass(model, BaseModel) else model
+    return [construct(**dict(zip(names, row))) for row in rows]
+
+def rechunk_columns(batches: Iterable[ColumnBatch], chunk_size: int) -> Iterator[ColumnBatch]:
+    """Regroup a series of column batches into batches of `chunk_size` rows (the last may be smaller)."""
+    pending: List[ColumnBatch] = []
+    rows = 0
+    for batch in batches:
+        size = column_batch_size(batch)
+        if size == 0:
+            continue
+        pending.append(batch)
+        rows += size
+        while rows >= chunk_size:
+            columns = _concat_columns(pending)
+            yield {name: column[:chunk_size] for name, column in columns.items()}
+            rows -= chunk_size
+            pending = [{name: column[chunk_size:] for name, column in columns.items()}] if rows else []
+    if rows:
+        yield _concat_columns(pending)
+
+def _concat_columns(batches: List[ColumnBatch]) -> ColumnBatch:
+    if len(batches) == 1:
+        return batches[0]
+    return {name: np.concatenate([batch[name] for batch in batches]) for name in batches[0]}
+
+# --- Workload profiles ---
+#
+# The generators above draw every field independently and uniformly, which gives
+# none of the skew or cardinality of real traffic. A workload profile generates
+# event and log batches with a given shape instead. Profiles are registered by
+# name so connectors can select one with `profile="realistic"`, and new shapes
+# can be added with @register_workload_profile.
+#
+# A profile generates a whole batch as a series of column batches, split the way
+# the profile needs rather than the way the caller chunks the output, so shapes
+# that span many rows (sessions, traces, arrival times) are never cut at a chunk
+# boundary. All randomness comes from the seed: the same seed gives the same
+# batch (timestamps shift with the clock) for any chunk size. `starmap` runs the
+# profile's independent pieces of work, e.g. on a process pool.
+
+# Starmap used to run a profile's blocks: (function, argument tuples) -> results in order
+Starmap = Callable[[Callable, Iterable[tuple]], Iterator]
+
+def _block_rng(seed: np.random.SeedSequence, stream: int, block: int) -> np.random.Generator:
+    """Generator for one stream of one block, derived from `seed` like SeedSequence.spawn() but by index."""
+    return np.random.default_rng(np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (stream, block)))
+
+def _rng_seed(rng: np.random.Generator) -> np.random.SeedSequence:
+    return np.random.SeedSequence(rng.integers(0, 2 ** 63, size=4).tolist())
+
+def _seeded_columns(generate: Callable[[int, np.random.Generator], ColumnBatch], size: int, seed: np.random.SeedSequence, block: int) -> ColumnBatch:
+    return generate(size, _block_rng(seed, 0, block))
+
+class WorkloadProfile:
+    """Uniform profile: the same independent, uniform fields as random_*_columns."""
+    name: ClassVar[str] = "uniform"
+
+    def event_batches(
+        self, size: int, seed: Optional[np.random.SeedSequence] = None, starmap: Starmap = itertools.starmap
+    ) -> Iterator[ColumnBatch]:
+        """A batch of `size` events as consecutive column batches; without a seed, fresh entropy is used."""
+        return self._uniform_batches(random_event_columns, size, seed, starmap)
+
+    def log_batches(
+        self, size: int, seed: Optional[np.random.SeedSequence] = None, starmap: Starmap = itertools.starmap
+    ) -> Iterator[ColumnBatch]:
+        """A batch of `size` logs as consecutive column batches; without a seed, fresh entropy is used."""
+        return self._uniform_batches(random_log_columns, size, seed, starmap)
+
+    def event_columns(self, size: int, rng: np.random.Generator) -> ColumnBatch:
+        """A whole batch of events as one column batch, seeded from `rng`."""
+        return _concat_columns(list(self.event_batches(size, _rng_seed(rng)))) if size else random_event_columns(0, rng)
+
+    def log_columns(self, size: int, rng: np.random.Generator) -> ColumnBatch:
+        """A whole batch of logs as one column batch, seeded from `rng`."""
+        return _concat_columns(list(self.log_batches(size, _rng_seed(rng)))) if size else random_log_columns(0, rng)
+
+    @staticmethod
+    def _uniform_batches(generate, size: int, seed: Optional[np.random.SeedSequence], starmap: Starmap) -> Iterator[ColumnBatch]:
+        seed = seed if seed is not None else np.random.SeedSequence()
+        return starmap(_seeded_columns, [
+            (generate, block_size, seed, block) for block, block_size in enumerate(chunk_sizes(size, EXTRACT_CHUNK_SIZE))
+        ])
+
+WORKLOAD_PROFILES: Dict[str, Type[WorkloadProfile]] = {}
+
+def register_workload_profile(profile: Type[WorkloadProfile]) -> Type[WorkloadProfile]:
+    """Class decorator that makes a profile selectable by its `name`."""
+    WORKLOAD_PROFILES[profile.name] = profile
+    return profile
+
+def get_workload_profile(profile: Union[str, WorkloadProfile]) -> WorkloadProfile:
+    """Resolve a profile name to a default-configured instance; instances pass through."""
+    if isinstance(profile, WorkloadProfile):
+        return profile
+    if profile not in WORKLOAD_PROFILES:
+        raise ValueError(f"Unknown workload profile: {profile}. Available: {', '.join(sorted(WORKLOAD_PROFILES))}")
+    return WORKLOAD_PROFILES[profile]()
+
+register_workload_profile(WorkloadProfile)
+
+@lru_cache(maxsize=8)
+def _zipf_cdf(count: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def zipf_rank_column(size: int, count: int, exponent: float, rng: np.random.Generator) -> np.ndarray:
+    """Draw `size` ranks in 1..count from a bounded Zipf distribution (rank 1 most frequent)."""
+    return np.searchsorted(_zipf_cdf(count, exponent), rng.random(size), side='right') + 1
+
+def bursty_offsets(
+    size: int,
+    rate: float,
+    burst_factor: float,
+    switch_probability: float,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Arrival times in seconds for `size` arrivals of a two-state process: Poisson
+    arrivals at `rate` per second, sped up `burst_factor` times during bursts.
+    Each arrival flips between calm and burst with `switch_probability`, so
+    bursts last 1 / switch_probability arrivals on average.
+    """
+    bursting = np.cumsum(rng.random(size) < switch_probability) % 2 == 1
+    gaps = rng.exponential(1.0 / rate, size=size)
+    gaps[bursting] /= burst_factor
+    return np.cumsum(gaps)
+
+def _offset_timestamp_column(offsets: np.ndarray, end: Optional[datetime] = None, span: Optional[float] = None) -> np.ndarray:
+    """
+    ISO-8601 timestamps for offsets in seconds, shifted so that offset `span`
+    (defaults to the largest) falls at `end` (defaults to now): a batch spanning an
+    hour covers the last hour, not the next.
+    """
+    base = np.datetime64(end or datetime.now(), 'us')
+    if span is None:
+        span = offsets.max() if len(offsets) else 0.0
+    stamps = base + ((offsets - span) * 1_000_000).astype('timedelta64[us]')
+    return np.datetime_as_string(stamps, unit='us').astype(object)
+
+def _group_positions(lengths: np.ndarray) -> tuple:
+    """For groups of the given lengths laid out back to back, each row's group and position in it."""
+    group = np.repeat(np.arange(len(lengths)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    return group, np.arange(len(group)) - starts[group]
+
+def _normalized(weights: Dict[Any, float]) -> np.ndarray:
+    probabilities = np.array(list(weights.values()), dtype=float)
+    return probabilities / probabilities.sum()
+
+def _cumsum_by_group(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Running sum of `values` that restarts at each group boundary."""
+    totals = np.cumsum(values)
+    starts = np.cumsum(lengths) - lengths
+    return totals - np.repeat(totals[starts] - values[starts], lengths)
+
+def _sort_columns(columns: ColumnBatch, keys: np.ndarray) -> ColumnBatch:
+    """Reorder every column by `keys` (stable, so ties keep generation order)."""
+    order = np.argsort(keys, kind='stable')
+    return {name: column[order] for name, column in columns.items()}
+
+# Groups of rows (sessions, traces) of a realistic batch are planned and generated
+# in blocks of this many; like EXTRACT_CHUNK_SIZE, part of what a seed reproduces
+GROUP_BLOCK = 1024
+
+# Random streams of each block: group structure, gaps within groups, and row fields
+_STRUCTURE, _GAPS, _FIELDS = 1, 2, 3
+
+class ArrivalPlan(NamedTuple):
+    """
+    The shape of a whole batch of grouped arrivals, drawn before any row: how many
+    rows each group has and when it starts. Rows are generated from it block by
+    block, and the arrival clock and timestamp anchor are shared by every block.
+    """
+    seed: np.random.SeedSequence
+    lengths: np.ndarray              # rows per group; the last group is cut off at the batch size
+    last_block_lengths: np.ndarray   # rows per group of the last block before the cut
+    starts: np.ndarray               # arrival of each group, in seconds
+    attributes: Dict[str, np.ndarray]  # per-group values drawn with the lengths
+    end: datetime                    # time of the batch's latest row
+    span: float                      # offset of the batch's latest row
+
+    @property
+    def block_count(self) -> int:
+        return -(-len(self.lengths) // GROUP_BLOCK)
+
+    def block(self, block: int) -> tuple:
+        """(lengths, lengths as drawn, starts, attributes) of one block's groups."""
+        groups = slice(block * GROUP_BLOCK, (block + 1) * GROUP_BLOCK)
+        lengths = self.lengths[groups]
+        drawn = self.last_block_lengths if block == self.block_count - 1 else lengths
+        return lengths, drawn, self.starts[groups], {name: values[groups] for name, values in self.attributes.items()}
+
+def _within_group_offsets(seed: np.random.SeedSequence, block: int, lengths: np.ndarray, mean_gap: float) -> np.ndarray:
+    """Seconds from its group's start to each row of a block, with exponential gaps between rows."""
+    gaps = _block_rng(seed, _GAPS, block).exponential(mean_gap, size=int(lengths.sum()))
+    gaps[np.cumsum(lengths) - lengths] = 0.0
+    return _cumsum_by_group(gaps, lengths)
+
+def plan_arrivals(
+    size: int,
+    seed: Optional[np.random.SeedSequence],
+    draw_groups: Callable[[np.random.Generator, int], Tuple[np.ndarray, Dict[str, np.ndarray]]],
+    rate: float,
+    mean_gap: float,
+    burst_factor: float,
+    switch_probability: float
+) -> ArrivalPlan:
+    """
+    Plan `size` rows in groups. `draw_groups(rng, count)` draws the lengths (and any
+    per-group attributes) of `count` groups. Groups arrive like bursty_offsets(),
+    with the burst state and clock carried from block to block, and rows within a
+    group follow each other after exponential gaps of mean `mean_gap`. Groups are
+    drawn block by block until the batch is covered; the last one is cut off, like
+    a session still in progress.
+    """
+    seed = seed if seed is not None else np.random.SeedSequence()
+    lengths, starts, ends, attributes = [], [], [], []
+    rows, clock, bursting, block = 0, 0.0, 0, 0
+    while rows < size:
+        rng = _block_rng(seed, _STRUCTURE, block)
+        block_lengths, block_attributes = draw_groups(rng, GROUP_BLOCK)
+        in_burst = (np.cumsum(rng.random(GROUP_BLOCK) < switch_probability) + bursting) % 2 == 1
+        gaps = rng.exponential(1.0 / rate, size=GROUP_BLOCK)
+        gaps[in_burst] /= burst_factor
+        bursting = int(in_burst[-1])
+        block_starts = clock + np.cumsum(gaps)
+        clock = float(block_starts[-1])
+        within = _within_group_offsets(seed, block, block_lengths, mean_gap)
+
+        lengths.append(block_lengths)
+        starts.append(block_starts)
+        ends.append(block_starts + within[np.cumsum(block_lengths) - 1])
+        attributes.append(block_attributes)
+        rows += int(block_lengths.sum())
+        block += 1
+
+    last_block_lengths = lengths[-1]
+    lengths, starts, ends = np.concatenate(lengths), np.concatenate(starts), np.concatenate(ends)
+    group_count = int(np.searchsorted(np.cumsum(lengths), size)) + 1
+    lengths, starts, ends = lengths[:group_count].copy(), starts[:group_count], ends[:group_count].copy()
+    lengths[-1] -= lengths.sum() - size
+    # The cut group now ends at its last kept row
+    first_row = int((np.cumsum(last_block_lengths) - last_block_lengths)[(group_count - 1) % GROUP_BLOCK])
+    ends[-1] = starts[-1] + within[first_row + lengths[-1] - 1]
+
+    return ArrivalPlan(
+        seed=seed,
+        lengths=lengths,
+        last_block_lengths=last_block_lengths,
+        starts=starts,
+        attributes={name: np.concatenate([values[name] for values in attributes])[:group_count] for name in attributes[0]},
+        end=datetime.now(),
+        span=float(ends.max())
+    )
+
+def arrival_batches(
+    plan: ArrivalPlan,
+    generate_block: Callable[..., ColumnBatch],
+    mean_gap: float,
+    starmap: Starmap = itertools.starmap
+) -> Iterator[ColumnBatch]:
+    """
+    Generate the rows of a plan in arrival order. `generate_block(seed, block,
+    lengths, starts, offsets, attributes)` returns one block's rows with their
+    offsets in seconds in the "timestamp" column; blocks run through `starmap`.
+    Rows are released once no later block can arrive before them, so memory holds
+    only the groups still in progress, and converted to timestamps on release.
+    """
+    def tasks():
+        for block in range(plan.block_count):
+            lengths, drawn, starts, attributes = plan.block(block)
+            # Offsets were drawn for the whole groups; the cut group keeps its first rows
+            offsets = _within_group_offsets(plan.seed, block, drawn, mean_gap)[:int(lengths.sum())]
+            yield plan.seed, block, lengths, starts, offsets, attributes
+
+    pending: Optional[ColumnBatch] = None
+    for block, columns in enumerate(starmap(generate_block, tasks())):
+        pending = columns if pending is None else _concat_columns([pending, columns])
+        # Stable, so rows arriving together keep generation order however the batch is chunked
+        pending = _sort_columns(pending, pending["timestamp"])
+        next_start = (block + 1) * GROUP_BLOCK
+        release = int(np.searchsorted(pending["timestamp"], plan.starts[next_start])) if next_start < len(plan.starts) else None
+        ready = {name: column[:release] for name, column in pending.items()}
+        pending = {name: column[release:] for name, column in pending.items()} if release is not None else None
+        if column_batch_size(ready):
+            ready["timestamp"] = _offset_timestamp_column(ready["timestamp"], plan.end, plan.span)
+            yield ready
+
+# Events a session browses between session_started and the funnel, with weights
+BROWSE_EVENTS = {
+    "pageview": 0.45, "click": 0.25, "search": 0.1, "feature_used": 0.06, "video_played": 0.04,
+    "form_submitted": 0.03, "download": 0.03, "share": 0.02, "error_occurred": 0.02
+}
+# Purchase funnel steps, each with the probability of reaching it from the previous step
+PURCHASE_FUNNEL = [
+    ("add_to_cart", 0.3), ("checkout_started", 0.5), ("checkout_completed", 0.7), ("purchase", 0.9)
+]
+# Level mix of production logs: mostly INFO/DEBUG, few errors
+LOG_LEVEL_WEIGHTS = {LogLevel.INFO: 0.7, LogLevel.DEBUG: 0.2, LogLevel.WARN: 0.07, LogLevel.ERROR: 0.03}
+
+@register_workload_profile
+class RealisticProfile(WorkloadProfile):
+    """
+    Production-like traffic:
+    - events come in multi-event sessions (session_started, browsing, a purchase
+      funnel with per-step drop-off, session_ended) sharing session, device, IP
+      and user agent
+    - sessions belong to users drawn from a Zipf distribution, so a few users
+      generate much of the traffic while the long tail stays high-cardinality
+    - timestamps follow a bursty arrival process, sorted into arrival order
+    - logs are grouped into traces with a configurable fan-out
+    """
+    name: ClassVar[str] = "realistic"
+
+    def __init__(
+        self,
+        user_count: int = 100_000,
+        zipf_exponent: float = 1.1,
+        anonymous_share: float = 0.3,
+        mean_browse_events: float = 4.0,
+        funnel: Optional[List[tuple]] = None,
+        sessions_per_second: float = 20.0,
+        mean_think_time: float = 15.0,
+        burst_factor: float = 10.0,
+        burst_switch_probability: float = 0.02,
+        trace_fan_out: float = 8.0,
+        traced_share: float = 0.7,
+        traces_per_second: float = 50.0,
+        mean_span_gap: float = 0.02
+    ):
+        # Users: distinct_id cardinality and skew, and the share of anonymous sessions
+        self.user_count = user_count
+        self.zipf_exponent = zipf_exponent
+        self.anonymous_share = anonymous_share
+        # Sessions: browsing events per session and the (event name, conversion) funnel
+        self.mean_browse_events = mean_browse_events
+        self.funnel = funnel if funnel is not None else PURCHASE_FUNNEL
+        # Time: session arrival rate outside bursts and seconds between events in a session
+        self.sessions_per_second = sessions_per_second
+        self.mean_think_time = mean_think_time
+        # Bursts: arrival speed-up during a burst and per-arrival chance of entering/leaving one
+        self.burst_factor = burst_factor
+        self.burst_switch_probability = burst_switch_probability
+        # Traces: mean logs per trace, share of logs that belong to a trace, and timing
+        self.trace_fan_out = trace_fan_out
+        self.traced_share = traced_share
+        self.traces_per_second = traces_per_second
+        self.mean_span_gap = mean_span_gap
+
+    def event_batches(
+        self, size: int, seed: Optional[np.random.SeedSequence] = None, starmap: Starmap = itertools.starmap
+    ) -> Iterator[ColumnBatch]:
+        if size == 0:
+            return iter(())
+        plan = plan_arrivals(
+            size, seed, self._draw_sessions, self.sessions_per_second, self.mean_think_time,
+            self.burst_factor, self.burst_switch_probability
+        )
+        return arrival_batches(plan, self._session_rows, self.mean_think_time, starmap)
+
+    def log_batches(
+        self, size: int, seed: Optional[np.random.SeedSequence] = None, starmap: Starmap = itertools.starmap
+    ) -> Iterator[ColumnBatch]:
+        if size == 0:
+            return iter(())
+        plan = plan_arrivals(
+            size, seed, self._draw_traces, self.traces_per_second, self.mean_span_gap,
+            self.burst_factor, self.burst_switch_probability
+        )
+        return arrival_batches(plan, self._trace_rows, self.mean_span_gap, starmap)
+
+    def _draw_sessions(self, rng: np.random.Generator, count: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        # Browsing events, then the funnel steps reached, between session_started and session_ended
+        conversions = np.array([rate for _, rate in self.funnel])
+        browse = rng.geometric(1.0 / self.mean_browse_events, size=count)
+        depth = np.cumprod(rng.random((count, len(conversions))) < conversions, axis=1).sum(axis=1)
+        return browse + depth + 2, {"browse": browse, "depth": depth}
+
+    def _session_rows(
+        self, seed: np.random.SeedSequence, block: int, lengths: np.ndarray, starts: np.ndarray,
+        offsets: np.ndarray, attributes: Dict[str, np.ndarray]
+    ) -> ColumnBatch:
+        rng = _block_rng(seed, _FIELDS, block)
+        size, session_count = int(lengths.sum()), len(lengths)
+        browse, depth = attributes["browse"], attributes["depth"]
+        funnel_names = [step for step, _ in self.funnel]
+
+        session, position = _group_positions(lengths)
+        browse_names = np.array(list(BROWSE_EVENTS), dtype=object)
+        event_names = browse_names[rng.choice(len(browse_names), size=size, p=_normalized(BROWSE_EVENTS))]
+        funnel_step = position - browse[session] - 1
+        in_funnel = (funnel_step >= 0) & (funnel_step < depth[session])
+        event_names[in_funnel] = np.array(funnel_names, dtype=object)[funnel_step[in_funnel]]
+        event_names[position == 0] = "session_started"
+        event_names[funnel_step == depth[session]] = "session_ended"
+
+        # Per-session attributes, repeated for each of the session's events
+        ranks = zipf_rank_column(session_count, self.user_count, self.zipf_exponent, rng)
+        distinct_ids = np.array([f"user_{rank}" for rank in ranks.tolist()], dtype=object)
+        anonymous = rng.random(session_count) < self.anonymous_share
+        distinct_ids[anonymous] = random_uuid_column(int(anonymous.sum()), rng)
+        property_count = len(BROWSERS) * len(DEVICES) * len(OPERATING_SYSTEMS) * len(REFERRERS)
+
+        return {
+            "id": random_uuid_column(size, rng),
+            "event_name": event_names,
+            "timestamp": starts[session] + offsets,
+            "distinct_id": distinct_ids[session],
+            "session_id": random_uuid_column(session_count, rng)[session],
+            "project_id": _choice_column(rng, PROJECT_IDS, session_count)[session],
+            "properties": _event_properties_column(
+                rng, event_names, size, rng.integers(0, property_count, size=session_count)[session]
+            ),
+            "ip_address": _ip_address_column(rng, session_count)[session],
+            "user_agent": _choice_column(rng, USER_AGENTS, session_count)[session]
+        }
+
+    def _draw_traces(self, rng: np.random.Generator, count: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        # Each unit is either a trace of geometric(trace_fan_out) logs or one
+        # untraced log, mixed so that traced_share of the logs carry a trace ID.
+        traced_units = self.traced_share / (self.traced_share + self.trace_fan_out * (1 - self.traced_share))
+        traced = rng.random(count) < traced_units
+        return np.where(traced, rng.geometric(1.0 / self.trace_fan_out, size=count), 1), {"traced": traced}
+
+    def _trace_rows(
+        self, seed: np.random.SeedSequence, block: int, lengths: np.ndarray, starts: np.ndarray,
+        offsets: np.ndarray, attributes: Dict[str, np.ndarray]
+    ) -> ColumnBatch:
+        rng = _block_rng(seed, _FIELDS, block)
+        size, unit_count = int(lengths.sum()), len(lengths)
+
+        unit, _ = _group_positions(lengths)
+        trace_ids = np.array(["req_" + uuid_str[:8] for uuid_str in random_uuid_column(unit_count, rng)], dtype=object)
+        trace_ids[~attributes["traced"]] = None
+
+        levels = list(LOG_LEVEL_WEIGHTS)
+        level_index = rng.choice(len(levels), size=size, p=_normalized(LOG_LEVEL_WEIGHTS))
+        messages = np.array([LOG_MESSAGES[level] for level in levels], dtype=object)
+
+        return {
+            "id": random_uuid_column(size, rng),
+            "timestamp": starts[unit] + offsets,
+            "level": np.array(levels, dtype=object)[level_index],
+            "message": messages[level_index, rng.integers(0, messages.shape[1], size=size)],
+            "source": _choice_column(rng, LOG_SOURCES, size),
+            "trace_id": trace_ids[unit]
+        }
@@ -0,0 +1,71 @@
+from botocore.client import Config
+from typing import Any, Dict, Optional, Tuple
+import threading
+import boto3
+# Re-exported: load_moose_config used to live here
+from .moose_config import load_moose_config
+
+# Process-wide S3 client registry.
+#
+# Every S3FileReader (one per connector, resolver, bulk loader or FileReader call)
+# used to parse moose.config.toml and build its own boto3 client, so each one paid
+# for client construction and opened its own connections and TLS sessions. Clients
+# are now shared per endpoint, credentials and timeout, so connections opened by
+# one reader are reused by all. botocore clients are thread-safe.
+
+# Pool floor for shared clients; a reader asking for more replaces the client with a larger one
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+
+_client_lock = threading.Lock()
+_clients: Dict[Tuple, Tuple[int, Any]] = {}
+
+def get_s3_client(
+    s3_config: Dict[str, Any],
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    timeout: Optional[float] = None
+):
+    """
+    The shared S3 client for an `s3_config` section (endpoint, region, credentials,
+    signature version) and timeout. Its pool holds at least `max_pool_connections`
+    connections; the first request for a larger pool creates a larger client that
+    replaces the shared one (earlier holders keep working with the old one).
+    """
+    key = (
+        s3_config.get('endpoint_url'),
+        s3_config.get('region_name'),
+        s3_config.get('access_key_id'),
+        s3_config.get('secret_access_key'),
+        s3_config.get('signature_version') or None,
+        timeout
+    )
+    with _client_lock:
+        cached = _clients.get(key)
+        if cached is not None and cached[0] >= max_pool_connections:
+            return cached[1]
+
+        pool_size = max(max_pool_connections, DEFAULT_MAX_POOL_CONNECTIONS, cached[0] if cached else 0)
+        client_options = {
+            'signature_version': s3_config.get('signature_version') or None,
+            'max_pool_connections': pool_size,
+            # Keep idle pooled connections alive between files instead of re-handshaking
+            'tcp_keepalive': True,
+            # Retries with backoff on throttling and transient errors
+            'retries': {'max_attempts': 5, 'mode': 'standard'}
+        }
+        if timeout is not None:
+            client_options['connect_timeout'] = timeout
+            client_options['read_timeout'] = timeout
+
+        client_args = {
+            'aws_access_key_id': s3_config['access_key_id'],
+            'aws_secret_access_key': s3_config['secret_access_key'],
+            'region_name': s3_config['region_name'],
+            'config': Config(**client_options)
+        }
+        if s3_config.get('endpoint_url'):
+            client_args['endpoint_url'] = s3_config['endpoint_url']
+
+        # A session of its own: creating clients from the default session is not thread-safe
+        client = boto3.session.Session().client('s3', **client_args)
+        _clients[key] = (pool_size, client)
+        return client
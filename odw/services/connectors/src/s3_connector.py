@@ -1,31 +1,95 @@
-from typing import List, TypeVar, Generic, Optional
-from pydantic import BaseModel
+from typing import Any, AsyncIterator, Dict, Iterator, List, TypeVar, Generic, Optional, Union
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pydantic import BaseModel, Field, SkipValidation
 from moose_lib import cli_log, CliLogData
 from .s3_wildcard_resolver import S3WildcardResolver
 from .s3_file_reader import S3FileReader
+from .content_cache import ContentCache
+from .listing_index import ListingIndex
+from .object_manifest import ObjectManifest
+from .binary_payload import BinaryPayload
 import mimetypes
 from pathlib import Path
-import base64
+import asyncio
+import time
 
 T = TypeVar('T')
 
 class S3ConnectorConfig:
-    def __init__(self, s3_pattern: str):
+    def __init__(
+        self,
+        s3_pattern: Union[str, List[str]],
+        concurrency: int = 32,
+        files: Optional[List[str]] = None,
+        file_timeout: Optional[float] = 60.0,
+        cache_dir: Optional[str] = None,
+        cache_max_bytes: int = 1024 * 1024 * 1024,
+        listing_index_path: Optional[str] = None,
+        listing_ttl: float = 30.0,
+        manifest_path: Optional[str] = None,
+        manifest_scope: str = "",
+        only_new: bool = False,
+        part_size: Optional[int] = 8 * 1024 * 1024,
+        download_concurrency: int = 8
+    ):
         """
         Initialize S3 connector configuration.
         
         Args:
-            s3_pattern: S3 pattern to process (e.g., "s3://bucket/*/reports/*.txt")
+            s3_pattern: S3 pattern to process (e.g., "s3://bucket/*/reports/*.txt"), or a list
+                        of patterns resolved together with one listing per bucket
+            concurrency: Maximum number of files fetched at once (1 reads files one by one)
+            files: Already-resolved S3 paths to read instead of resolving the pattern,
+                   e.g. one shard of a list from resolve_files()
+            file_timeout: Seconds a single file read may take before it is counted as
+                          failed; also the S3 client's connect and read timeout (None: no limit)
+            cache_dir: Directory of a local content cache; unchanged files are then served
+                       from disk after an ETag check instead of downloaded again (None: no cache)
+            cache_max_bytes: Size past which the cache evicts its least recently used files
+            listing_index_path: SQLite file of a persistent bucket listing index; patterns
+                                are then resolved from it, so resolving again within
+                                `listing_ttl` seconds makes no S3 request (None: no index)
+            listing_ttl: Seconds an indexed listing is used before it is refreshed
+            manifest_path: SQLite file recording the objects already processed (see ObjectManifest)
+            manifest_scope: Manifest scope of this extraction, e.g. manifest_scope(instructions)
+            only_new: Read only files that are new or changed since they were last marked
+                      processed in `manifest_scope`; needs `manifest_path`
+            part_size: Files larger than this are downloaded as parallel byte-range GETs of
+                       this size (None: one GET per file)
+            download_concurrency: Maximum number of byte ranges in flight across the files being read
         """
         self.s3_pattern = s3_pattern
+        self.concurrency = concurrency
+        self.files = files
+        self.file_timeout = file_timeout
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+        self.listing_index_path = listing_index_path
+        self.listing_ttl = listing_ttl
+        self.manifest_path = manifest_path
+        self.manifest_scope = manifest_scope
+        self.only_new = only_new
+        if only_new and not manifest_path:
+            raise ValueError("only_new requires a manifest_path")
+        self.part_size = part_size
+        self.download_concurrency = download_concurrency
 
 class S3FileContent(BaseModel):
     """Model representing S3 file content for processing."""
     file_path: str
-    content: str  # Base64 for binary files, plain text for text files
+    content: str  # Plain text for text files, empty for binary files
     content_type: str  # MIME type
-    file_size: int
+    file_size: int  # Size in bytes of the object read
     is_binary: bool
+    etag: Optional[str] = None  # ETag of the object version read
+    # Raw bytes of binary files, as read (not base64-encoded); not serialized
+    data: SkipValidation[Optional[bytes]] = Field(default=None, exclude=True, repr=False)
+
+    def payload(self) -> Optional[BinaryPayload]:
+        """The bytes of a binary file with its MIME type, or None for text files."""
+        if not self.is_binary or self.data is None:
+            return None
+        return BinaryPayload(self.data, self.content_type, self.file_path, self.etag)
 
 class S3Connector(Generic[T]):
     """
@@ -41,8 +105,25 @@ class S3Connector(Generic[T]):
             config: S3 connector configuration
         """
         self.s3_pattern = config.s3_pattern
-        self.s3_resolver = S3WildcardResolver()
-        self.s3_reader = S3FileReader()
+        self.concurrency = max(1, config.concurrency)
+        self.files = config.files
+        self.file_timeout = config.file_timeout
+        listing_index = ListingIndex(config.listing_index_path, ttl=config.listing_ttl) if config.listing_index_path else None
+        self.s3_resolver = S3WildcardResolver(listing_index=listing_index)
+        cache = ContentCache(config.cache_dir, config.cache_max_bytes) if config.cache_dir else None
+        # One pooled connection per concurrent read and per range in flight; boto3 clients are thread-safe
+        self.s3_reader = S3FileReader(
+            max_pool_connections=self.concurrency + max(1, config.download_concurrency),
+            timeout=config.file_timeout,
+            cache=cache,
+            part_size=config.part_size,
+            download_concurrency=config.download_concurrency
+        )
+        # ETags from the last listing, so cached files that have not changed need no request at all
+        self._etags: Dict[str, str] = {}
+        self.manifest = ObjectManifest(config.manifest_path) if config.manifest_path else None
+        self.manifest_scope = config.manifest_scope
+        self.only_new = config.only_new
     
     def extract(self) -> List[S3FileContent]:
         """
@@ -51,6 +132,214 @@ class S3Connector(Generic[T]):
         Returns:
             List of S3FileContent objects with file data
         """
+        return [file_content for chunk in self.extract_iter() for file_content in chunk]
+    
+    def extract_iter(self, chunk_size: int = 10) -> Iterator[List[S3FileContent]]:
+        """
+        Extract files from S3 pattern lazily, yielding chunks of file content objects.
+        Up to `concurrency` files are read at once on a thread pool sharing the
+        connector's S3 client, and chunks are yielded in completion order. Reads
+        that take longer than `file_timeout` are counted as failed. While a chunk
+        waits to be consumed no new reads are started, so at most
+        `chunk_size + concurrency` file bodies are held in memory at a time.
+        
+        Args:
+            chunk_size: Maximum number of files per yielded chunk
+            
+        Yields:
+            Lists of up to `chunk_size` S3FileContent objects
+        """
+        files_found = self._resolve_files()
+        if not files_found:
+            return
+        
+        # Phase 2: Read files concurrently and yield S3FileContent objects chunk by chunk
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="s3-read")
+        remaining = iter(files_found)
+        in_flight: Dict[Future, str] = {}
+        # When each in-flight read actually started running, set by the pool thread
+        started: Dict[str, float] = {}
+        chunk: List[S3FileContent] = []
+        successful_reads = 0
+        failed_reads = 0
+        
+        def timed_read(file_path: str) -> Optional[S3FileContent]:
+            started[file_path] = time.monotonic()
+            return self._read_file_content(file_path)
+        
+        try:
+            while True:
+                # Top up the in-flight reads, then wait for one to finish or time out
+                while len(in_flight) < self.concurrency:
+                    file_path = next(remaining, None)
+                    if file_path is None:
+                        break
+                    in_flight[executor.submit(timed_read, file_path)] = file_path
+                if not in_flight:
+                    break
+                
+                timeout = None
+                if self.file_timeout is not None:
+                    # Until the earliest running read's deadline (reads not yet started have later ones)
+                    running = [started[path] for path in in_flight.values() if path in started]
+                    timeout = max(0.0, min(running, default=time.monotonic()) + self.file_timeout - time.monotonic())
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    file_path = in_flight.pop(future)
+                    started.pop(file_path, None)
+                    try:
+                        # _read_file_content logs its own errors and returns None on failure
+                        file_content = future.result()
+                    except Exception as e:
+                        cli_log(CliLogData(
+                            action="S3Connector",
+                            message=f"Failed to read file {file_path}: {str(e)}",
+                            message_type="Error"
+                        ))
+                        file_content = None
+                    if file_content:
+                        chunk.append(file_content)
+                        successful_reads += 1
+                    else:
+                        failed_reads += 1
+                
+                if self.file_timeout is not None:
+                    # Give up on reads past their deadline; the client's read timeout ends them
+                    now = time.monotonic()
+                    for future, file_path in list(in_flight.items()):
+                        if now - started.get(file_path, now) >= self.file_timeout:
+                            del in_flight[future]
+                            cli_log(CliLogData(
+                                action="S3Connector",
+                                message=f"Timed out reading file {file_path} after {self.file_timeout}s",
+                                message_type="Error"
+                            ))
+                            failed_reads += 1
+                
+                while len(chunk) >= chunk_size:
+                    yield chunk[:chunk_size]
+                    chunk = chunk[chunk_size:]
+            
+            if chunk:
+                yield chunk
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.s3_reader.close()
+        
+        cli_log(CliLogData(
+            action="S3Connector",
+            message=f"S3 extraction completed: {successful_reads} successful, {failed_reads} failed",
+            message_type="Info"
+        ))
+    
+    async def aextract(self) -> List[S3FileContent]:
+        """
+        Async extract(): files are fetched concurrently, see aextract_iter().
+        
+        Returns:
+            List of S3FileContent objects with file data, in completion order
+        """
+        return [file_content async for chunk in self.aextract_iter() for file_content in chunk]
+    
+    async def aextract_iter(self, chunk_size: int = 10) -> AsyncIterator[List[S3FileContent]]:
+        """
+        Async extract_iter(). Up to `concurrency` files are fetched at once on an
+        executor sharing the connector's S3 client, so a single event loop can keep
+        many reads in flight. Chunks are yielded in completion order, and no new
+        reads are started while a chunk waits to be consumed. Reads that take
+        longer than `file_timeout` are counted as failed.
+        
+        Args:
+            chunk_size: Maximum number of files per yielded chunk
+            
+        Yields:
+            Lists of up to `chunk_size` S3FileContent objects
+        """
+        files_found = await asyncio.to_thread(self._resolve_files)
+        if not files_found:
+            return
+        
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="s3-read")
+        remaining = iter(files_found)
+        pending = set()
+        chunk: List[S3FileContent] = []
+        successful_reads = 0
+        failed_reads = 0
+        
+        try:
+            while True:
+                # Top up the in-flight reads, then wait for at least one to finish
+                while len(pending) < self.concurrency:
+                    file_path = next(remaining, None)
+                    if file_path is None:
+                        break
+                    pending.add(asyncio.ensure_future(self._aread_file_content(loop, executor, file_path)))
+                if not pending:
+                    break
+                
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    # _read_file_content logs its own errors and returns None on failure
+                    file_content = task.result()
+                    if file_content:
+                        chunk.append(file_content)
+                        successful_reads += 1
+                    else:
+                        failed_reads += 1
+                
+                while len(chunk) >= chunk_size:
+                    yield chunk[:chunk_size]
+                    chunk = chunk[chunk_size:]
+            
+            if chunk:
+                yield chunk
+        finally:
+            for task in pending:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.s3_reader.close()
+        
+        cli_log(CliLogData(
+            action="S3Connector",
+            message=f"Async S3 extraction completed: {successful_reads} successful, {failed_reads} failed",
+            message_type="Info"
+        ))
+    
+    async def _aread_file_content(self, loop: asyncio.AbstractEventLoop, executor: ThreadPoolExecutor, file_path: str) -> Optional[S3FileContent]:
+        """Read one file on `executor`, giving up after `file_timeout` seconds."""
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(executor, self._read_file_content, file_path), self.file_timeout
+            )
+        except asyncio.TimeoutError:
+            cli_log(CliLogData(
+                action="S3Connector",
+                message=f"Timed out reading file {file_path} after {self.file_timeout}s",
+                message_type="Error"
+            ))
+            return None
+
+    def resolve_files(self) -> List[str]:
+        """
+        Resolve the S3 pattern without reading any file, e.g. to split the files into shards.
+        
+        Returns:
+            S3 paths of the matching files, empty if none match or resolution fails
+        """
+        return self._resolve_files()
+
+    def _resolve_files(self) -> List[str]:
+        """
+        Resolve the S3 pattern to the list of files to read.
+        
+        Returns:
+            S3 paths of the matching files, empty if none match or resolution fails
+        """
+        if self.files is not None:
+            return list(self.files)
+
         cli_log(CliLogData(
             action="S3Connector",
             message=f"Starting S3 extraction for pattern: {self.s3_pattern}",
@@ -59,7 +348,10 @@ class S3Connector(Generic[T]):
         
         try:
             # Phase 1: Resolve S3 pattern to file list
-            resolution_result = self.s3_resolver.resolve_pattern(self.s3_pattern)
+            if isinstance(self.s3_pattern, str):
+                resolution_result = self.s3_resolver.resolve_pattern(self.s3_pattern)
+            else:
+                resolution_result = self._resolve_patterns(self.s3_pattern)
             
             if not resolution_result['success']:
                 cli_log(CliLogData(
@@ -70,6 +362,18 @@ class S3Connector(Generic[T]):
                 return []
             
             files_found = resolution_result['files_found']
+            self._etags = resolution_result.get('etags', {})
+            if self.only_new:
+                # Watermark mode: drop files already processed at their current ETag
+                resolved = len(files_found)
+                files_found = self.manifest.pending(
+                    ((path, self._etags.get(path)) for path in files_found), self.manifest_scope
+                )
+                cli_log(CliLogData(
+                    action="S3Connector",
+                    message=f"Skipping {resolved - len(files_found)} of {resolved} files already processed",
+                    message_type="Info"
+                ))
             cli_log(CliLogData(
                 action="S3Connector",
                 message=f"Resolved {len(files_found)} files for processing",
@@ -84,37 +388,7 @@ class S3Connector(Generic[T]):
                 ))
                 return []
             
-            # Phase 2: Read each file and create S3FileContent objects
-            file_contents = []
-            successful_reads = 0
-            failed_reads = 0
-            
-            for file_path in files_found:
-                try:
-                    file_content = self._read_file_content(file_path)
-                    if file_content:
-                        file_contents.append(file_content)
-                        successful_reads += 1
-                    else:
-                        failed_reads += 1
-                        
-                except Exception as e:
-                    cli_log(CliLogData(
-                        action="S3Connector",
-                        message=f"Failed to read file {file_path}: {str(e)}",
-                        message_type="Error"
-                    ))
-                    failed_reads += 1
-                    continue
-            
-            cli_log(CliLogData(
-                action="S3Connector",
-                message=f"S3 extraction completed: {successful_reads} successful, {failed_reads} failed",
-                message_type="Info"
-            ))
-            
-            return file_contents
-            
+            return files_found
         except Exception as e:
             cli_log(CliLogData(
                 action="S3Connector",
@@ -123,6 +397,20 @@ class S3Connector(Generic[T]):
             ))
             return []
     
+    def _resolve_patterns(self, s3_patterns: List[str]) -> Dict[str, Any]:
+        """Resolve several patterns in one listing pass and merge their files, each file once."""
+        results = self.s3_resolver.resolve_patterns(s3_patterns)
+        errors = [result['error_message'] for result in results.values() if not result['success']]
+        etags: Dict[str, str] = {}
+        for result in results.values():
+            etags.update(result.get('etags', {}))
+        return {
+            'success': not errors,
+            'error_message': "; ".join(errors) or None,
+            'files_found': list(dict.fromkeys(path for result in results.values() for path in result['files_found'])),
+            'etags': etags
+        }
+    
     def _read_file_content(self, file_path: str) -> Optional[S3FileContent]:
         """
         Read content from a single S3 file.
@@ -134,25 +422,32 @@ class S3Connector(Generic[T]):
             S3FileContent object or None if reading fails
         """
         try:
-            # Read file using S3FileReader
-            content, file_type = self.s3_reader.read_file(file_path)
-            
-            # Determine if content is binary
-            is_binary = self._is_binary_content(content, file_type)
-            
-            # Get file size estimation
-            file_size = self._estimate_file_size(content, is_binary)
+            # ETags from the listing index can be stale between full refreshes, so a cached copy is
+            # then always revalidated with a conditional GET instead of being trusted on the listed ETag
+            listed_etag = None if self.s3_resolver.listing_index is not None else self._etags.get(file_path)
+            # Read file using S3FileReader; binary files stay bytes, base64 is left to whoever sends them
+            content, file_type, etag = self.s3_reader.read_payload(file_path, etag=listed_etag)
+            is_binary = isinstance(content, BinaryPayload)
             
-            # Determine MIME type
-            content_type = self._get_content_type(file_path, file_type)
-            
-            # Process content based on type
             if is_binary:
-                # Content is already base64 encoded by S3FileReader for binary files
-                processed_content = content
+                file_content = S3FileContent(
+                    file_path=file_path,
+                    content="",
+                    content_type=content.mime_type,
+                    file_size=content.size,
+                    is_binary=True,
+                    etag=etag,
+                    data=content.data
+                )
             else:
-                # Text content - keep as is
-                processed_content = content
+                file_content = S3FileContent(
+                    file_path=file_path,
+                    content=content,
+                    content_type=self._get_content_type(file_path, file_type),
+                    file_size=len(content.encode('utf-8')),
+                    is_binary=False,
+                    etag=etag
+                )
             
             cli_log(CliLogData(
                 action="S3Connector",
@@ -160,13 +455,7 @@ class S3Connector(Generic[T]):
                 message_type="Info"
             ))
             
-            return S3FileContent(
-                file_path=file_path,
-                content=processed_content,
-                content_type=content_type,
-                file_size=file_size,
-                is_binary=is_binary
-            )
+            return file_content
             
         except Exception as e:
             cli_log(CliLogData(
@@ -177,25 +466,6 @@ class S3Connector(Generic[T]):
             # Return None to indicate failure - workflow will handle DLQ
             return None
     
-    def _is_binary_content(self, content: str, file_type: str) -> bool:
-        """Determine if content is binary based on file type and content."""
-        # S3FileReader prefixes binary content with special markers
-        return (content.startswith("[IMAGE_DATA]") or 
-                content.startswith("[PDF_DATA]") or 
-                content.startswith("[DOC_DATA]") or
-                file_type.startswith("image_") or
-                file_type in ["pdf", "doc", "docx"])
-    
-    def _estimate_file_size(self, content: str, is_binary: bool) -> int:
-        """Estimate file size from content."""
-        if is_binary:
-            # For base64 content, estimate original size
-            # Base64 encoding increases size by ~33%
-            return int(len(content) * 0.75)
-        else:
-            # Text content - use string length as approximation
-            return len(content.encode('utf-8'))
-    
     def _get_content_type(self, file_path: str, file_type: str) -> str:
         """Determine MIME type from file path and type."""
         # Try to get MIME type from file extension
@@ -1,13 +1,23 @@
-import boto3
-from botocore.client import Config
 from botocore.exceptions import ClientError, NoCredentialsError
-from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Optional, Tuple, Union
 from pathlib import Path
+import threading
 import mimetypes
-import toml
+import re
 import os
-import base64
 from moose_lib import cli_log, CliLogData
+from .content_cache import ContentCache
+from .binary_payload import BinaryPayload
+from .moose_config import load_moose_config
+from .s3_clients import get_s3_client
+
+# Bytes copied per read when streaming an object body to a file
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+class ObjectChangedError(Exception):
+    """The object was overwritten after the version asked for (If-Match) was read."""
+    pass
 
 class S3FileReader:
     """
@@ -15,13 +25,35 @@ class S3FileReader:
     Supports text files, PDFs, images, and other document formats stored in S3-compatible storage.
     """
     
-    def __init__(self, config_path: str = "moose.config.toml"):
+    def __init__(
+        self,
+        config_path: str = "moose.config.toml",
+        max_pool_connections: int = 10,
+        timeout: Optional[float] = None,
+        cache: Optional[ContentCache] = None,
+        part_size: Optional[int] = 8 * 1024 * 1024,
+        download_concurrency: int = 8
+    ):
         """
         Initialize S3FileReader with configuration from moose.config.toml
         
         Args:
             config_path: Path to the moose configuration file
+            max_pool_connections: Size of the client's connection pool; raise it when
+                the reader is shared by concurrent reads
+            timeout: Connect and read timeout in seconds for each request (botocore default: 60)
+            cache: Local content cache; cached files are revalidated by ETag instead of re-downloaded
+            part_size: Objects larger than this are downloaded as byte ranges of this size,
+                fetched in parallel (None: always one GET for the whole object)
+            download_concurrency: Maximum number of ranges of one object fetched at once
         """
+        self.max_pool_connections = max_pool_connections
+        self.timeout = timeout
+        self.cache = cache
+        self.part_size = part_size
+        self.download_concurrency = max(1, download_concurrency)
+        self._range_executor: Optional[ThreadPoolExecutor] = None
+        self._range_executor_lock = threading.Lock()
         self.config = self._load_s3_config(config_path)
         self.s3_client = self._create_s3_client()
     
@@ -29,18 +61,17 @@ class S3FileReader:
         """Load S3 configuration from moose.config.toml"""
         try:
             if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    config = toml.load(f)
-                    s3_config = config.get('s3_config', {})
-                    
-                    # Validate required configuration
-                    required_keys = ['access_key_id', 'secret_access_key', 'region_name']
-                    missing_keys = [key for key in required_keys if not s3_config.get(key)]
-                    
-                    if missing_keys:
-                        raise ValueError(f"Missing required S3 configuration keys: {missing_keys}")
-                    
-                    return s3_config
+                # Parsed once per process (and again only if the file changes)
+                s3_config = dict(load_moose_config(config_path).get('s3_config', {}))
+                
+                # Validate required configuration
+                required_keys = ['access_key_id', 'secret_access_key', 'region_name']
+                missing_keys = [key for key in required_keys if not s3_config.get(key)]
+                
+                if missing_keys:
+                    raise ValueError(f"Missing required S3 configuration keys: {missing_keys}")
+                
+                return s3_config
             else:
                 raise FileNotFoundError(f"Configuration file not found: {config_path}")
         except Exception as e:
@@ -52,31 +83,9 @@ class S3FileReader:
             raise
     
     def _create_s3_client(self):
-        """Create and configure S3 client"""
+        """Get the process-wide S3 client for this configuration, with a pool of at least max_pool_connections"""
         try:
-            s3_config = {
-                'aws_access_key_id': self.config['access_key_id'],
-                'aws_secret_access_key': self.config['secret_access_key'],
-                'region_name': self.config['region_name']
-            }
-            
-            # Add endpoint URL for MinIO
-            if self.config.get('endpoint_url'):
-                s3_config['endpoint_url'] = self.config['endpoint_url']
-            
-            # Add configuration for signature version
-            if self.config.get('signature_version'):
-                s3_config['config'] = Config(signature_version=self.config['signature_version'])
-            
-            client = boto3.client('s3', **s3_config)
-            
-            cli_log(CliLogData(
-                action="S3FileReader",
-                message=f"S3 client initialized for endpoint: {self.config.get('endpoint_url', 'AWS S3')}",
-                message_type="Info"
-            ))
-            
-            return client
+            return get_s3_client(self.config, self.max_pool_connections, self.timeout)
             
         except Exception as e:
             cli_log(CliLogData(
@@ -115,81 +124,122 @@ class S3FileReader:
         """Check if the given path is an S3 path"""
         return file_path.startswith(('s3://', 'minio://'))
     
-    def read_file(self, s3_path: str) -> Tuple[str, str]:
+    def read_file(self, s3_path: str, etag: Optional[str] = None) -> Tuple[str, str]:
         """
-        Read file content from S3 path.
+        Read file content from S3 path; see read_object().
+        
+        Returns:
+            Tuple of (content: str, file_type: str)
+        """
+        content, file_type, _ = self.read_object(s3_path, etag)
+        return content, file_type
+    
+    def read_object(self, s3_path: str, etag: Optional[str] = None) -> Tuple[str, str, Optional[str]]:
+        """
+        Read file content from S3 path as one string, along with the ETag of the
+        version read: text as decoded text, binary files as an inline base64 data URL
+        ("[IMAGE_DATA]data:image/png;base64,..."). Use read_payload() to keep binary
+        files as bytes.
         
         Args:
             s3_path: S3 path to the file (e.g., s3://bucket/key or minio://bucket/key)
+            etag: The object's current ETag, if already known
             
         Returns:
-            Tuple of (content: str, file_type: str)
+            Tuple of (content: str, file_type: str, etag: Optional[str])
+        """
+        content, file_type, etag = self.read_payload(s3_path, etag)
+        if isinstance(content, BinaryPayload):
+            content = content.data_url()
+        return content, file_type, etag
+    
+    def read_payload(self, s3_path: str, etag: Optional[str] = None) -> Tuple[Union[str, BinaryPayload], str, Optional[str]]:
+        """
+        Read file content from S3 path: text files as decoded text, PDFs, images and
+        Word documents as a BinaryPayload holding the bytes read (not base64-encoded).
+        
+        Returns:
+            Tuple of (content: str or BinaryPayload, file_type: str, etag: Optional[str])
+        """
+        data, etag = self.read_bytes(s3_path, etag)
+        _, object_key = self.parse_s3_path(s3_path)
+        file_type = self._get_file_type(object_key)
+        
+        if file_type == "pdf" or file_type.startswith("image_") or file_type in ["doc", "docx"]:
+            return BinaryPayload(data, self._binary_mime_type(object_key, file_type), s3_path, etag), file_type, etag
+        
+        if file_type != "text":
+            # Fallback: try to decode as text
+            cli_log(CliLogData(
+                action="S3FileReader",
+                message=f"Unknown file type {file_type}, attempting to decode as text",
+                message_type="Info"
+            ))
+        return self._decode_text_content(data, object_key), "text", etag
+    
+    def read_bytes(self, s3_path: str, etag: Optional[str] = None, if_match: bool = False) -> Tuple[Union[bytes, bytearray], Optional[str]]:
+        """
+        Read the raw bytes of an S3 object, along with the ETag of the version read.
+        
+        With a content cache, a cached copy is returned without any request when
+        `etag` (e.g. from the listing that found the file) matches it, and is
+        otherwise revalidated with a conditional GET (If-None-Match) that only
+        downloads the object if it changed.
+        
+        Args:
+            s3_path: S3 path to the file (e.g., s3://bucket/key or minio://bucket/key)
+            etag: The object's current ETag, if already known
+            if_match: Read only that version (If-Match); fail if the object changed since
+            
+        Returns:
+            Tuple of (data: bytes or bytearray, etag: Optional[str])
             
         Raises:
+            ObjectChangedError: If if_match is set and the object is no longer at `etag`
             ClientError: If S3 operation fails
             ValueError: If path format is invalid
         """
         try:
             bucket_name, object_key = self.parse_s3_path(s3_path)
             
+            cached = self.cache.get(bucket_name, object_key) if self.cache else None
+            if cached and etag and cached.etag == etag:
+                return cached.data, cached.etag
+            
             cli_log(CliLogData(
                 action="S3FileReader",
                 message=f"Reading S3 file: {s3_path}",
                 message_type="Info"
             ))
             
-            # Check if object exists
-            try:
-                self.s3_client.head_object(Bucket=bucket_name, Key=object_key)
-            except ClientError as e:
-                if e.response['Error']['Code'] == '404':
-                    raise FileNotFoundError(f"S3 object not found: {s3_path}")
-                else:
-                    raise
-            
-            # Determine file type from object key
-            file_type = self._get_file_type(object_key)
-            
-            # Read the object content
+            # Read the object content; a missing object fails here, so there is no separate existence check
             try:
-                response = self.s3_client.get_object(Bucket=bucket_name, Key=object_key)
-                content = response['Body'].read()
+                request = {'Bucket': bucket_name, 'Key': object_key}
+                if if_match and etag:
+                    # A cached copy of another version is of no use here
+                    cached = None
+                    request['IfMatch'] = etag
+                elif cached:
+                    request['IfNoneMatch'] = cached.etag
+                response, data = self._get_object_content(request)
                 
-                # Process content based on file type
-                if file_type == "text":
-                    content_str = self._decode_text_content(content, object_key)
-                elif file_type == "pdf":
-                    content_str = self._process_pdf_content(content, object_key)
-                elif file_type.startswith("image_"):
-                    content_str = self._process_image_content(content, object_key)
-                elif file_type in ["doc", "docx"]:
-                    content_str = self._process_word_content(content, object_key)
-                else:
-                    # Fallback: try to decode as text
-                    cli_log(CliLogData(
-                        action="S3FileReader",
-                        message=f"Unknown file type {file_type}, attempting to decode as text",
-                        message_type="Info"
-                    ))
-                    content_str = self._decode_text_content(content, object_key)
-                    file_type = "text"
+                if self.cache and response.get('ETag'):
+                    self.cache.put(bucket_name, object_key, response['ETag'], data)
                 
                 cli_log(CliLogData(
                     action="S3FileReader",
-                    message=f"Successfully read S3 file: {s3_path} (type: {file_type}, size: {len(content)} bytes)",
+                    message=f"Successfully read S3 file: {s3_path} ({len(data)} bytes)",
                     message_type="Info"
                 ))
                 
-                return content_str, file_type
+                return data, response.get('ETag')
                 
             except ClientError as e:
                 error_code = e.response['Error']['Code']
-                if error_code == 'NoSuchBucket':
-                    raise FileNotFoundError(f"S3 bucket not found: {bucket_name}")
-                elif error_code == 'AccessDenied':
-                    raise PermissionError(f"Access denied to S3 object: {s3_path}")
-                else:
-                    raise Exception(f"S3 error reading {s3_path}: {str(e)}")
+                if cached and error_code in ('304', 'NotModified'):
+                    # Unchanged since it was cached
+                    return cached.data, cached.etag
+                self._raise_read_error(e, s3_path, bucket_name, etag)
                     
         except Exception as e:
             cli_log(CliLogData(
@@ -199,6 +249,146 @@ class S3FileReader:
             ))
             raise
     
+    def download_to(self, s3_path: str, file: BinaryIO, etag: Optional[str] = None, if_match: bool = False) -> Optional[str]:
+        """
+        Write the bytes of an S3 object to `file`, STREAM_CHUNK_SIZE bytes at a time, and
+        return the ETag of the version written. Unlike read_bytes(), the object is
+        never held in memory whole: a cached copy matching `etag` is copied from the
+        cache, anything else is streamed from a single GET and not added to the cache.
+        
+        Args:
+            s3_path: S3 path to the file (e.g., s3://bucket/key or minio://bucket/key)
+            file: Binary file object to write to, at its current position
+            etag: The object's current ETag, if already known
+            if_match: Write only that version (If-Match); fail if the object changed since
+            
+        Raises:
+            ObjectChangedError: If if_match is set and the object is no longer at `etag`
+        """
+        try:
+            bucket_name, object_key = self.parse_s3_path(s3_path)
+            
+            cached = self.cache.get(bucket_name, object_key) if self.cache and etag else None
+            if cached and cached.etag == etag:
+                file.write(cached.data)
+                return cached.etag
+            
+            request = {'Bucket': bucket_name, 'Key': object_key}
+            if if_match and etag:
+                request['IfMatch'] = etag
+            try:
+                response = self.s3_client.get_object(**request)
+            except ClientError as e:
+                self._raise_read_error(e, s3_path, bucket_name, etag)
+            
+            size = 0
+            body = response['Body']
+            while True:
+                chunk = body.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                file.write(chunk)
+                size += len(chunk)
+            
+            cli_log(CliLogData(
+                action="S3FileReader",
+                message=f"Streamed S3 file: {s3_path} ({size} bytes)",
+                message_type="Info"
+            ))
+            return response.get('ETag')
+            
+        except Exception as e:
+            cli_log(CliLogData(
+                action="S3FileReader",
+                message=f"Error reading S3 file {s3_path}: {str(e)}",
+                message_type="Error"
+            ))
+            raise
+    
+    @staticmethod
+    def _raise_read_error(error: ClientError, s3_path: str, bucket_name: str, etag: Optional[str]) -> None:
+        """Raise the error a failed GET of `s3_path` is reported as."""
+        error_code = error.response['Error']['Code']
+        if error_code in ('PreconditionFailed', '412'):
+            raise ObjectChangedError(f"S3 object changed since version {etag} was read: {s3_path}")
+        elif error_code in ('NoSuchKey', '404'):
+            raise FileNotFoundError(f"S3 object not found: {s3_path}")
+        elif error_code == 'NoSuchBucket':
+            raise FileNotFoundError(f"S3 bucket not found: {bucket_name}")
+        elif error_code == 'AccessDenied':
+            raise PermissionError(f"Access denied to S3 object: {s3_path}")
+        else:
+            raise Exception(f"S3 error reading {s3_path}: {str(error)}")
+    
+    def _get_object_content(self, request: dict) -> Tuple[dict, Union[bytes, bytearray]]:
+        """
+        GET an object's body. With a part size, the first request asks for the first
+        part only; if Content-Range shows the object is larger, the remaining parts are
+        fetched in parallel (pinned to the first part's ETag with If-Match, so an
+        overwrite mid-download fails instead of mixing versions) straight into a
+        buffer preallocated to the object's size.
+        """
+        if not self.part_size:
+            response = self.s3_client.get_object(**request)
+            return response, response['Body'].read()
+        
+        try:
+            response = self.s3_client.get_object(Range=f"bytes=0-{self.part_size - 1}", **request)
+        except ClientError as e:
+            # S3 and MinIO reject any range on an empty object; read it whole instead
+            if e.response['Error']['Code'] not in ('InvalidRange', '416'):
+                raise
+            response = self.s3_client.get_object(**request)
+            return response, response['Body'].read()
+        first_part = response['Body'].read()
+        # "bytes 0-8388607/73400320"; absent when the server ignored the range and sent everything
+        match = re.match(r'bytes \d+-\d+/(\d+)', response.get('ContentRange') or '')
+        total_size = int(match.group(1)) if match else len(first_part)
+        if total_size <= len(first_part):
+            return response, first_part
+        
+        buffer = bytearray(total_size)
+        buffer[:len(first_part)] = first_part
+        
+        def fetch_range(start: int) -> None:
+            end = min(start + self.part_size, total_size) - 1
+            part = self.s3_client.get_object(
+                Bucket=request['Bucket'], Key=request['Key'], Range=f"bytes={start}-{end}", IfMatch=response['ETag']
+            )
+            data = part['Body'].read()
+            if len(data) != end - start + 1:
+                raise IOError(f"Short read for bytes {start}-{end} of {request['Key']}: got {len(data)} bytes")
+            buffer[start:end + 1] = data
+        
+        # list() re-raises the first failed range
+        list(self._ranges().map(fetch_range, range(len(first_part), total_size, self.part_size)))
+        return response, buffer
+    
+    def close(self) -> None:
+        """
+        Shut down the thread pool used for ranged downloads. The reader stays usable;
+        a later large download creates a new pool. The S3 client is shared and stays open.
+        """
+        with self._range_executor_lock:
+            executor, self._range_executor = self._range_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+    
+    def __enter__(self) -> "S3FileReader":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _ranges(self) -> ThreadPoolExecutor:
+        # Created on first use and shared by every download of this reader
+        with self._range_executor_lock:
+            if self._range_executor is None:
+                self._range_executor = ThreadPoolExecutor(
+                    max_workers=self.download_concurrency, thread_name_prefix="s3-range"
+                )
+            return self._range_executor
+    
     def _get_file_type(self, object_key: str) -> str:
         """Determine file type based on object key extension and MIME type."""
         file_extension = Path(object_key).suffix.lower()
@@ -249,109 +439,31 @@ class S3FileReader:
                     continue
             raise Exception(f"Could not decode S3 file {object_key} with any supported encoding")
     
-    def _process_pdf_content(self, content: bytes, object_key: str) -> str:
-        """
-        Process PDF content from S3 for LLM processing.
-        Returns the PDF content as base64-encoded data for LLM vision processing.
-        """
-        try:
-            # Convert PDF binary data to base64 for LLM processing
-            pdf_base64 = base64.b64encode(content).decode('utf-8')
-            
-            cli_log(CliLogData(
-                action="S3FileReader",
-                message=f"Successfully processed S3 PDF: {object_key} ({len(content)} bytes)",
-                message_type="Info"
-            ))
-            
-            # Return the PDF data in a format that can be processed by the LLM
-            # The LLM service will handle the actual text extraction
-            return f"[PDF_DATA]data:application/pdf;base64,{pdf_base64}"
-            
-        except Exception as e:
-            cli_log(CliLogData(
-                action="S3FileReader",
-                message=f"Error processing S3 PDF {object_key}: {str(e)}",
-                message_type="Error"
-            ))
-            raise Exception(f"Unable to process S3 PDF {object_key}: {str(e)}")
-    
-    def _process_image_content(self, content: bytes, object_key: str) -> str:
-        """
-        Process image content from S3 and convert to base64 for LLM vision processing.
-        """
-        try:
-            # Convert binary image data to base64
-            image_base64 = base64.b64encode(content).decode('utf-8')
-            
-            # Determine the MIME type for the image
-            mime_type, _ = mimetypes.guess_type(object_key)
-            if not mime_type:
-                # Fallback MIME type based on file extension
-                file_extension = Path(object_key).suffix.lower()
-                if file_extension == '.png':
-                    mime_type = 'image/png'
-                elif file_extension in ['.jpg', '.jpeg']:
-                    mime_type = 'image/jpeg'
-                elif file_extension == '.gif':
-                    mime_type = 'image/gif'
-                elif file_extension == '.bmp':
-                    mime_type = 'image/bmp'
-                else:
-                    mime_type = 'image/jpeg'  # Default fallback
-            
-            cli_log(CliLogData(
-                action="S3FileReader",
-                message=f"Successfully processed S3 image: {object_key} ({len(content)} bytes, MIME: {mime_type})",
-                message_type="Info"
-            ))
-            
-            # Return the image data in a format that can be processed by the LLM
-            # The LLM service will handle the actual OCR extraction
-            return f"[IMAGE_DATA]data:{mime_type};base64,{image_base64}"
-            
-        except Exception as e:
-            cli_log(CliLogData(
-                action="S3FileReader",
-                message=f"Error processing S3 image {object_key}: {str(e)}",
-                message_type="Error"
-            ))
-            raise Exception(f"Unable to process S3 image {object_key}: {str(e)}")
-    
-    def _process_word_content(self, content: bytes, object_key: str) -> str:
-        """
-        Process Word document content from S3 for LLM processing.
-        Returns the document content as base64-encoded data for LLM processing.
-        """
-        try:
-            # Convert Word document binary data to base64 for LLM processing
-            doc_base64 = base64.b64encode(content).decode('utf-8')
-            
-            # Determine the MIME type based on file extension
-            if object_key.lower().endswith('.docx'):
-                mime_type = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            else:
-                mime_type = 'application/msword'
-            
-            cli_log(CliLogData(
-                action="S3FileReader",
-                message=f"Successfully processed S3 Word document: {object_key} ({len(content)} bytes)",
-                message_type="Info"
-            ))
-            
-            # Return the document data in a format that can be processed by the LLM
-            # The LLM service will handle the actual text extraction
-            return f"[DOC_DATA]data:{mime_type};base64,{doc_base64}"
-            
-        except Exception as e:
-            cli_log(CliLogData(
-                action="S3FileReader",
-                message=f"Error processing S3 Word document {object_key}: {str(e)}",
-                message_type="Error"
-            ))
-            raise Exception(f"Unable to process S3 Word document {object_key}: {str(e)}")
+    def _binary_mime_type(self, object_key: str, file_type: str) -> str:
+        """MIME type of a PDF, image or Word document, as sent to the LLM."""
+        if file_type == "pdf":
+            return 'application/pdf'
+        if file_type == "docx":
+            return 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        if file_type == "doc":
+            return 'application/msword'
+        
+        mime_type, _ = mimetypes.guess_type(object_key)
+        if mime_type and mime_type.startswith('image/'):
+            return mime_type
+        # Fallback MIME type based on file extension
+        file_extension = Path(object_key).suffix.lower()
+        if file_extension == '.png':
+            return 'image/png'
+        elif file_extension == '.gif':
+            return 'image/gif'
+        elif file_extension == '.bmp':
+            return 'image/bmp'
+        return 'image/jpeg'  # Default fallback
     
-    def list_objects(self, bucket_name: str = None, prefix: str = "", pattern: str = None) -> list:
+    def list_objects(
+        self, bucket_name: str = None, prefix: str = "", pattern: str = None, etags: Optional[Dict[str, str]] = None
+    ) -> list:
         """
         List objects in S3 bucket, optionally filtering by prefix and pattern.
         
@@ -359,6 +471,7 @@ class S3FileReader:
             bucket_name: S3 bucket name (uses default from config if not provided)
             prefix: Object key prefix filter
             pattern: Filename pattern filter (e.g., "*.txt")
+            etags: If given, filled with the ETag of each listed key, for read_file to validate cached copies
             
         Returns:
             List of object keys matching the criteria
@@ -376,6 +489,8 @@ class S3FileReader:
             for page in page_iterator:
                 for obj in page.get('Contents', []):
                     object_key = obj['Key']
+                    if etags is not None and 'ETag' in obj:
+                        etags[object_key] = obj['ETag']
                     if pattern:
                         import fnmatch
                         if fnmatch.fnmatch(object_key, pattern):
@@ -397,4 +512,13 @@ class S3FileReader:
                 message=f"Error listing objects from bucket {bucket_name}: {str(e)}",
                 message_type="Error"
             ))
-            raise
\ No newline at end of file
+            raise
+
+_s3_file_reader_instance = None
+
+def get_s3_file_reader() -> S3FileReader:
+    """Get the shared S3FileReader for moose.config.toml, for callers reading one file at a time."""
+    global _s3_file_reader_instance
+    if _s3_file_reader_instance is None:
+        _s3_file_reader_instance = S3FileReader()
+    return _s3_file_reader_instance
@@ -1,9 +1,33 @@
 import fnmatch
 import re
-from typing import List, Tuple, Optional, Dict, Any
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Tuple, Optional, Dict, Any
 from pathlib import PurePath
 from moose_lib import cli_log, CliLogData
 from .s3_file_reader import S3FileReader
+from .listing_index import ListingIndex
+
+class _PrefixTrie:
+    """Literal pattern heads, so one walk down a key finds every pattern whose head it starts with."""
+    
+    def __init__(self):
+        self.root: Dict[Any, Any] = {}
+    
+    def add(self, head: str, value: Any) -> None:
+        node = self.root
+        for char in head:
+            node = node.setdefault(char, {})
+        node.setdefault(None, []).append(value)
+    
+    def candidates(self, key: str):
+        node = self.root
+        yield from node.get(None, ())
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return
+            yield from node.get(None, ())
 
 class S3WildcardResolver:
     """
@@ -11,14 +35,24 @@ class S3WildcardResolver:
     into lists of actual files for batch processing.
     """
     
-    def __init__(self, config_path: str = "moose.config.toml"):
+    def __init__(
+        self,
+        config_path: str = "moose.config.toml",
+        list_concurrency: int = 16,
+        listing_index: Optional[ListingIndex] = None
+    ):
         """
         Initialize the S3 wildcard resolver.
         
         Args:
             config_path: Path to the moose configuration file
+            list_concurrency: Maximum number of sibling prefixes listed at once
+            listing_index: Persistent listing index; patterns are then matched against
+                           the index, which only lists S3 when its entries are stale
         """
-        self.s3_reader = S3FileReader(config_path)
+        self.list_concurrency = max(1, list_concurrency)
+        self.listing_index = listing_index
+        self.s3_reader = S3FileReader(config_path, max_pool_connections=max(10, self.list_concurrency))
     
     def resolve_pattern(self, s3_pattern: str) -> Dict[str, Any]:
         """
@@ -34,6 +68,7 @@ class S3WildcardResolver:
                 'pattern': str,
                 'bucket_name': str,
                 'files_found': List[str],
+                'etags': Dict[str, str],  # ETag of each file found, from the listing
                 'total_files': int,
                 'error_message': Optional[str],
                 'processing_info': Dict
@@ -60,17 +95,20 @@ class S3WildcardResolver:
             ))
             
             # Resolve files based on strategy
-            if resolution_strategy['strategy'] == 'simple_wildcard':
-                files = self._resolve_simple_wildcard(bucket_name, object_pattern)
+            etags: Dict[str, str] = {}
+            if self.listing_index is not None:
+                files = self._resolve_from_index(bucket_name, object_pattern, resolution_strategy, etags)
+            elif resolution_strategy['strategy'] == 'simple_wildcard':
+                files = self._resolve_simple_wildcard(bucket_name, object_pattern, etags)
             elif resolution_strategy['strategy'] == 'prefix_wildcard':
-                files = self._resolve_prefix_wildcard(bucket_name, object_pattern, resolution_strategy)
+                files = self._resolve_prefix_wildcard(bucket_name, object_pattern, resolution_strategy, etags)
             elif resolution_strategy['strategy'] == 'recursive_wildcard':
-                files = self._resolve_recursive_wildcard(bucket_name, object_pattern, resolution_strategy)
+                files = self._resolve_recursive_wildcard(bucket_name, object_pattern, resolution_strategy, etags)
             elif resolution_strategy['strategy'] == 'complex_pattern':
-                files = self._resolve_complex_pattern(bucket_name, object_pattern, resolution_strategy)
+                files = self._resolve_complex_pattern(bucket_name, object_pattern, resolution_strategy, etags)
             else:
                 # Single file - no wildcards
-                files = self._resolve_single_file(bucket_name, object_pattern)
+                files = self._resolve_single_file(bucket_name, object_pattern, etags)
             
             # Convert to full S3 paths
             full_paths = [f"s3://{bucket_name}/{file_key}" for file_key in files]
@@ -86,6 +124,7 @@ class S3WildcardResolver:
                 'pattern': s3_pattern,
                 'bucket_name': bucket_name,
                 'files_found': full_paths,
+                'etags': {f"s3://{bucket_name}/{file_key}": etags[file_key] for file_key in files if file_key in etags},
                 'total_files': len(full_paths),
                 'error_message': None,
                 'processing_info': {
@@ -108,11 +147,126 @@ class S3WildcardResolver:
                 'pattern': s3_pattern,
                 'bucket_name': None,
                 'files_found': [],
+                'etags': {},
                 'total_files': 0,
                 'error_message': error_msg,
                 'processing_info': {}
             }
     
+    def resolve_patterns(self, s3_patterns: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve several S3 patterns, sharing one listing among the patterns under the
+        same top-level directory.
+        
+        The patterns of a bucket are grouped by the top-level directory of their literal
+        head (reports/2024-*/x.txt and reports/**/y.txt share reports/). Each group is
+        listed once under the longest common literal prefix of its patterns, and each
+        listed key is routed through a trie of the patterns' literal heads to the
+        patterns it can match, so N related patterns cost one listing rather than N.
+        A pattern alone in its group, or in a group with no common prefix (patterns
+        starting with a wildcard), is resolved by resolve_pattern() instead, so it
+        keeps its own pruned listing rather than listing the whole bucket.
+        
+        Args:
+            s3_patterns: S3 patterns, possibly over different buckets
+            
+        Returns:
+            Dictionary of pattern -> resolution result, as returned by resolve_pattern()
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        by_bucket: Dict[str, List[Tuple[str, str]]] = {}
+        for s3_pattern in dict.fromkeys(s3_patterns):
+            try:
+                bucket_name, object_pattern = self._parse_s3_pattern(s3_pattern)
+            except ValueError as e:
+                results[s3_pattern] = self._failed_result(s3_pattern, f"Failed to resolve S3 pattern {s3_pattern}: {str(e)}")
+                continue
+            by_bucket.setdefault(bucket_name, []).append((s3_pattern, object_pattern))
+        
+        for bucket_name, bucket_patterns in by_bucket.items():
+            groups: Dict[str, List[Tuple[str, str]]] = {}
+            for s3_pattern, object_pattern in bucket_patterns:
+                groups.setdefault(self._top_level_head(object_pattern), []).append((s3_pattern, object_pattern))
+            
+            for top_level, patterns in groups.items():
+                if len(patterns) == 1 or not top_level:
+                    for s3_pattern, _ in patterns:
+                        results[s3_pattern] = self.resolve_pattern(s3_pattern)
+                    continue
+                try:
+                    results.update(self._resolve_bucket_patterns(bucket_name, patterns))
+                except Exception as e:
+                    for s3_pattern, _ in patterns:
+                        results[s3_pattern] = self._failed_result(s3_pattern, f"Failed to resolve S3 pattern {s3_pattern}: {str(e)}")
+        
+        return {s3_pattern: results[s3_pattern] for s3_pattern in dict.fromkeys(s3_patterns)}
+    
+    def _resolve_bucket_patterns(self, bucket_name: str, patterns: List[Tuple[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """Resolve the (s3 pattern, object pattern) pairs of one bucket from one listing."""
+        trie = _PrefixTrie()
+        matchers: List[Callable[[str], Any]] = []
+        for index, (_, object_pattern) in enumerate(patterns):
+            trie.add(self._literal_head(object_pattern), index)
+            matchers.append(self._matcher(object_pattern, self._analyze_pattern(object_pattern)['strategy']))
+        prefix = os.path.commonprefix([self._literal_head(object_pattern) for _, object_pattern in patterns])
+        
+        cli_log(CliLogData(
+            action="S3WildcardResolver",
+            message=f"Resolving {len(patterns)} patterns in bucket {bucket_name} from one listing under '{prefix}'",
+            message_type="Info"
+        ))
+        
+        etags: Dict[str, str] = {}
+        if self.listing_index is not None:
+            keys = []
+            for obj in self.listing_index.objects(self.s3_reader.s3_client, bucket_name, prefix):
+                keys.append(obj.key)
+                etags[obj.key] = obj.etag
+        else:
+            keys = self.s3_reader.list_objects(bucket_name, prefix=prefix, etags=etags)
+        
+        matched: List[List[str]] = [[] for _ in patterns]
+        for key in keys:
+            for index in trie.candidates(key):
+                if matchers[index](key):
+                    matched[index].append(key)
+        
+        results = {}
+        for (s3_pattern, _), files in zip(patterns, matched):
+            full_paths = [f"s3://{bucket_name}/{file_key}" for file_key in files]
+            results[s3_pattern] = {
+                'success': True,
+                'pattern': s3_pattern,
+                'bucket_name': bucket_name,
+                'files_found': full_paths,
+                'etags': {f"s3://{bucket_name}/{file_key}": etags[file_key] for file_key in files if file_key in etags},
+                'total_files': len(full_paths),
+                'error_message': None,
+                'processing_info': {
+                    'resolution_strategy': 'multi_pattern',
+                    'complexity': 'medium',
+                    'estimated_performance': self._estimate_performance(len(full_paths))
+                }
+            }
+        return results
+    
+    def _failed_result(self, s3_pattern: str, error_msg: str) -> Dict[str, Any]:
+        cli_log(CliLogData(
+            action="S3WildcardResolver",
+            message=error_msg,
+            message_type="Error"
+        ))
+        return {
+            'success': False,
+            'pattern': s3_pattern,
+            'bucket_name': None,
+            'files_found': [],
+            'etags': {},
+            'total_files': 0,
+            'error_message': error_msg,
+            'processing_info': {}
+        }
+    
     def _parse_s3_pattern(self, s3_pattern: str) -> Tuple[str, str]:
         """Parse S3 pattern into bucket name and object pattern."""
         if s3_pattern.startswith('s3://'):
@@ -169,19 +323,21 @@ class S3WildcardResolver:
                 'prefix': '/'.join(path_segments[:-1]) if len(path_segments) > 1 else ''
             }
     
-    def _resolve_single_file(self, bucket_name: str, object_key: str) -> List[str]:
+    def _resolve_single_file(self, bucket_name: str, object_key: str, etags: Dict[str, str]) -> List[str]:
         """Resolve a single file (no wildcards)."""
         try:
             # Check if file exists
-            self.s3_reader.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+            response = self.s3_reader.s3_client.head_object(Bucket=bucket_name, Key=object_key)
+            etags[object_key] = response['ETag']
             return [object_key]
         except Exception:
             return []  # File doesn't exist
     
-    def _resolve_simple_wildcard(self, bucket_name: str, pattern: str) -> List[str]:
+    def _resolve_simple_wildcard(self, bucket_name: str, pattern: str, etags: Dict[str, str]) -> List[str]:
         """Resolve simple wildcards in bucket root (e.g., *.txt)."""
         try:
-            objects = self.s3_reader.list_objects(bucket_name, prefix="")
+            # Matching keys all start with the pattern's text before its first wildcard
+            objects = self.s3_reader.list_objects(bucket_name, prefix=self._literal_head(pattern), etags=etags)
             return [obj for obj in objects if fnmatch.fnmatch(obj, pattern)]
         except Exception as e:
             cli_log(CliLogData(
@@ -191,11 +347,11 @@ class S3WildcardResolver:
             ))
             return []
     
-    def _resolve_prefix_wildcard(self, bucket_name: str, pattern: str, strategy_info: Dict) -> List[str]:
+    def _resolve_prefix_wildcard(self, bucket_name: str, pattern: str, strategy_info: Dict, etags: Dict[str, str]) -> List[str]:
         """Resolve wildcards with a known prefix (e.g., reports/*.txt)."""
         try:
-            prefix = strategy_info.get('prefix', '')
-            objects = self.s3_reader.list_objects(bucket_name, prefix=prefix)
+            # Narrower than strategy_info['prefix']: includes the last segment's text before its first wildcard
+            objects = self.s3_reader.list_objects(bucket_name, prefix=self._literal_head(pattern), etags=etags)
             return [obj for obj in objects if fnmatch.fnmatch(obj, pattern)]
         except Exception as e:
             cli_log(CliLogData(
@@ -205,17 +361,11 @@ class S3WildcardResolver:
             ))
             return []
     
-    def _resolve_recursive_wildcard(self, bucket_name: str, pattern: str, strategy_info: Dict) -> List[str]:
+    def _resolve_recursive_wildcard(self, bucket_name: str, pattern: str, strategy_info: Dict, etags: Dict[str, str]) -> List[str]:
         """Resolve recursive wildcards (e.g., **/logs/*.txt)."""
         try:
-            # For recursive patterns, we need to list all objects and match
-            objects = self.s3_reader.list_objects(bucket_name, prefix="")
-            
-            # Convert ** patterns to regex for matching
-            regex_pattern = self._wildcard_to_regex(pattern)
-            compiled_pattern = re.compile(regex_pattern)
-            
-            return [obj for obj in objects if compiled_pattern.match(obj)]
+            # Segments before the first ** are expanded level by level; ** itself needs a flat listing
+            return self._walk_pattern(bucket_name, pattern, etags)
         except Exception as e:
             cli_log(CliLogData(
                 action="S3WildcardResolver",
@@ -224,18 +374,11 @@ class S3WildcardResolver:
             ))
             return []
     
-    def _resolve_complex_pattern(self, bucket_name: str, pattern: str, strategy_info: Dict) -> List[str]:
+    def _resolve_complex_pattern(self, bucket_name: str, pattern: str, strategy_info: Dict, etags: Dict[str, str]) -> List[str]:
         """Resolve complex patterns with multiple wildcards."""
         try:
-            # Start with any available prefix to reduce the search space
-            prefix = strategy_info.get('prefix', '')
-            objects = self.s3_reader.list_objects(bucket_name, prefix=prefix)
-            
-            # Use regex matching for complex patterns
-            regex_pattern = self._wildcard_to_regex(pattern)
-            compiled_pattern = re.compile(regex_pattern)
-            
-            return [obj for obj in objects if compiled_pattern.match(obj)]
+            # Only directories matching each wildcard segment are listed
+            return self._walk_pattern(bucket_name, pattern, etags)
         except Exception as e:
             cli_log(CliLogData(
                 action="S3WildcardResolver",
@@ -244,6 +387,98 @@ class S3WildcardResolver:
             ))
             return []
     
+    def _resolve_from_index(self, bucket_name: str, pattern: str, strategy_info: Dict, etags: Dict[str, str]) -> List[str]:
+        """Resolve from the listing index: a range scan under the pattern's literal head, matched locally."""
+        matches = self._matcher(pattern, strategy_info['strategy'])
+        files = []
+        for obj in self.listing_index.objects(self.s3_reader.s3_client, bucket_name, self._literal_head(pattern)):
+            if matches(obj.key):
+                files.append(obj.key)
+                etags[obj.key] = obj.etag
+        return files
+    
+    def _matcher(self, pattern: str, strategy: str) -> Callable[[str], Any]:
+        """Predicate over object keys with the same semantics as the pattern's resolution strategy."""
+        if strategy == 'single_file':
+            return lambda key: key == pattern
+        elif strategy in ('simple_wildcard', 'prefix_wildcard'):
+            return lambda key: fnmatch.fnmatch(key, pattern)
+        return re.compile(self._wildcard_to_regex(pattern)).match
+    
+    def _walk_pattern(self, bucket_name: str, pattern: str, etags: Dict[str, str]) -> List[str]:
+        """
+        Resolve a pattern by walking it one path segment at a time, with the same
+        matches as _wildcard_to_regex() over a full listing. A literal segment just
+        extends the current prefixes. A segment whose only wildcard is *, which never
+        crosses '/', is expanded with Delimiter='/' listings of the current prefixes
+        (listed in parallel), keeping only the common prefixes it matches, so a
+        pattern like 2024-*/reports/*.txt lists the 2024-* directories and their
+        reports/ folders and nothing else. ** matches any depth and ? matches any
+        character, '/' included, so the walk ends at a segment holding either with a
+        flat listing under each prefix reached.
+        """
+        compiled_pattern = re.compile(self._wildcard_to_regex(pattern))
+        segments = pattern.split('/')
+        prefixes = ['']
+        objects: List[Tuple[str, str]] = []
+        
+        with ThreadPoolExecutor(max_workers=self.list_concurrency) as pool:
+            for index, segment in enumerate(segments):
+                is_last = index == len(segments) - 1
+                if not is_last and '*' not in segment and '?' not in segment:
+                    prefixes = [prefix + segment + '/' for prefix in prefixes]
+                    continue
+                
+                head = self._literal_head(segment)
+                delimiter = None if '**' in segment or '?' in segment else '/'
+                listings = list(pool.map(
+                    lambda prefix: self._list_level(bucket_name, prefix + head, delimiter), prefixes
+                ))
+                
+                if is_last or delimiter is None:
+                    objects = [obj for _, level_objects in listings for obj in level_objects]
+                    break
+                
+                segment_pattern = re.compile(self._wildcard_to_regex(segment))
+                prefixes = [
+                    common_prefix
+                    for level_prefixes, _ in listings
+                    for common_prefix in level_prefixes
+                    if segment_pattern.match(common_prefix[:-1].rsplit('/', 1)[-1])
+                ]
+                if not prefixes:
+                    break
+        
+        files = []
+        for key, etag in objects:
+            if compiled_pattern.match(key):
+                files.append(key)
+                etags[key] = etag
+        return files
+    
+    def _list_level(self, bucket_name: str, prefix: str, delimiter: Optional[str]) -> Tuple[List[str], List[Tuple[str, str]]]:
+        """List the common prefixes and (key, ETag) of objects under `prefix`, one level deep with a delimiter."""
+        paginator = self.s3_reader.s3_client.get_paginator('list_objects_v2')
+        request = {'Bucket': bucket_name, 'Prefix': prefix}
+        if delimiter:
+            request['Delimiter'] = delimiter
+        
+        common_prefixes, objects = [], []
+        for page in paginator.paginate(**request):
+            common_prefixes.extend(entry['Prefix'] for entry in page.get('CommonPrefixes', []))
+            objects.extend((obj['Key'], obj.get('ETag', '')) for obj in page.get('Contents', []))
+        return common_prefixes, objects
+    
+    def _top_level_head(self, pattern: str) -> str:
+        """The literal head up to its first '/' (the whole head if it has none); patterns sharing it are listed together."""
+        head = self._literal_head(pattern)
+        return head[:head.index('/') + 1] if '/' in head else head
+    
+    def _literal_head(self, pattern: str) -> str:
+        """The part of the pattern before its first wildcard; every matching key starts with it."""
+        match = re.search(r'[*?]', pattern)
+        return pattern[:match.start()] if match else pattern
+    
     def _wildcard_to_regex(self, pattern: str) -> str:
         """Convert wildcard pattern to regex."""
         # Escape special regex characters except our wildcards
@@ -0,0 +1,37 @@
+from enum import Enum
+from typing import Any, Iterable, List
+import orjson
+from .random import ColumnBatch
+
+# Encoders that turn connector output straight into request bodies for the ingest
+# API. Records are serialized from their attribute dicts with orjson, so the
+# model_dump() copy and the json.dumps pass in `requests` drop out of the hot path.
+
+class JsonFormat(str, Enum):
+    Array = "json"     # a single JSON array, as accepted by /ingest/*
+    Lines = "ndjson"   # newline-delimited JSON, one record per line
+
+def _record_fields(record: Any) -> Any:
+    # Pydantic models keep their field values in __dict__; anything else
+    # (dicts, dataclasses) is handled by orjson natively.
+    fields = getattr(record, "__dict__", None)
+    return fields if fields is not None else record
+
+def _encode_rows(rows: List[Any], json_format: JsonFormat) -> bytes:
+    if json_format == JsonFormat.Lines:
+        return b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+    return orjson.dumps(rows)
+
+def encode_record(record: Any) -> bytes:
+    """Serialize a single record to JSON bytes."""
+    return orjson.dumps(_record_fields(record))
+
+def encode_records(records: Iterable[Any], json_format: JsonFormat = JsonFormat.Array) -> bytes:
+    """Serialize records (Pydantic models, dataclasses or dicts) to JSON bytes."""
+    return _encode_rows([_record_fields(record) for record in records], json_format)
+
+def encode_columns(columns: ColumnBatch, json_format: JsonFormat = JsonFormat.Array) -> bytes:
+    """Serialize a column batch to JSON bytes without building model instances."""
+    names = list(columns.keys())
+    rows = zip(*(column.tolist() for column in columns.values()))
+    return _encode_rows([dict(zip(names, row)) for row in rows], json_format)
@@ -0,0 +1,133 @@
+import hashlib
+import importlib.util
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from botocore.exceptions import ClientError
+
+# The package is installed as "connectors" from src/ (see setup.py); make the
+# same name importable when the tests run from a checkout without installing it.
+try:
+    import connectors  # noqa: F401
+except ImportError:
+    src = Path(__file__).resolve().parent.parent / "src"
+    spec = importlib.util.spec_from_file_location(
+        "connectors", src / "__init__.py", submodule_search_locations=[str(src)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["connectors"] = module
+    spec.loader.exec_module(module)
+
+
+MODIFIED = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeS3:
+    """
+    In-memory stand-in for the parts of an S3 client the connectors use: paginated
+    list_objects_v2 (two keys per page), head_object and get_object with Range,
+    IfMatch and IfNoneMatch. Every call is recorded in `calls` as (operation, kwargs).
+    """
+
+    def __init__(self):
+        self.objects = {}
+        self.calls = []
+
+    def put(self, key, data, etag=None):
+        self.objects[key] = (data, etag or f'"{hashlib.md5(data).hexdigest()}"')
+
+    def etag(self, key):
+        return self.objects[key][1]
+
+    def requests(self, operation):
+        return [kwargs for called, kwargs in self.calls if called == operation]
+
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix="", Delimiter=None, StartAfter=None):
+        self.calls.append(("list_objects_v2", {"Bucket": Bucket, "Prefix": Prefix, "Delimiter": Delimiter, "StartAfter": StartAfter}))
+        keys, common_prefixes = [], []
+        for key in sorted(self.objects):
+            if not key.startswith(Prefix) or (StartAfter is not None and key <= StartAfter):
+                continue
+            rest = key[len(Prefix):]
+            if Delimiter and Delimiter in rest:
+                common_prefix = Prefix + rest.split(Delimiter, 1)[0] + Delimiter
+                if common_prefix not in common_prefixes:
+                    common_prefixes.append(common_prefix)
+            else:
+                keys.append(key)
+        pages = [keys[i:i + 2] for i in range(0, len(keys), 2)] or [[]]
+        for index, page_keys in enumerate(pages):
+            page = {"Contents": [
+                {"Key": key, "Size": len(self.objects[key][0]), "ETag": self.objects[key][1], "LastModified": MODIFIED}
+                for key in page_keys
+            ]}
+            if index == 0 and common_prefixes:
+                page["CommonPrefixes"] = [{"Prefix": prefix} for prefix in common_prefixes]
+            yield page
+
+    def head_object(self, Bucket, Key):
+        self.calls.append(("head_object", {"Bucket": Bucket, "Key": Key}))
+        if Key not in self.objects:
+            raise self._error("404")
+        return {"ETag": self.objects[Key][1], "ContentLength": len(self.objects[Key][0])}
+
+    def get_object(self, Bucket, Key, Range=None, IfMatch=None, IfNoneMatch=None):
+        self.calls.append(("get_object", {"Bucket": Bucket, "Key": Key, "Range": Range, "IfMatch": IfMatch, "IfNoneMatch": IfNoneMatch}))
+        if Key not in self.objects:
+            raise self._error("NoSuchKey")
+        data, etag = self.objects[Key]
+        if IfMatch is not None and IfMatch != etag:
+            raise self._error("PreconditionFailed")
+        if IfNoneMatch is not None and IfNoneMatch == etag:
+            raise self._error("304")
+        response = {"ETag": etag, "ContentType": "application/octet-stream"}
+        if Range is not None:
+            start, end = (int(bound) for bound in Range[len("bytes="):].split("-"))
+            if start >= len(data):
+                raise self._error("InvalidRange")
+            end = min(end, len(data) - 1)
+            response["ContentRange"] = f"bytes {start}-{end}/{len(data)}"
+            data = data[start:end + 1]
+        response["Body"] = _Body(data)
+        return response
+
+    @staticmethod
+    def _error(code):
+        return ClientError({"Error": {"Code": code, "Message": code}}, "FakeS3")
+
+
+class _Body:
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def read(self, amt=None):
+        end = len(self.data) if amt is None else self.position + amt
+        chunk = self.data[self.position:end]
+        self.position += len(chunk)
+        return chunk
+
+
+@pytest.fixture
+def fake_s3():
+    return FakeS3()
+
+
+@pytest.fixture
+def moose_config(tmp_path):
+    """Path of a moose.config.toml with S3 credentials, for readers whose client is then replaced by a FakeS3."""
+    path = tmp_path / "moose.config.toml"
+    path.write_text(
+        "[s3_config]\n"
+        "endpoint_url = \"http://localhost:9000\"\n"
+        "access_key_id = \"test\"\n"
+        "secret_access_key = \"test\"\n"
+        "region_name = \"us-east-1\"\n"
+    )
+    return str(path)
@@ -0,0 +1,33 @@
+import base64
+import io
+
+import pytest
+
+from connectors.binary_payload import BinaryPayload, ObjectReference, base64_from_file, parse_reference
+
+
+def test_reference_carries_the_etag_of_the_version_read():
+    payload = BinaryPayload(b"%PDF", "application/pdf", "s3://bucket/a;b.pdf", '"abc-2"')
+
+    reference = payload.reference()
+
+    assert reference == '[S3_OBJECT]application/pdf;etag="abc-2";s3://bucket/a;b.pdf'
+    assert parse_reference(reference) == ObjectReference("application/pdf", "s3://bucket/a;b.pdf", '"abc-2"')
+
+
+def test_references_without_an_etag_still_parse():
+    assert parse_reference("[S3_OBJECT]image/png;s3://bucket/x.png") == ObjectReference("image/png", "s3://bucket/x.png", None)
+    assert BinaryPayload(b"", "image/png", "s3://bucket/x.png").reference() == "[S3_OBJECT]image/png;s3://bucket/x.png"
+
+
+@pytest.mark.parametrize("content", ["[S3_OBJECT]image/png", "[S3_OBJECT]image/png;etag=;s3://bucket/x.png"])
+def test_invalid_references_are_rejected(content):
+    with pytest.raises(ValueError):
+        parse_reference(content)
+
+
+@pytest.mark.parametrize("size", [0, 1, 5, 6, 7, 100])
+def test_base64_from_file_matches_encoding_at_once(size):
+    data = bytes(range(size))
+
+    assert base64_from_file(io.BytesIO(data), chunk_size=6) == base64.b64encode(data).decode("ascii")
@@ -0,0 +1,70 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from connectors import connector_factory
+from connectors.connector_factory import ConnectorFactory, ConnectorType, register_connector
+from connectors.events_connector import EventsConnector, EventsConnectorConfig
+
+
+@pytest.fixture(autouse=True)
+def fresh_factories(monkeypatch):
+    monkeypatch.setattr(connector_factory, "_factories", {})
+
+
+def test_builtin_connector_with_its_config():
+    connector = ConnectorFactory.create(ConnectorType.Events, EventsConnectorConfig(batch_size=3))
+
+    assert isinstance(connector, EventsConnector)
+    assert len(connector.extract()) == 3
+
+
+def test_builtin_connector_by_name_with_default_config():
+    assert isinstance(ConnectorFactory.create("Events"), EventsConnector)
+
+
+def test_registered_connector_overrides_the_builtin():
+    register_connector("Events", lambda config: ("custom", config))
+
+    assert ConnectorFactory.create(ConnectorType.Events, "config") == ("custom", "config")
+
+
+def test_entry_point_plugin_is_loaded_once(monkeypatch):
+    loads = []
+
+    class EntryPoint:
+        def load(self):
+            loads.append(True)
+            return lambda config: ("plugin", config)
+
+    def entry_points(group, name):
+        assert group == connector_factory.ENTRY_POINT_GROUP
+        return [EntryPoint()] if name == "Kafka" else []
+
+    monkeypatch.setattr(connector_factory.importlib.metadata, "entry_points", entry_points)
+
+    assert ConnectorFactory.create("Kafka", 1) == ("plugin", 1)
+    assert ConnectorFactory.create("Kafka", 2) == ("plugin", 2)
+    assert len(loads) == 1
+    with pytest.raises(ValueError, match="Unknown connector type: Missing"):
+        ConnectorFactory.create("Missing")
+
+
+def test_synthetic_connectors_do_not_import_the_s3_stack():
+    # In a fresh interpreter, since other tests load the S3 stack into this one
+    src = Path(__file__).resolve().parent.parent / "src"
+    script = (
+        "import importlib.util, sys\n"
+        f"spec = importlib.util.spec_from_file_location('connectors', {str(src / '__init__.py')!r}, "
+        f"submodule_search_locations=[{str(src)!r}])\n"
+        "sys.modules['connectors'] = importlib.util.module_from_spec(spec)\n"
+        "spec.loader.exec_module(sys.modules['connectors'])\n"
+        "from connectors.connector_factory import ConnectorFactory, ConnectorType\n"
+        "for connector_type in (ConnectorType.Events, ConnectorType.Logs, ConnectorType.Blob):\n"
+        "    ConnectorFactory.create(connector_type)\n"
+        "loaded = [name for name in ('boto3', 'botocore', 'connectors.s3_connector') if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
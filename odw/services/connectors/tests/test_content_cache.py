@@ -0,0 +1,50 @@
+import itertools
+
+from connectors import content_cache
+from connectors.content_cache import CachedContent, ContentCache
+
+
+def test_get_returns_what_was_put(tmp_path):
+    cache = ContentCache(str(tmp_path))
+    cache.put("bucket", "a.txt", '"etag-a"', b"hello")
+
+    assert cache.get("bucket", "a.txt") == CachedContent(etag='"etag-a"', data=b"hello")
+    assert cache.get("bucket", "missing.txt") is None
+    assert cache.get("other-bucket", "a.txt") is None
+
+
+def test_put_replaces_an_overwritten_object(tmp_path):
+    cache = ContentCache(str(tmp_path))
+    cache.put("bucket", "a.txt", '"v1"', b"old")
+    cache.put("bucket", "a.txt", '"v2"', bytearray(b"new"))
+
+    assert cache.get("bucket", "a.txt") == CachedContent(etag='"v2"', data=b"new")
+
+
+def test_bodies_larger_than_the_cache_are_not_stored(tmp_path):
+    cache = ContentCache(str(tmp_path), max_bytes=4)
+    cache.put("bucket", "big.bin", '"e"', b"12345")
+
+    assert cache.get("bucket", "big.bin") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    # A strictly increasing clock, so access order never ties
+    clock = itertools.count()
+    monkeypatch.setattr(content_cache.time, "time", lambda: float(next(clock)))
+    cache = ContentCache(str(tmp_path), max_bytes=10)
+    cache.put("bucket", "a", '"a"', b"aaaa")
+    cache.put("bucket", "b", '"b"', b"bbbb")
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("bucket", "a") is not None
+    cache.put("bucket", "c", '"c"', b"cccc")
+
+    assert cache.get("bucket", "b") is None
+    assert cache.get("bucket", "a").data == b"aaaa"
+    assert cache.get("bucket", "c").data == b"cccc"
+
+
+def test_cache_is_shared_through_its_directory(tmp_path):
+    ContentCache(str(tmp_path)).put("bucket", "a.txt", '"e"', b"persisted")
+
+    assert ContentCache(str(tmp_path)).get("bucket", "a.txt").data == b"persisted"
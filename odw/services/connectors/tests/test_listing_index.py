@@ -0,0 +1,105 @@
+from datetime import datetime, timezone
+
+from connectors.listing_index import ListingIndex
+
+MODIFIED = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeS3:
+    """list_objects_v2 over an in-memory bucket, recording every listing request."""
+
+    def __init__(self, objects):
+        self.objects = dict(objects)
+        self.requests = []
+
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix, StartAfter=None):
+        self.requests.append({"Prefix": Prefix, "StartAfter": StartAfter})
+        keys = sorted(key for key in self.objects if key.startswith(Prefix) and (StartAfter is None or key > StartAfter))
+        # Two keys per page, like a small MaxKeys
+        for i in range(0, len(keys), 2):
+            yield {"Contents": [
+                {"Key": key, "Size": len(self.objects[key]), "ETag": self.objects[key], "LastModified": MODIFIED}
+                for key in keys[i:i + 2]
+            ]}
+        if not keys:
+            yield {}
+
+
+def _keys(objects):
+    return [obj.key for obj in objects]
+
+
+def test_first_lookup_lists_the_prefix_in_full(tmp_path):
+    s3 = FakeS3({"logs/a": "1", "logs/b": "2", "logs/c": "3", "other/x": "4"})
+    index = ListingIndex(str(tmp_path / "index.db"))
+
+    objects = index.objects(s3, "bucket", "logs/")
+
+    assert _keys(objects) == ["logs/a", "logs/b", "logs/c"]
+    assert objects[0].size == 1 and objects[0].etag == "1"
+    assert objects[0].last_modified == MODIFIED.isoformat()
+    assert s3.requests == [{"Prefix": "logs/", "StartAfter": None}]
+
+
+def test_fresh_listing_is_served_from_the_index(tmp_path):
+    s3 = FakeS3({"logs/a": "1"})
+    index = ListingIndex(str(tmp_path / "index.db"), ttl=3600)
+    index.objects(s3, "bucket", "logs/")
+    s3.objects["logs/b"] = "2"
+
+    assert _keys(index.objects(s3, "bucket", "logs/")) == ["logs/a"]
+    # A narrower prefix is answered from the covering listing
+    assert _keys(index.objects(s3, "bucket", "logs/a")) == ["logs/a"]
+    assert len(s3.requests) == 1
+
+
+def test_stale_listing_is_refreshed_after_the_last_key(tmp_path):
+    s3 = FakeS3({"logs/a": "1", "logs/b": "2"})
+    index = ListingIndex(str(tmp_path / "index.db"), ttl=3600)
+    index.objects(s3, "bucket", "logs/")
+    s3.objects["logs/c"] = "3"
+    # Overwritten and deleted keys are only picked up by a full refresh
+    s3.objects["logs/a"] = "changed"
+    del s3.objects["logs/b"]
+
+    objects = index.objects(s3, "bucket", "logs/", max_age=-1)
+
+    assert s3.requests[-1] == {"Prefix": "logs/", "StartAfter": "logs/b"}
+    assert [(obj.key, obj.etag) for obj in objects] == [("logs/a", "1"), ("logs/b", "2"), ("logs/c", "3")]
+
+
+def test_full_refresh_drops_deleted_and_updates_overwritten_keys(tmp_path):
+    s3 = FakeS3({"logs/a": "1", "logs/b": "2"})
+    index = ListingIndex(str(tmp_path / "index.db"), full_refresh_interval=-1)
+    index.objects(s3, "bucket", "logs/")
+    s3.objects["logs/a"] = "changed"
+    del s3.objects["logs/b"]
+
+    objects = index.objects(s3, "bucket", "logs/")
+
+    assert s3.requests[-1] == {"Prefix": "logs/", "StartAfter": None}
+    assert [(obj.key, obj.etag) for obj in objects] == [("logs/a", "changed")]
+
+
+def test_invalidate_forces_a_full_listing(tmp_path):
+    s3 = FakeS3({"logs/a": "1", "logs/b": "2"})
+    index = ListingIndex(str(tmp_path / "index.db"), ttl=3600)
+    index.objects(s3, "bucket", "logs/")
+    del s3.objects["logs/a"]
+
+    index.invalidate("bucket", "logs/")
+
+    assert _keys(index.objects(s3, "bucket", "logs/")) == ["logs/b"]
+    assert s3.requests[-1] == {"Prefix": "logs/", "StartAfter": None}
+
+
+def test_listings_persist_across_instances(tmp_path):
+    s3 = FakeS3({"logs/a": "1"})
+    ListingIndex(str(tmp_path / "index.db"), ttl=3600).objects(s3, "bucket", "logs/")
+
+    assert _keys(ListingIndex(str(tmp_path / "index.db"), ttl=3600).objects(s3, "bucket", "logs/")) == ["logs/a"]
+    assert len(s3.requests) == 1
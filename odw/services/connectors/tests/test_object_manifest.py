@@ -0,0 +1,60 @@
+from connectors.object_manifest import ObjectManifest, manifest_scope
+
+
+def test_manifest_scope_is_stable_and_separates_its_parts():
+    assert manifest_scope("extract names", None) == manifest_scope("extract names", "")
+    assert manifest_scope("a", "bc") != manifest_scope("ab", "c")
+    assert manifest_scope("a") != manifest_scope("b")
+    assert len(manifest_scope("a")) == 16
+
+
+def test_processed_objects_are_no_longer_pending(tmp_path):
+    manifest = ObjectManifest(str(tmp_path / "manifest.db"))
+    objects = [("s3://b/a", '"1"'), ("s3://b/b", '"2"')]
+
+    assert manifest.pending(objects, "scope") == ["s3://b/a", "s3://b/b"]
+    assert manifest.mark_processed(objects[:1], "scope") == 1
+    assert manifest.pending(objects, "scope") == ["s3://b/b"]
+
+
+def test_overwritten_and_unknown_etags_are_pending(tmp_path):
+    manifest = ObjectManifest(str(tmp_path / "manifest.db"))
+    manifest.mark_processed([("s3://b/a", '"1"'), ("s3://b/b", None)], "scope")
+
+    assert manifest.pending([("s3://b/a", '"2"'), ("s3://b/a", None), ("s3://b/b", None)], "scope") == [
+        "s3://b/a", "s3://b/a", "s3://b/b"
+    ]
+
+
+def test_scopes_are_independent(tmp_path):
+    manifest = ObjectManifest(str(tmp_path / "manifest.db"))
+    manifest.mark_processed([("s3://b/a", '"1"')], "old instructions")
+
+    assert manifest.pending([("s3://b/a", '"1"')], "new instructions") == ["s3://b/a"]
+
+
+def test_forget_one_scope_or_all(tmp_path):
+    manifest = ObjectManifest(str(tmp_path / "manifest.db"))
+    manifest.mark_processed([("s3://b/a", '"1"')], "x")
+    manifest.mark_processed([("s3://b/a", '"1"')], "y")
+
+    manifest.forget("x")
+    assert manifest.pending([("s3://b/a", '"1"')], "x") == ["s3://b/a"]
+    assert manifest.pending([("s3://b/a", '"1"')], "y") == []
+
+    manifest.forget()
+    assert manifest.pending([("s3://b/a", '"1"')], "y") == ["s3://b/a"]
+
+
+def test_pending_handles_more_paths_than_one_query_binds(tmp_path):
+    manifest = ObjectManifest(str(tmp_path / "manifest.db"))
+    objects = [(f"s3://b/{i}", f'"{i}"') for i in range(1200)]
+    manifest.mark_processed(objects[::2], "scope")
+
+    assert manifest.pending(objects, "scope") == [path for path, _ in objects[1::2]]
+
+
+def test_records_persist_across_instances(tmp_path):
+    ObjectManifest(str(tmp_path / "manifest.db")).mark_processed([("s3://b/a", '"1"')], "scope")
+
+    assert ObjectManifest(str(tmp_path / "manifest.db")).pending([("s3://b/a", '"1"')], "scope") == []
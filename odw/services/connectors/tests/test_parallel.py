@@ -0,0 +1,138 @@
+import itertools
+import random
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from connectors import events_connector, logs_connector, parallel
+from connectors.events_connector import EventsConnector, EventsConnectorConfig
+from connectors.logs_connector import LogsConnector, LogsConnectorConfig
+from connectors.parallel import EXTRACT_CHUNK_SIZE, chunk_seeds, chunk_sizes, generate_in_processes
+
+
+@pytest.mark.parametrize("batch_size, chunk_size, expected", [
+    (0, 10, []),
+    (1, 10, [1]),
+    (10, 10, [10]),
+    (25, 10, [10, 10, 5]),
+])
+def test_chunk_sizes(batch_size, chunk_size, expected):
+    assert chunk_sizes(batch_size, chunk_size) == expected
+
+
+def test_chunk_seeds_depend_only_on_base_seed_and_index():
+    first = [seed.generate_state(1)[0] for seed in chunk_seeds(42, 3)]
+    longer = [seed.generate_state(1)[0] for seed in chunk_seeds(42, 5)]
+
+    assert first == longer[:3]
+    assert len(set(longer)) == 5
+    assert chunk_seeds(None, 2) == [None, None]
+
+
+def _ids(workers, batch_size=EXTRACT_CHUNK_SIZE + 10):
+    config = EventsConnectorConfig(batch_size=batch_size, columnar=True, workers=workers, seed=7)
+    return [event.id for event in EventsConnector(config).extract()]
+
+
+def test_seeded_columnar_extract_is_reproducible():
+    assert _ids(1) == _ids(1)
+    assert _ids(1) != [
+        event.id for event in EventsConnector(
+            EventsConnectorConfig(batch_size=EXTRACT_CHUNK_SIZE + 10, columnar=True, seed=8)
+        ).extract()
+    ]
+
+
+def test_seeded_columnar_extract_does_not_depend_on_workers(monkeypatch):
+    calls = []
+
+    def generate_in_order(generate_chunk, batch_size, chunk_size, workers, seed=None):
+        # What the process pool computes, without the processes
+        calls.append((chunk_size, workers))
+        sizes = chunk_sizes(batch_size, chunk_size)
+        for size, chunk_seed in zip(sizes, chunk_seeds(seed, len(sizes))):
+            yield generate_chunk(size, chunk_seed)
+
+    monkeypatch.setattr(events_connector, "generate_in_processes", generate_in_order)
+
+    assert _ids(1) == _ids(3) == _ids(8)
+    assert calls == [(EXTRACT_CHUNK_SIZE, 3), (EXTRACT_CHUNK_SIZE, 8)]
+
+
+def test_seeded_extract_does_not_reseed_global_random():
+    draws = []
+    for _ in range(2):
+        EventsConnector(EventsConnectorConfig(batch_size=20, seed=7)).extract()
+        draws.append(random.random())
+
+    assert draws[0] != draws[1]
+
+
+def test_small_batches_skip_the_process_pool(monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("the pool was used")
+
+    monkeypatch.setattr(parallel, "get_process_pool", no_pool)
+
+    assert list(generate_in_processes(slice, EXTRACT_CHUNK_SIZE - 1, 100, 4, seed=None))[-1] == slice(99, None)
+    assert list(generate_in_processes(slice, EXTRACT_CHUNK_SIZE * 3, EXTRACT_CHUNK_SIZE * 3, 4)) == [
+        slice(EXTRACT_CHUNK_SIZE * 3, None)
+    ]
+
+
+def test_process_pool_is_shared_between_extracts():
+    try:
+        # slice is a picklable builtin taking (size, seed), so the spawned workers need no imports
+        first = list(generate_in_processes(slice, EXTRACT_CHUNK_SIZE * 2 + 5, EXTRACT_CHUNK_SIZE, 2))
+        pool = parallel.get_process_pool(2)
+        second = list(generate_in_processes(slice, EXTRACT_CHUNK_SIZE * 2 + 5, EXTRACT_CHUNK_SIZE, 2))
+
+        assert first == second == [slice(EXTRACT_CHUNK_SIZE, None)] * 2 + [slice(5, None)]
+        assert parallel.get_process_pool(1) is pool
+        assert parallel.get_process_pool(3) is not pool
+    finally:
+        parallel.shutdown_process_pool()
+
+
+def _profile_columns(connector, chunk_size):
+    chunks = list(connector.extract_columns_iter(chunk_size))
+    columns = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+    # Timestamps end at the clock, so compare each row's distance from the batch's latest one
+    stamps = [datetime.fromisoformat(stamp) for stamp in columns.pop("timestamp")]
+    columns["age"] = np.array([(stamps[-1] - stamp).total_seconds() for stamp in stamps])
+    return chunks, columns
+
+
+@pytest.mark.parametrize("connector_type, config_type, module", [
+    (EventsConnector, EventsConnectorConfig, events_connector),
+    (LogsConnector, LogsConnectorConfig, logs_connector),
+])
+def test_seeded_profile_extract_does_not_depend_on_chunk_size_or_workers(monkeypatch, connector_type, config_type, module):
+    batch_size = EXTRACT_CHUNK_SIZE + 5_000
+
+    def starmap_out_of_order(batch_size, workers):
+        # Blocks finish in any order on the pool; results still come back in task order
+        def starmap(function, tasks):
+            tasks = list(tasks)
+            results = {index: function(*tasks[index]) for index in reversed(range(len(tasks)))}
+            return (results[index] for index in range(len(tasks)))
+        return starmap if workers > 1 else itertools.starmap
+
+    monkeypatch.setattr(module, "parallel_starmap", starmap_out_of_order)
+
+    def extract(chunk_size, workers=1):
+        config = config_type(batch_size=batch_size, profile="realistic", workers=workers, seed=11)
+        return _profile_columns(connector_type(config), chunk_size)
+
+    small_chunks, small = extract(1000)
+    whole_chunks, whole = extract(batch_size)
+    _, parallel_whole = extract(batch_size, workers=4)
+
+    assert [len(chunk["id"]) for chunk in small_chunks] == [1000] * (batch_size // 1000)
+    assert len(whole_chunks) == 1
+    for name in whole:
+        assert np.array_equal(small[name], whole[name]), name
+        assert np.array_equal(parallel_whole[name], whole[name]), name
+    # One time line across the batch rather than one per chunk
+    assert np.all(np.diff(whole["age"]) <= 0)
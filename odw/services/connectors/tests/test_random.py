@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from connectors.random import (
+    BlobSource,
+    EventSource,
+    LogSource,
+    column_batch_size,
+    get_workload_profile,
+    random_blob_columns,
+    random_event_columns,
+    random_log_columns,
+    rechunk_columns,
+    records_from_columns,
+)
+
+GENERATORS = [
+    (random_blob_columns, BlobSource),
+    (random_log_columns, LogSource),
+    (random_event_columns, EventSource),
+]
+
+
+@pytest.mark.parametrize("generate, model", GENERATORS)
+@pytest.mark.parametrize("size", [0, 1, 257])
+def test_columns_have_requested_size(generate, model, size):
+    columns = generate(size, np.random.default_rng(7))
+
+    assert column_batch_size(columns) == size
+    assert all(len(column) == size for column in columns.values())
+    assert len(records_from_columns(model, columns)) == size
+
+
+@pytest.mark.parametrize("generate, model", GENERATORS)
+def test_columns_are_deterministic_for_a_seed(generate, model):
+    first = generate(50, np.random.default_rng(3))
+    second = generate(50, np.random.default_rng(3))
+
+    # Ids and timestamps aside, every column comes from the generator
+    for name in first:
+        if name not in ("ingested_at", "timestamp"):
+            assert list(first[name]) == list(second[name])
+
+
+def test_blob_paths_are_folder_paths():
+    paths = random_blob_columns(200, np.random.default_rng(11))["file_path"]
+
+    for path in paths:
+        folders = path.split("/")
+        assert path.startswith("/") and path.endswith("/")
+        assert 1 <= len(folders) - 2 <= 3
+        assert all(3 <= len(folder) <= 8 for folder in folders[1:-1])
+
+
+@pytest.mark.parametrize("size", [0, 1, 500])
+def test_realistic_profile_batches_have_requested_size(size):
+    profile = get_workload_profile("realistic")
+
+    for columns, model in (
+        (profile.event_columns(size, np.random.default_rng(5)), EventSource),
+        (profile.log_columns(size, np.random.default_rng(5)), LogSource),
+    ):
+        assert column_batch_size(columns) == size
+        assert len(records_from_columns(model, columns)) == size
+
+
+def test_realistic_timestamps_end_now_in_arrival_order():
+    before = datetime.now()
+    columns = get_workload_profile("realistic").event_columns(20_000, np.random.default_rng(9))
+    after = datetime.now()
+
+    stamps = [datetime.fromisoformat(stamp) for stamp in columns["timestamp"]]
+    assert stamps == sorted(stamps)
+    assert before <= stamps[-1] <= after
+    # The batch spans back in time rather than running into the future
+    assert stamps[0] < before
+
+
+def test_realistic_sessions_span_generation_blocks():
+    # Large enough for several blocks of sessions, which are drawn and generated separately
+    columns = get_workload_profile("realistic").event_columns(40_000, np.random.default_rng(9))
+    session_ids = columns["session_id"]
+    started = session_ids[columns["event_name"] == "session_started"]
+    ended = session_ids[columns["event_name"] == "session_ended"]
+
+    # Every session starts exactly once, and only the last one may still be in progress
+    assert len(started) == len(set(started)) == len(set(session_ids))
+    assert len(ended) == len(set(ended)) >= len(started) - 1
+
+
+def test_rechunk_columns():
+    batches = [{"a": np.arange(0, 3)}, {"a": np.arange(3, 3)}, {"a": np.arange(3, 10)}]
+
+    chunks = list(rechunk_columns(iter(batches), 4))
+
+    assert [chunk["a"].tolist() for chunk in chunks] == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
@@ -0,0 +1,137 @@
+import io
+import os
+
+import pytest
+
+from connectors.content_cache import ContentCache
+from connectors.s3_file_reader import ObjectChangedError, S3FileReader
+
+
+@pytest.fixture
+def reader(moose_config, fake_s3):
+    reader = S3FileReader(config_path=moose_config, part_size=4, download_concurrency=3)
+    reader.s3_client = fake_s3
+    yield reader
+    reader.close()
+
+
+def _ranges(s3):
+    return [request["Range"] for request in s3.requests("get_object")]
+
+
+@pytest.mark.parametrize("size", [1, 3, 4, 5, 8, 11])
+def test_ranged_download_reassembles_the_object(reader, fake_s3, size):
+    data = os.urandom(size)
+    fake_s3.put("blob.bin", data)
+
+    assert bytes(reader.read_bytes("s3://bucket/blob.bin")[0]) == data
+    expected = ["bytes=0-3"] + [f"bytes={start}-{min(start + 4, size) - 1}" for start in range(4, size, 4)]
+    assert sorted(_ranges(fake_s3)) == sorted(expected)
+
+
+def test_later_ranges_are_pinned_to_the_first_etag(reader, fake_s3):
+    fake_s3.put("blob.bin", b"0123456789")
+
+    reader.read_bytes("s3://bucket/blob.bin")
+
+    requests = fake_s3.requests("get_object")
+    assert requests[0]["IfMatch"] is None
+    assert {request["IfMatch"] for request in requests[1:]} == {fake_s3.etag("blob.bin")}
+
+
+def test_short_range_read_fails(reader, fake_s3, monkeypatch):
+    fake_s3.put("blob.bin", b"0123456789")
+    get_object = fake_s3.get_object
+
+    def truncating_get_object(**kwargs):
+        response = get_object(**kwargs)
+        if kwargs.get("Range") == "bytes=4-7":
+            response["Body"].data = response["Body"].data[:-1]
+        return response
+
+    monkeypatch.setattr(fake_s3, "get_object", truncating_get_object)
+
+    with pytest.raises(Exception, match="Short read for bytes 4-7"):
+        reader.read_bytes("s3://bucket/blob.bin")
+
+
+def test_empty_object_is_read_without_a_range(reader, fake_s3):
+    fake_s3.put("empty.txt", b"")
+
+    assert reader.read_bytes("s3://bucket/empty.txt")[0] == b""
+    assert _ranges(fake_s3) == ["bytes=0-3", None]
+
+
+def test_without_part_size_the_object_is_one_get(moose_config, fake_s3):
+    reader = S3FileReader(config_path=moose_config, part_size=None)
+    reader.s3_client = fake_s3
+    fake_s3.put("blob.bin", b"0123456789")
+
+    assert reader.read_bytes("s3://bucket/blob.bin")[0] == b"0123456789"
+    assert _ranges(fake_s3) == [None]
+
+
+def test_close_releases_the_range_pool_and_keeps_the_reader_usable(reader, fake_s3):
+    fake_s3.put("blob.bin", b"0123456789")
+    reader.read_bytes("s3://bucket/blob.bin")
+    assert reader._range_executor is not None
+
+    reader.close()
+    assert reader._range_executor is None
+    assert bytes(reader.read_bytes("s3://bucket/blob.bin")[0]) == b"0123456789"
+
+
+def test_cached_body_is_revalidated_by_etag(moose_config, fake_s3, tmp_path):
+    reader = S3FileReader(config_path=moose_config, cache=ContentCache(str(tmp_path / "cache")), part_size=None)
+    reader.s3_client = fake_s3
+    fake_s3.put("a.txt", b"v1")
+    v1 = fake_s3.etag("a.txt")
+
+    reader.read_bytes("s3://bucket/a.txt")
+    # A matching listed ETag needs no request, an unknown one a conditional GET
+    assert reader.read_bytes("s3://bucket/a.txt", v1)[0] == b"v1"
+    assert reader.read_bytes("s3://bucket/a.txt")[0] == b"v1"
+    fake_s3.put("a.txt", b"v2")
+    assert reader.read_bytes("s3://bucket/a.txt")[0] == b"v2"
+
+    assert [request["IfNoneMatch"] for request in fake_s3.requests("get_object")] == [None, v1, v1]
+
+
+def test_if_match_reads_only_the_version_asked_for(reader, fake_s3):
+    fake_s3.put("blob.bin", b"0123456789")
+    v1 = fake_s3.etag("blob.bin")
+
+    assert bytes(reader.read_bytes("s3://bucket/blob.bin", v1, if_match=True)[0]) == b"0123456789"
+    fake_s3.put("blob.bin", b"overwritten")
+    with pytest.raises(ObjectChangedError):
+        reader.read_bytes("s3://bucket/blob.bin", v1, if_match=True)
+    assert fake_s3.requests("get_object")[0]["IfMatch"] == v1
+
+
+def test_download_to_streams_the_object(moose_config, fake_s3, monkeypatch):
+    monkeypatch.setattr("connectors.s3_file_reader.STREAM_CHUNK_SIZE", 3)
+    reader = S3FileReader(config_path=moose_config)
+    reader.s3_client = fake_s3
+    fake_s3.put("blob.bin", b"0123456789")
+    v1 = fake_s3.etag("blob.bin")
+    file = io.BytesIO()
+
+    assert reader.download_to("s3://bucket/blob.bin", file, v1, if_match=True) == v1
+    assert file.getvalue() == b"0123456789"
+    fake_s3.put("blob.bin", b"overwritten")
+    with pytest.raises(ObjectChangedError):
+        reader.download_to("s3://bucket/blob.bin", io.BytesIO(), v1, if_match=True)
+
+
+def test_download_to_copies_a_matching_cached_body(moose_config, fake_s3, tmp_path):
+    reader = S3FileReader(config_path=moose_config, cache=ContentCache(str(tmp_path / "cache")), part_size=None)
+    reader.s3_client = fake_s3
+    fake_s3.put("a.bin", b"v1")
+    v1 = fake_s3.etag("a.bin")
+    reader.read_bytes("s3://bucket/a.bin")
+    file = io.BytesIO()
+
+    reader.download_to("s3://bucket/a.bin", file, v1, if_match=True)
+
+    assert file.getvalue() == b"v1"
+    assert len(fake_s3.requests("get_object")) == 1
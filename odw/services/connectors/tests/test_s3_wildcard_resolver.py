@@ -0,0 +1,148 @@
+import pytest
+
+from connectors.listing_index import ListingIndex
+from connectors.s3_wildcard_resolver import S3WildcardResolver, _PrefixTrie
+
+KEYS = [
+    "a.txt",
+    "b.csv",
+    "reports/2024-01/summary.txt",
+    "reports/2024-01/data.csv",
+    "reports/2024-02/summary.txt",
+    "reports/2025-01/summary.txt",
+    "reports/archive/old/summary.txt",
+    "logs/app/1.log",
+    "logs/app/nested/2.log",
+    "logs/web/3.log",
+]
+
+PATTERNS = [
+    "s3://bucket/*.txt",
+    "s3://bucket/reports/2024-01/*.csv",
+    "s3://bucket/reports/2024-*/summary.txt",
+    "s3://bucket/reports/**/summary.txt",
+    "s3://bucket/logs/**",
+    "s3://bucket/logs/a??/*.log",
+    "s3://bucket/b.csv",
+    "s3://bucket/missing.txt",
+]
+
+
+@pytest.fixture
+def resolver(moose_config, fake_s3):
+    for key in KEYS:
+        fake_s3.put(key, key.encode())
+    resolver = S3WildcardResolver(config_path=moose_config)
+    resolver.s3_reader.s3_client = fake_s3
+    return resolver
+
+
+def test_prefix_trie_yields_every_head_the_key_starts_with():
+    trie = _PrefixTrie()
+    trie.add("", "any")
+    trie.add("logs/", "logs")
+    trie.add("logs/app/", "app")
+    trie.add("logs/web/", "web")
+
+    assert list(trie.candidates("logs/app/1.log")) == ["any", "logs", "app"]
+    assert list(trie.candidates("reports/x")) == ["any"]
+    assert list(trie.candidates("log")) == ["any"]
+
+
+def test_resolve_pattern_strategies(resolver):
+    found = {pattern: resolver.resolve_pattern(pattern)["files_found"] for pattern in PATTERNS}
+
+    # Patterns whose wildcards are all in the last segment are matched with fnmatch,
+    # where * also matches "/"; the others are walked segment by segment
+    assert found == {
+        "s3://bucket/*.txt": [
+            "s3://bucket/a.txt",
+            "s3://bucket/reports/2024-01/summary.txt",
+            "s3://bucket/reports/2024-02/summary.txt",
+            "s3://bucket/reports/2025-01/summary.txt",
+            "s3://bucket/reports/archive/old/summary.txt",
+        ],
+        "s3://bucket/reports/2024-01/*.csv": ["s3://bucket/reports/2024-01/data.csv"],
+        "s3://bucket/reports/2024-*/summary.txt": [
+            "s3://bucket/reports/2024-01/summary.txt", "s3://bucket/reports/2024-02/summary.txt"
+        ],
+        "s3://bucket/reports/**/summary.txt": [
+            "s3://bucket/reports/2024-01/summary.txt",
+            "s3://bucket/reports/2024-02/summary.txt",
+            "s3://bucket/reports/2025-01/summary.txt",
+            "s3://bucket/reports/archive/old/summary.txt",
+        ],
+        "s3://bucket/logs/**": [
+            "s3://bucket/logs/app/1.log", "s3://bucket/logs/app/nested/2.log", "s3://bucket/logs/web/3.log"
+        ],
+        "s3://bucket/logs/a??/*.log": ["s3://bucket/logs/app/1.log", "s3://bucket/logs/app/nested/2.log"],
+        "s3://bucket/b.csv": ["s3://bucket/b.csv"],
+        "s3://bucket/missing.txt": [],
+    }
+
+
+def test_question_mark_matches_a_slash_in_walked_patterns(resolver, fake_s3):
+    for key in ["x/a/b.txt", "x/a-b.txt", "x/y/a-b.txt", "x/d/r/f.txt", "x/dir/f.txt"]:
+        fake_s3.put(key, key.encode())
+
+    # As in _wildcard_to_regex(): * stays within a segment, ? matches any character
+    assert resolver.resolve_pattern("s3://bucket/*/a?b.txt")["files_found"] == [
+        "s3://bucket/x/a-b.txt", "s3://bucket/x/a/b.txt"
+    ]
+    assert resolver.resolve_pattern("s3://bucket/*/d?r/*.txt")["files_found"] == [
+        "s3://bucket/x/d/r/f.txt", "s3://bucket/x/dir/f.txt"
+    ]
+
+
+def test_resolve_patterns_matches_resolve_pattern_from_one_listing(resolver, fake_s3):
+    expected = {pattern: resolver.resolve_pattern(pattern) for pattern in PATTERNS}
+    fake_s3.calls.clear()
+
+    results = resolver.resolve_patterns(PATTERNS)
+
+    assert list(results) == PATTERNS
+    for pattern in PATTERNS:
+        assert results[pattern]["success"]
+        assert results[pattern]["files_found"] == expected[pattern]["files_found"]
+        assert results[pattern]["etags"] == {
+            path: fake_s3.etag(path[len("s3://bucket/"):]) for path in expected[pattern]["files_found"]
+        }
+    # One listing per top-level directory; *.txt lists the bucket as it does alone,
+    # and the literal keys are looked up on their own
+    assert [request["Prefix"] for request in fake_s3.requests("list_objects_v2")] == ["", "reports/", "logs/"]
+    assert [request["Key"] for request in fake_s3.requests("head_object")] == ["b.csv", "missing.txt"]
+
+
+def test_resolve_patterns_lists_under_the_common_head(resolver, fake_s3):
+    resolver.resolve_patterns(["s3://bucket/reports/2024-*/summary.txt", "s3://bucket/reports/**/data.csv"])
+
+    assert [request["Prefix"] for request in fake_s3.requests("list_objects_v2")] == ["reports/"]
+
+
+def test_unrelated_patterns_keep_their_own_pruned_listings(resolver, fake_s3):
+    results = resolver.resolve_patterns(["s3://bucket/reports/2024-*/summary.txt", "s3://bucket/logs/*/1.log"])
+
+    assert results["s3://bucket/reports/2024-*/summary.txt"]["files_found"] == [
+        "s3://bucket/reports/2024-01/summary.txt", "s3://bucket/reports/2024-02/summary.txt"
+    ]
+    assert results["s3://bucket/logs/*/1.log"]["files_found"] == ["s3://bucket/logs/app/1.log"]
+    # Each pattern is walked alone; the bucket is never listed from its root
+    prefixes = [request["Prefix"] for request in fake_s3.requests("list_objects_v2")]
+    assert "" not in prefixes
+    assert set(prefixes) == {"reports/2024-", "reports/2024-01/summary.txt", "reports/2024-02/summary.txt", "logs/", "logs/app/1.log", "logs/web/1.log"}
+
+
+def test_resolve_patterns_reports_invalid_patterns_without_failing_the_rest(resolver):
+    results = resolver.resolve_patterns(["not-a-pattern", "s3://bucket/b.*", "s3://bucket/b.*"])
+
+    assert list(results) == ["not-a-pattern", "s3://bucket/b.*"]
+    assert not results["not-a-pattern"]["success"]
+    assert results["s3://bucket/b.*"]["files_found"] == ["s3://bucket/b.csv"]
+
+
+def test_listing_index_gives_the_same_results(resolver, fake_s3, tmp_path):
+    expected = {pattern: resolver.resolve_pattern(pattern)["files_found"] for pattern in PATTERNS}
+    resolver.listing_index = ListingIndex(str(tmp_path / "index.db"), ttl=3600)
+
+    assert {pattern: resolver.resolve_pattern(pattern)["files_found"] for pattern in PATTERNS} == expected
+    assert {pattern: result["files_found"] for pattern, result in resolver.resolve_patterns(PATTERNS).items()} == expected
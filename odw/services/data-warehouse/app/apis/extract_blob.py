@@ -8,6 +8,14 @@ from typing import Optional
 class ExtractBlobQueryParams(BaseModel):
   batch_size: Optional[int] = 100
   fail_percentage: Optional[int] = 0
+  workers: Optional[int] = 1  # processes used to generate the batch
+  senders: Optional[int] = 4  # concurrent ingest requests
+  stream: Optional[bool] = False  # send each chunk as soon as it is generated, one request at a time
+  experimental_ndjson: Optional[bool] = False  # EXPERIMENTAL, with stream: one chunked NDJSON request (not verified against Moose ingest)
+  adaptive: Optional[bool] = False  # adapt chunk size and senders to ingest latency and backpressure
+  spool: Optional[bool] = False  # write to the local ingest spool and let its drainer send
+  bulk: Optional[bool] = False  # backfill: load Parquet files from MinIO straight into ClickHouse
+  shards: Optional[int] = 1  # split the batch across this many parallel workflow runs
 
 class ExtractBlobResponse(BaseModel):
   status: int
@@ -7,7 +7,7 @@ from typing import Optional
 
 # Extract API models (similar to other extract APIs)
 class ExtractUnstructuredDataQueryParams(BaseModel):
-  source_file_pattern: str = "s3://unstructured-data/*"  # S3 pattern to process
+  source_file_pattern: str = "s3://unstructured-data/*"  # S3 pattern to process; comma-separated patterns share one listing
   processing_instructions: Optional[str] = """Extract the following information from this dental appointment document and return it as JSON with these exact field names:
 
 {
@@ -22,6 +22,8 @@ class ExtractUnstructuredDataQueryParams(BaseModel):
 Return only the JSON object with no additional text or formatting."""
   batch_size: Optional[int] = 100
   fail_percentage: Optional[int] = 0
+  shards: Optional[int] = 1  # split the matching files across this many parallel workflow runs
+  only_new: Optional[bool] = False  # skip files already processed, unchanged, with the same instructions
 
 class ExtractUnstructuredDataResponse(BaseModel):
   success: bool
@@ -37,7 +39,9 @@ def extract_unstructured_data(client, params: ExtractUnstructuredDataQueryParams
   """
   workflow_params = {
     "source_file_pattern": params.source_file_pattern,
-    "processing_instructions": params.processing_instructions
+    "processing_instructions": params.processing_instructions,
+    "shards": params.shards,
+    "only_new": params.only_new
   }
 
   # Log the parameters being passed to the workflow
@@ -1,22 +1,36 @@
 from moose_lib import ConsumptionApi, EgressConfig
 from app.ingest.models import UnstructuredData
+from connectors.binary_payload import BinaryPayload, is_reference, parse_reference
+from connectors.s3_file_reader import get_s3_file_reader
 from pydantic import BaseModel
 from typing import List, Optional
 
 # An API to get a list of UnstructuredData records from the data warehouse.
 # This is used by Stage 2 of the workflow to query staging records for processing.
+# Binary files are staged as [S3_OBJECT] references; pass inline_binary=true to get
+# them back in the inline data URL form ("[PDF_DATA]data:application/pdf;base64,...")
+# staging records held before references were introduced.
 
 # Define the query params
 class GetUnstructuredDataQuery(BaseModel):
     limit: Optional[int] = None
     offset: int = 0
     source_file_path: Optional[str] = None  # Filter by source file path
+    inline_binary: bool = False  # Resolve [S3_OBJECT] references to inline data URLs
 
 # Define the response model
 class GetUnstructuredDataResponse(BaseModel):
     items: List[UnstructuredData] = []
     total: int = 0
 
+def _inline_binary(extracted_data: Optional[str]) -> Optional[str]:
+    """The legacy inline data URL for an [S3_OBJECT] reference; anything else as stored."""
+    if not extracted_data or not is_reference(extracted_data):
+        return extracted_data
+    reference = parse_reference(extracted_data)
+    data, _ = get_s3_file_reader().read_bytes(reference.file_path, reference.etag, if_match=True)
+    return BinaryPayload(data, reference.mime_type, reference.file_path).data_url()
+
 # Define the query function
 def get_unstructured_data(client, params: GetUnstructuredDataQuery) -> GetUnstructuredDataResponse:
     """
@@ -78,6 +92,9 @@ def get_unstructured_data(client, params: GetUnstructuredDataQuery) -> GetUnstru
     
     # Convert results to UnstructuredData objects
     items = [UnstructuredData(**item) for item in result]
+    if params.inline_binary:
+        for item in items:
+            item.extracted_data = _inline_binary(item.extracted_data)
     
     # Return the response with actual total count from database
     return GetUnstructuredDataResponse(
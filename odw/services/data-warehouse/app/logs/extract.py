@@ -1,11 +1,16 @@
 from app.ingest.models import LogSource
-from app.utils.simulator import simulate_failures
+from app.utils.simulator import simulate_failures, simulate_column_failures
+from app.utils.ingest_client import IngestError, get_ingest_client
+from app.utils.ingest_controller import create_adaptive_controller
+from app.utils.ingest_spool import get_ingest_spool
+from app.utils.bulk_loader import BulkLoader
+from app.utils.fan_out import shard_batch, start_shards
 from connectors.connector_factory import ConnectorFactory, ConnectorType
+from connectors.random import RecordType
 from connectors.logs_connector import LogsConnectorConfig
 from moose_lib import Task, TaskConfig, Workflow, WorkflowConfig, cli_log, CliLogData
 from pydantic import BaseModel
 from typing import Optional
-import requests
 import json
 
 # This workflow extracts Logs data and sends it to the ingest API.
@@ -16,29 +21,117 @@ import json
 # When the data lands in ingest, it goes through a stream where it is transformed.
 # See app/ingest/transforms.py for the transformation logic.
 
+# Number of records generated and sent to the ingest API per request
+INGEST_CHUNK_SIZE = 1000
+
 class LogsExtractParams(BaseModel):
     batch_size: Optional[int] = 100
     fail_percentage: Optional[int] = 0
+    workers: Optional[int] = 1  # processes used to generate the batch
+    senders: Optional[int] = 4  # concurrent ingest requests
+    stream: Optional[bool] = False  # send each chunk as soon as it is generated, one request at a time
+    experimental_ndjson: Optional[bool] = False  # EXPERIMENTAL, with stream: one chunked NDJSON request (not verified against Moose ingest)
+    adaptive: Optional[bool] = False  # adapt chunk size and senders to ingest latency and backpressure
+    spool: Optional[bool] = False  # write to the local ingest spool and let its drainer send
+    bulk: Optional[bool] = False  # backfill: load Parquet files from MinIO straight into ClickHouse
+    shards: Optional[int] = 1  # split the batch across this many parallel workflow runs
+    shard_index: Optional[int] = None  # set on the runs started by a fan-out
+    profile: Optional[str] = None  # workload profile shaping the data, e.g. "realistic"
 
 def run_task(input: LogsExtractParams) -> None:
     cli_log(CliLogData(action="LogsWorkflow", message="Running Logs task...", message_type="Info"))
 
+    if input.shards and input.shards > 1 and input.shard_index is None:
+        # Fan out: each shard is a run of this workflow with its share of batch_size,
+        # scheduled in parallel across the Temporal worker pool. This run ends once they
+        # are started; each shard succeeds, retries or fails on its own.
+        fan_out = start_shards("logs-workflow", shard_batch(input))
+        cli_log(CliLogData(
+            action="LogsWorkflow",
+            message=f"Fan-out of {input.batch_size} items started: {fan_out.summary()}",
+            message_type="Info"
+        ))
+        return
+
     # Create a connector to extract data from Logs
     connector = ConnectorFactory[LogSource].create(
         ConnectorType.Logs,
-        LogsConnectorConfig(batch_size=input.batch_size)
+        LogsConnectorConfig(
+            batch_size=input.batch_size,
+            workers=input.workers,
+            profile=input.profile,
+            # Records are only encoded and sent; the ingest API validates them
+            record_type=RecordType.Slotted
+        )
     )
 
-    # Extract data from Logs
-    data = connector.extract()
+    # Extract data from Logs chunk by chunk so memory stays flat regardless of batch_size
+    extracted_count = 0
+    failed_count = 0
+
+    def prepared_chunks():
+        nonlocal extracted_count, failed_count
+        for chunk in connector.extract_iter(chunk_size=INGEST_CHUNK_SIZE):
+            extracted_count += len(chunk)
+            failed_count += simulate_failures(chunk, input.fail_percentage)
+            yield chunk
+
+    def prepared_column_batches():
+        nonlocal extracted_count, failed_count
+        for columns in connector.extract_columns_iter():
+            failed_count += simulate_column_failures(columns, input.fail_percentage)
+            extracted_count += len(columns["id"])
+            yield columns
+
+    ingest_client = get_ingest_client()
+    ingest_result = None
+    if input.bulk:
+        # Backfill path: bypasses the ingest API and Redpanda. Batches are written as
+        # Parquet to the MinIO bucket and loaded with one INSERT ... SELECT FROM s3(),
+        # which applies the transforms from app/ingest/transforms.py in SQL.
+        bulk_result = BulkLoader().load("LogSource", prepared_column_batches())
+        sent_message = f"Bulk loaded {bulk_result.rows} items into Log ({bulk_result.summary()})"
+    elif input.spool:
+        # Chunks are appended to local segment files at generation speed and the
+        # spool's background drainer delivers them, so a slow or restarting ingest
+        # API neither slows this task down nor loses the batch.
+        ingest_spool = get_ingest_spool()
+        spooled_count = sum(ingest_spool.append("LogSource", chunk) for chunk in prepared_chunks())
+        ingest_spool.seal("LogSource")
+        sent_message = f"Spooled {spooled_count} items for the ingest API ({ingest_spool.pending_bytes()} bytes pending delivery)"
+    elif input.stream:
+        # Chunks sent as they are generated; experimental_ndjson makes it one chunked-transfer NDJSON upload
+        ingest_result = ingest_client.send_stream("LogSource", prepared_chunks(), ndjson=bool(input.experimental_ndjson))
+        sent_message = f"Successfully sent {ingest_result.records_sent} items to ingest API ({ingest_result.summary()})"
+    else:
+        # Generation of the next chunk overlaps the sending of earlier ones: this thread
+        # produces chunks onto a bounded queue and `senders` threads post them.
+        # Failed chunks are logged by the client.
+        # With adaptive, chunk size and concurrency start from INGEST_CHUNK_SIZE and `senders`
+        # and then follow the observed latency, overload responses and Redpanda consumer lag.
+        controller = create_adaptive_controller("LogSource", initial_senders=input.senders or 1) if input.adaptive else None
+        try:
+            ingest_result = ingest_client.send_pipelined(
+                "LogSource", prepared_chunks(), senders=input.senders or 1, controller=controller
+            )
+        finally:
+            if controller is not None:
+                # Releases the lag probe's Redpanda clients
+                controller.close()
+        if controller is not None:
+            cli_log(CliLogData(
+                action="LogsWorkflow",
+                message=f"Adaptive ingest finished at {controller.summary()}",
+                message_type="Info"
+            ))
+        sent_message = f"Successfully sent {ingest_result.records_sent} items to ingest API ({ingest_result.summary()})"
 
     cli_log(CliLogData(
         action="LogsWorkflow",
-        message=f"Extracted {len(data)} items",
+        message=f"Extracted {extracted_count} items",
         message_type="Info"
     ))
 
-    failed_count = simulate_failures(data, input.fail_percentage)
     if failed_count > 0:
         cli_log(CliLogData(
             action="LogsWorkflow",
@@ -46,27 +139,20 @@ def run_task(input: LogsExtractParams) -> None:
             message_type="Info"
         ))
 
-    data_dicts = [item.model_dump() for item in data]
-    
-    try:
-        response = requests.post(
-            "http://localhost:4200/ingest/LogSource",
-            json=data_dicts,
-            headers={"Content-Type": "application/json"}
-        )
-        response.raise_for_status()
-        
-        cli_log(CliLogData(
-            action="LogsWorkflow",
-            message=f"Successfully sent {len(data)} items to ingest API",
-            message_type="Info"
-        ))
-    except Exception as e:
+    if ingest_result is not None and ingest_result.records_failed > 0:
         cli_log(CliLogData(
             action="LogsWorkflow",
-            message=f"Failed to send data to ingest API: {str(e)}",
+            message=f"Failed to send {ingest_result.records_failed} of {extracted_count} items to ingest API ({ingest_result.summary()})",
             message_type="Error"
         ))
+        # Fail the task rather than report a partial delivery as a success
+        raise IngestError("LogSource", ingest_result)
+
+    cli_log(CliLogData(
+        action="LogsWorkflow",
+        message=sent_message,
+        message_type="Info"
+    ))
 
 logs_task = Task[LogsExtractParams, None](
     name="logs-task",
@@ -1,14 +1,18 @@
 from app.ingest.models import Medical, UnstructuredData, UnstructuredDataSource
 from app.utils.llm_service import get_llm_service
+from app.utils.ingest_client import get_ingest_client
+from app.utils.fan_out import shard_files, start_shards
 from connectors.connector_factory import ConnectorFactory, ConnectorType
 from connectors.s3_connector import S3ConnectorConfig, S3FileContent
+from connectors.object_manifest import ObjectManifest, manifest_scope
 from moose_lib import Task, TaskConfig, Workflow, WorkflowConfig, cli_log, CliLogData
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from datetime import datetime
 import requests
 import json
 import uuid
+import re
 
 
 def _get_field_value(data: Dict[str, Any], field_names: List[str]) -> str:
@@ -31,10 +35,25 @@ def _get_field_value(data: Dict[str, Any], field_names: List[str]) -> str:
     return ""
 
 
+def _source_patterns(source_file_pattern: str):
+    """
+    The S3 connector pattern(s) for `source_file_pattern`: several comma-separated
+    patterns (e.g. "s3://bucket/*.txt, s3://bucket/scans/**/*.pdf") become a list,
+    resolved together from one listing of the bucket.
+    """
+    # Split only before a scheme, so commas inside a pattern are kept
+    patterns = [p.strip() for p in re.split(r",\s*(?=(?:s3|minio)://)", source_file_pattern) if p.strip()]
+    return patterns if len(patterns) > 1 else source_file_pattern
+
+
+# Files turned into Medical records, by path, ETag and a hash of the processing instructions
+MANIFEST_PATH = "s3_cache/manifest.db"
+
+
 # For more information on workflows, see: https://docs.fiveonefour.com/moose/building/workflows.
 
 class UnstructuredDataExtractParams(BaseModel):
-    source_file_pattern: str  # Required S3 pattern to process
+    source_file_pattern: str  # Required S3 pattern to process; comma-separated for several
     processing_instructions: Optional[str] = """Extract the following information from this dental appointment document and return it as JSON with these exact field names:
 
 {
@@ -47,6 +66,10 @@ class UnstructuredDataExtractParams(BaseModel):
 }
 
 Return only the JSON object with no additional text or formatting."""
+    shards: Optional[int] = 1  # split the matching files across this many parallel workflow runs
+    shard_index: Optional[int] = None  # set on the runs started by a fan-out
+    source_files: Optional[List[str]] = None  # files of this shard, resolved by the fan-out
+    only_new: Optional[bool] = False  # skip files already processed, unchanged, with the same instructions
 
 def create_medical_record_from_extracted_data(source_file_path: str, extracted_data: dict) -> Medical:
     """
@@ -96,10 +119,14 @@ def create_dlq_record(file_path: str, error_message: str) -> UnstructuredDataSou
         processing_instructions=f"Failed: {error_message}"
     )
 
-def stage_1_s3_to_unstructured(input: UnstructuredDataExtractParams) -> List[str]:
+def stage_1_s3_to_unstructured(
+    input: UnstructuredDataExtractParams,
+    staged_files: Optional[Dict[str, Tuple[str, Optional[str]]]] = None
+) -> List[str]:
     """
     Stage 1: Extract files from S3 and create UnstructuredData staging records.
     Each file gets a unique ID that will be shared with the Medical record.
+    If given, `staged_files` is filled with each record ID's file path and ETag.
     """
     cli_log(CliLogData(
         action="UnstructuredDataWorkflow", 
@@ -128,7 +155,15 @@ def stage_1_s3_to_unstructured(input: UnstructuredDataExtractParams) -> List[str
 
     connector = ConnectorFactory[S3FileContent].create(
         ConnectorType.S3,
-        S3ConnectorConfig(s3_pattern=input.source_file_pattern)
+        # Re-runs over the same files revalidate the local copies instead of downloading them again
+        S3ConnectorConfig(
+            s3_pattern=_source_patterns(input.source_file_pattern),
+            files=input.source_files,
+            cache_dir="s3_cache",
+            manifest_path=MANIFEST_PATH,
+            manifest_scope=manifest_scope(input.processing_instructions),
+            only_new=bool(input.only_new)
+        )
     )
 
     cli_log(CliLogData(
@@ -137,123 +172,109 @@ def stage_1_s3_to_unstructured(input: UnstructuredDataExtractParams) -> List[str
         message_type="Info"
     ))
 
-    # Extract files from S3
-    files = connector.extract()
+    # Extract files from S3 chunk by chunk so only one chunk of file bodies is in memory at a time
+    ingest_client = get_ingest_client()
+    created_record_ids = []
+    dlq_records = []
+    files_extracted = 0
+
+    for files in connector.extract_iter():
+        if files_extracted == 0:
+            # Log first few file names for debugging
+            sample_files = [f.file_path for f in files[:5]]
+            cli_log(CliLogData(
+                action="UnstructuredDataWorkflow",
+                message=f"📁 S3 SUCCESS: Found files. Sample: {sample_files}",
+                message_type="Info"
+            ))
+        files_extracted += len(files)
+
+        # Create UnstructuredData staging records and track their IDs
+        unstructured_records = []
+
+        for file_content in files:
+            try:
+                # Generate unique ID that will be shared between UnstructuredData and Medical
+                record_id = f"unstr_{str(uuid.uuid4())}"
+                
+                # Create UnstructuredData staging record
+                unstructured_record = UnstructuredData(
+                    id=record_id,
+                    source_file_path=file_content.file_path,
+                    # Text as read; binary files as a short [S3_OBJECT] reference to the version read, which the LLM service reads the bytes of
+                    extracted_data=file_content.payload().reference() if file_content.is_binary else file_content.content,
+                    processed_at=datetime.now().isoformat(),
+                    processing_instructions=input.processing_instructions,
+                    transform_timestamp=datetime.now().isoformat()
+                )
+                
+                unstructured_records.append(unstructured_record)
+                if staged_files is not None:
+                    staged_files[record_id] = (file_content.file_path, file_content.etag)
+                
+                cli_log(CliLogData(
+                    action="UnstructuredDataWorkflow",
+                    message=f"Staged file for processing: {file_content.file_path} (ID: {record_id})",
+                    message_type="Info"
+                ))
+                
+            except Exception as e:
+                # Create DLQ record for failed file staging
+                dlq_record = create_dlq_record(file_content.file_path, str(e))
+                dlq_records.append(dlq_record)
+                
+                cli_log(CliLogData(
+                    action="UnstructuredDataWorkflow",
+                    message=f"Failed to stage file {file_content.file_path}: {str(e)}",
+                    message_type="Error"
+                ))
+
+        # Send this chunk of UnstructuredData records to ingest API for staging
+        if unstructured_records:
+            result = ingest_client.send("UnstructuredData", unstructured_records)
+            
+            # Track the IDs of the records that were staged for Stage 2; failed chunks are logged by the client
+            for chunk in result.chunks:
+                if chunk.ok:
+                    created_record_ids.extend(
+                        record.id for record in unstructured_records[chunk.offset:chunk.offset + chunk.records]
+                    )
+            
+            if result.records_sent:
+                cli_log(CliLogData(
+                    action="UnstructuredDataWorkflow",
+                    message=f"Successfully staged {result.records_sent} files in UnstructuredData table",
+                    message_type="Info"
+                ))
 
     cli_log(CliLogData(
         action="UnstructuredDataWorkflow",
-        message=f"DEBUG: S3 connector returned {len(files)} files",
+        message=f"DEBUG: S3 connector returned {files_extracted} files",
         message_type="Info"
     ))
 
-    if len(files) == 0:
+    if files_extracted == 0:
         cli_log(CliLogData(
             action="UnstructuredDataWorkflow",
             message=f"⚠️ S3 ISSUE: No files found matching pattern '{input.source_file_pattern}'. Pattern may not match any files.",
             message_type="Warning"
         ))
-    else:
-        # Log first few file names for debugging
-        sample_files = [f.file_path for f in files[:5]]
-        cli_log(CliLogData(
-            action="UnstructuredDataWorkflow",
-            message=f"📁 S3 SUCCESS: Found {len(files)} files. Sample: {sample_files}",
-            message_type="Info"
-        ))
 
     cli_log(CliLogData(
         action="UnstructuredDataWorkflow",
-        message=f"Extracted {len(files)} files from S3",
+        message=f"Extracted {files_extracted} files from S3",
         message_type="Info"
     ))
 
-    # Create UnstructuredData staging records and track their IDs
-    unstructured_records = []
-    created_record_ids = []
-    dlq_records = []
-
-    for file_content in files:
-        try:
-            # Generate unique ID that will be shared between UnstructuredData and Medical
-            record_id = f"unstr_{str(uuid.uuid4())}"
-            
-            # Create UnstructuredData staging record
-            unstructured_record = UnstructuredData(
-                id=record_id,
-                source_file_path=file_content.file_path,
-                extracted_data=file_content.content,  # Store raw file content for LLM processing
-                processed_at=datetime.now().isoformat(),
-                processing_instructions=input.processing_instructions,
-                transform_timestamp=datetime.now().isoformat()
-            )
-            
-            unstructured_records.append(unstructured_record)
-            created_record_ids.append(record_id)  # Track this ID for Stage 2
-            
-            cli_log(CliLogData(
-                action="UnstructuredDataWorkflow",
-                message=f"Staged file for processing: {file_content.file_path} (ID: {record_id})",
-                message_type="Info"
-            ))
-            
-        except Exception as e:
-            # Create DLQ record for failed file staging
-            dlq_record = create_dlq_record(file_content.file_path, str(e))
-            dlq_records.append(dlq_record)
-            
-            cli_log(CliLogData(
-                action="UnstructuredDataWorkflow",
-                message=f"Failed to stage file {file_content.file_path}: {str(e)}",
-                message_type="Error"
-            ))
-
-    # Send UnstructuredData records to ingest API for staging
-    if unstructured_records:
-        unstructured_dicts = [record.model_dump() for record in unstructured_records]
-        
-        try:
-            response = requests.post(
-                "http://localhost:4200/ingest/UnstructuredData",
-                json=unstructured_dicts,
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            
-            cli_log(CliLogData(
-                action="UnstructuredDataWorkflow",
-                message=f"Successfully staged {len(unstructured_records)} files in UnstructuredData table",
-                message_type="Info"
-            ))
-        except Exception as e:
-            cli_log(CliLogData(
-                action="UnstructuredDataWorkflow",
-                message=f"Failed to send UnstructuredData records to ingest API: {str(e)}",
-                message_type="Error"
-            ))
-
     # Send DLQ records to ingest API for error handling
     if dlq_records:
-        dlq_dicts = [record.model_dump() for record in dlq_records]
-        
-        try:
-            response = requests.post(
-                "http://localhost:4200/ingest/UnstructuredDataSource",
-                json=dlq_dicts,
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            
+        result = ingest_client.send("UnstructuredDataSource", dlq_records)
+        if result.records_sent:
             cli_log(CliLogData(
                 action="UnstructuredDataWorkflow",
-                message=f"Successfully sent {len(dlq_records)} failed records to DLQ",
+                message=f"Successfully sent {result.records_sent} failed records to DLQ",
                 message_type="Info"
             ))
-        except Exception as e:
-            cli_log(CliLogData(
-                action="UnstructuredDataWorkflow",
-                message=f"Failed to send DLQ records to ingest API: {str(e)}",
-                message_type="Error"
-            ))
     
     # Return the list of IDs that were created for Stage 2 to process
     cli_log(CliLogData(
@@ -271,7 +292,7 @@ def stage_1_s3_to_unstructured(input: UnstructuredDataExtractParams) -> List[str
     return created_record_ids
 
 
-def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record_ids_to_process: List[str]) -> None:
+def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record_ids_to_process: List[str]) -> List[str]:
     """
     Stage 2: Process specific UnstructuredData records (created by Stage 1) and create Medical records.
     Uses the same ID from UnstructuredData for the Medical record to maintain relationship.
@@ -279,6 +300,9 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
     Args:
         input: Extract parameters
         record_ids_to_process: List of UnstructuredData record IDs to process (from Stage 1)
+        
+    Returns:
+        IDs of the records whose Medical record was sent to the ingest API
     """
     cli_log(CliLogData(
         action="UnstructuredDataWorkflow", 
@@ -298,7 +322,7 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
             message="❌ STAGE 2 ABORT: No records to process - Stage 1 didn't create any UnstructuredData records",
             message_type="Info"
         ))
-        return
+        return []
 
     # Query UnstructuredData table for the specific records we need to process
     # Add retry logic to handle eventual consistency between write and read
@@ -405,10 +429,11 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
             message=f"DEBUG: Available IDs: {[r.get('id') for r in all_records[:10]]}",
             message_type="Info"
         ))
-        return
+        return []
 
     # Process UnstructuredData records with batch LLM processing
     medical_records = []
+    fallback_record_ids = []
     
     cli_log(CliLogData(
         action="UnstructuredDataWorkflow",
@@ -429,7 +454,7 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
             message=f"ERROR: Failed to initialize LLM service: {str(e)}",
             message_type="Error"
         ))
-        return
+        return []
 
     cli_log(CliLogData(
         action="UnstructuredDataWorkflow",
@@ -557,8 +582,10 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
             message_type="Error"
         ))
         
-        # Fallback to individual processing for all records
-        fallback_success_count = 0
+        # Fallback to individual processing for all records; drop anything the failed
+        # batch attempt produced, so no record is sent twice
+        medical_records = []
+        fallback_record_ids = []
         fallback_dlq_records = []
         
         for record in unprocessed_records:
@@ -608,7 +635,7 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
                 )
                 
                 medical_records.append(medical_record)
-                fallback_success_count += 1
+                fallback_record_ids.append(record_id)
                 
                 cli_log(CliLogData(
                     action="UnstructuredDataWorkflow",
@@ -633,57 +660,44 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
         # Log fallback results
         cli_log(CliLogData(
             action="UnstructuredDataWorkflow",
-            message=f"Global fallback processing completed: {fallback_success_count} successes, {len(fallback_dlq_records)} sent to DLQ",
+            message=f"Global fallback processing completed: {len(fallback_record_ids)} successes, {len(fallback_dlq_records)} sent to DLQ",
             message_type="Info"
         ))
         
         # Send DLQ records if any
         if fallback_dlq_records:
-            try:
-                dlq_dicts = [record.model_dump() for record in fallback_dlq_records]
-                response = requests.post(
-                    "http://localhost:4200/ingest/UnstructuredDataSource",
-                    json=dlq_dicts,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                
+            result = get_ingest_client().send("UnstructuredDataSource", fallback_dlq_records)
+            if result.records_sent:
                 cli_log(CliLogData(
                     action="UnstructuredDataWorkflow",
-                    message=f"Successfully sent {len(fallback_dlq_records)} failed records to DLQ",
+                    message=f"Successfully sent {result.records_sent} failed records to DLQ",
                     message_type="Info"
                 ))
-            except Exception as dlq_error:
-                cli_log(CliLogData(
-                    action="UnstructuredDataWorkflow",
-                    message=f"Failed to send DLQ records: {str(dlq_error)}",
-                    message_type="Error"
-                ))
 
 
 
-    # Send Medical records to ingest API
+    # Send Medical records to ingest API; the records of delivered chunks, from the
+    # batch path or the individual fallback alike, are returned to be marked processed
+    processed_record_ids = []
     if medical_records:
-        medical_dicts = [record.model_dump() for record in medical_records]
-        
-        try:
-            response = requests.post(
-                "http://localhost:4200/ingest/Medical",
-                json=medical_dicts,
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            
+        result = get_ingest_client().send("Medical", medical_records)
+        for chunk in result.chunks:
+            if chunk.ok:
+                processed_record_ids.extend(
+                    record.id for record in medical_records[chunk.offset:chunk.offset + chunk.records]
+                )
+        if result.records_sent:
             cli_log(CliLogData(
                 action="UnstructuredDataWorkflow",
-                message=f"Successfully created {len(medical_records)} Medical records from UnstructuredData",
+                message=f"Successfully created {result.records_sent} Medical records from UnstructuredData",
                 message_type="Info"
             ))
-        except Exception as e:
+        if fallback_record_ids:
+            delivered = set(processed_record_ids)
             cli_log(CliLogData(
                 action="UnstructuredDataWorkflow",
-                message=f"Failed to send Medical records to ingest API: {str(e)}",
-                message_type="Error"
+                message=f"{sum(record_id in delivered for record_id in fallback_record_ids)} of {len(fallback_record_ids)} records from the individual fallback delivered",
+                message_type="Info"
             ))
     else:
         cli_log(CliLogData(
@@ -698,16 +712,51 @@ def stage_2_unstructured_to_medical(input: UnstructuredDataExtractParams, record
         message_type="Info"
     ))
 
+    return processed_record_ids
+
 def run_task(input: UnstructuredDataExtractParams) -> None:
     cli_log(CliLogData(action="UnstructuredDataWorkflow", message="Running UnstructuredData task...", message_type="Info"))
 
+    if input.shards and input.shards > 1 and input.shard_index is None:
+        # Fan out: resolve the pattern once, then run both stages for each share of the
+        # files as a parallel run of this workflow on the Temporal worker pool. Each
+        # shard records its own files in the manifest once they are processed.
+        connector = ConnectorFactory[S3FileContent].create(
+            ConnectorType.S3,
+            S3ConnectorConfig(
+                s3_pattern=_source_patterns(input.source_file_pattern),
+                manifest_path=MANIFEST_PATH,
+                manifest_scope=manifest_scope(input.processing_instructions),
+                only_new=bool(input.only_new)
+            )
+        )
+        files = connector.resolve_files()
+        if not files:
+            cli_log(CliLogData(action="UnstructuredDataWorkflow", message="No files to fan out", message_type="Info"))
+            return
+        fan_out = start_shards("unstructured-data-workflow", shard_files(input, files))
+        cli_log(CliLogData(
+            action="UnstructuredDataWorkflow",
+            message=f"Fan-out of {len(files)} files started: {fan_out.summary()}",
+            message_type="Info"
+        ))
+        return
+
     # Stage 1: Extract files from S3 and create UnstructuredData staging records
     cli_log(CliLogData(action="UnstructuredDataWorkflow", message="🔵 Starting Stage 1: S3 to UnstructuredData", message_type="Info"))
-    record_ids_created = stage_1_s3_to_unstructured(input)
+    staged_files: Dict[str, Tuple[str, Optional[str]]] = {}
+    record_ids_created = stage_1_s3_to_unstructured(input, staged_files)
     
     # Stage 2: Process UnstructuredData records to create Medical records using LLM
     cli_log(CliLogData(action="UnstructuredDataWorkflow", message="🟢 Starting Stage 2: UnstructuredData to Medical", message_type="Info"))
-    stage_2_unstructured_to_medical(input, record_ids_created)
+    processed_record_ids = stage_2_unstructured_to_medical(input, record_ids_created)
+    
+    # Record the files that became Medical records, so only_new runs skip them while unchanged
+    marked = ObjectManifest(MANIFEST_PATH).mark_processed(
+        (staged_files[record_id] for record_id in processed_record_ids if record_id in staged_files),
+        manifest_scope(input.processing_instructions)
+    )
+    cli_log(CliLogData(action="UnstructuredDataWorkflow", message=f"Marked {marked} files as processed", message_type="Info"))
     
     cli_log(CliLogData(action="UnstructuredDataWorkflow", message="✅ Completed both stages of UnstructuredData workflow", message_type="Info"))
 
@@ -0,0 +1,212 @@
+from connectors.random import ColumnBatch, column_batch_size
+from connectors.moose_config import load_moose_config
+from moose_lib import cli_log, CliLogData
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+import time
+import uuid
+import io
+
+# Bulk-load path for backfills of Blob, Log and Event rows.
+#
+# Instead of sending every row through the ingest API, Redpanda and the stream
+# transforms, column batches are written as Parquet files to the MinIO/S3 bucket
+# from `s3_config` in moose.config.toml, and ClickHouse loads them in one
+# INSERT INTO <table> SELECT ... FROM s3(...). The SELECT applies the same
+# changes as app/ingest/transforms.py: the stream transform sends rows marked
+# "[DLQ]" to the dead letter queue and the recovery transform re-inserts them
+# with the marker replaced by "[RECOVERED]", so every row lands in the table with
+# the marker rewritten and a transform_timestamp added.
+#
+# pyarrow, clickhouse-connect and the S3 stack (boto3) are imported on first use,
+# so workflows that never bulk load neither need nor load them.
+
+def _recovered(column: str) -> str:
+    """SQL for the DLQ round trip: "[DLQ]x" becomes "[RECOVERED]x", anything else is kept."""
+    return f"if(startsWith({column}, '[DLQ]'), concat('[RECOVERED]', substring({column}, 6)), {column})"
+
+# Source model -> (target table, target column -> SELECT expression over the Parquet columns)
+BULK_LOADS: Dict[str, Tuple[str, Dict[str, str]]] = {
+    "BlobSource": ("Blob", {
+        "id": "id",
+        "bucket_name": "bucket_name",
+        "file_path": "file_path",
+        "file_name": _recovered("file_name"),
+        "file_size": "file_size",
+        "permissions": "permissions",
+        "content_type": "content_type",
+        "ingested_at": "ingested_at",
+        "transform_timestamp": "%(transform_timestamp)s",
+    }),
+    "LogSource": ("Log", {
+        "id": "id",
+        "timestamp": "timestamp",
+        "level": "level",
+        "message": _recovered("message"),
+        "source": "source",
+        "trace_id": "trace_id",
+        "transform_timestamp": "%(transform_timestamp)s",
+    }),
+    "EventSource": ("Event", {
+        "id": "id",
+        "event_name": "event_name",
+        "timestamp": "timestamp",
+        "distinct_id": _recovered("distinct_id"),
+        "session_id": "session_id",
+        "project_id": "project_id",
+        "properties": "properties",
+        "ip_address": "ip_address",
+        "user_agent": "user_agent",
+        "transform_timestamp": "%(transform_timestamp)s",
+    }),
+}
+
+class BulkLoaderConfig:
+    def __init__(
+        self,
+        config_path: str = "moose.config.toml",
+        prefix: str = "bulk-load",
+        clickhouse_s3_endpoint: Optional[str] = None,
+        compression: str = "zstd",
+        upload_concurrency: int = 4,
+        keep_files: bool = False
+    ):
+        # Moose config providing s3_config and clickhouse_config
+        self.config_path = config_path
+        # Key prefix for the Parquet files; each load writes under <prefix>/<Source>/<run id>/
+        self.prefix = prefix.strip("/")
+        # S3 endpoint as seen from the ClickHouse server, when it differs from s3_config.endpoint_url
+        # (e.g. "http://host.docker.internal:9500" when ClickHouse runs in Docker and MinIO does not)
+        self.clickhouse_s3_endpoint = clickhouse_s3_endpoint
+        # Parquet compression codec
+        self.compression = compression
+        # Parquet files uploaded concurrently while the next batch is generated
+        self.upload_concurrency = upload_concurrency
+        # Leave the Parquet files in the bucket after a successful load
+        self.keep_files = keep_files
+
+@dataclass
+class BulkLoadResult:
+    """Outcome of one bulk load."""
+    rows: int = 0
+    files: int = 0
+    bytes: int = 0             # Parquet bytes uploaded
+    write_seconds: float = 0.0  # generating, encoding and uploading the files
+    load_seconds: float = 0.0   # the INSERT ... SELECT in ClickHouse
+
+    def summary(self) -> str:
+        return (
+            f"{self.files} Parquet files, {self.bytes} bytes, "
+            f"written in {self.write_seconds:.1f}s, loaded in {self.load_seconds:.1f}s"
+        )
+
+def columns_to_parquet(columns: ColumnBatch, compression: str = "zstd") -> bytes:
+    """Encode a column batch as a Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.table({name: pa.array(column) for name, column in columns.items()})
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression=compression)
+    return buffer.getvalue()
+
+class BulkLoader:
+    def __init__(self, config: Optional[BulkLoaderConfig] = None):
+        self.config = config or BulkLoaderConfig()
+        moose_config = load_moose_config(self.config.config_path)
+        self.clickhouse_config = moose_config.get("clickhouse_config", {})
+        from connectors.s3_file_reader import S3FileReader
+
+        self.s3_reader = S3FileReader(self.config.config_path, max_pool_connections=max(10, self.config.upload_concurrency))
+        self.s3_config = self.s3_reader.config
+        self.bucket = self.s3_config["bucket_name"]
+
+    def load(self, source: str, batches: Iterable[ColumnBatch]) -> BulkLoadResult:
+        """Write `batches` of `source` columns as Parquet files, then load them into the source's table."""
+        if source not in BULK_LOADS:
+            raise ValueError(f"Bulk load not supported for {source}. Supported: {list(BULK_LOADS)}")
+
+        prefix = f"{self.config.prefix}/{source}/{uuid.uuid4().hex}"
+        result = BulkLoadResult()
+        keys: List[str] = []
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.config.upload_concurrency) as pool:
+            pending: Deque[Future] = deque()
+            for batch in batches:
+                body = columns_to_parquet(batch, self.config.compression)
+                key = f"{prefix}/part-{len(keys):05d}.parquet"
+                keys.append(key)
+                result.rows += column_batch_size(batch)
+                result.bytes += len(body)
+                pending.append(pool.submit(self.s3_reader.s3_client.put_object, Bucket=self.bucket, Key=key, Body=body))
+                # Bound the encoded files held in memory while uploads catch up
+                while len(pending) > self.config.upload_concurrency:
+                    pending.popleft().result()
+            for future in pending:
+                future.result()
+        result.files = len(keys)
+        result.write_seconds = time.perf_counter() - start
+
+        if not keys:
+            return result
+
+        start = time.perf_counter()
+        try:
+            self._insert_select(source, f"{prefix}/*.parquet")
+        finally:
+            if not self.config.keep_files:
+                self._delete(keys)
+        result.load_seconds = time.perf_counter() - start
+
+        cli_log(CliLogData(
+            action="BulkLoader",
+            message=f"Bulk loaded {result.rows} {source} rows into {BULK_LOADS[source][0]} ({result.summary()})",
+            message_type="Info"
+        ))
+        return result
+
+    def _s3_url(self, key: str) -> str:
+        endpoint = self.config.clickhouse_s3_endpoint or self.s3_config.get("endpoint_url")
+        if endpoint:
+            return f"{endpoint.rstrip('/')}/{self.bucket}/{key}"
+        return f"https://{self.bucket}.s3.{self.s3_config['region_name']}.amazonaws.com/{key}"
+
+    def _insert_select(self, source: str, key_pattern: str) -> None:
+        import clickhouse_connect
+
+        table, select = BULK_LOADS[source]
+        query = (
+            f"INSERT INTO `{table}` ({', '.join(select)}) "
+            f"SELECT {', '.join(select.values())} "
+            "FROM s3(%(url)s, %(access_key_id)s, %(secret_access_key)s, 'Parquet')"
+        )
+        client = clickhouse_connect.get_client(
+            host=self.clickhouse_config.get("host", "localhost"),
+            port=self.clickhouse_config.get("host_port", 18123),
+            username=self.clickhouse_config.get("user", "default"),
+            password=self.clickhouse_config.get("password", ""),
+            database=self.clickhouse_config.get("db_name", "default"),
+            secure=self.clickhouse_config.get("use_ssl", False)
+        )
+        try:
+            client.command(query, parameters={
+                "url": self._s3_url(key_pattern),
+                "access_key_id": self.s3_config["access_key_id"],
+                "secret_access_key": self.s3_config["secret_access_key"],
+                # Same format as the stream transforms' datetime.now().isoformat()
+                "transform_timestamp": datetime.now().isoformat(),
+            })
+        finally:
+            client.close()
+
+    def _delete(self, keys: List[str]) -> None:
+        # delete_objects takes at most 1000 keys per request
+        for i in range(0, len(keys), 1000):
+            self.s3_reader.s3_client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[i:i + 1000]], "Quiet": True}
+            )
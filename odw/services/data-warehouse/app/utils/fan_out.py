@@ -0,0 +1,110 @@
+from moose_lib import cli_log, CliLogData
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pydantic import BaseModel
+from connectors.moose_config import load_moose_config
+from typing import Any, Dict, List, Sequence, TypeVar
+import asyncio
+
+# Fan-out for the extract workflows.
+#
+# A fan-out starts one run of the same workflow per shard with moose_lib's public
+# WorkflowClient.execute(), the call behind client.workflow.execute() in the
+# extract APIs, so the Temporal workflow type, task queue, arguments, retry policy
+# and timeout are whatever the installed Moose uses (moose-lib is pinned in
+# requirements.txt). Temporal schedules the shards on every worker polling the
+# queue, on any node.
+#
+# The parent does not wait for its shards: it returns once they are started, so
+# it never holds a worker slot the shards need, however small the pool. Each
+# shard is an ordinary run with its own retries and failures, tracked in
+# Temporal like any other run.
+
+P = TypeVar("P", bound=BaseModel)
+
+class FanOutError(Exception):
+    """Raised when shards of a fan-out could not be started; `result` has every shard's outcome."""
+
+    def __init__(self, result: "FanOutResult"):
+        super().__init__(result.summary())
+        self.result = result
+
+@dataclass
+class FanOutResult:
+    """Outcome of a fan-out: the label of each shard and the error of each shard that failed to start."""
+    shards: List[str] = field(default_factory=list)
+    failures: Dict[str, str] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        started = len(self.shards) - len(self.failures)
+        failed = "".join(f"; {shard} failed to start: {error}" for shard, error in self.failures.items())
+        return f"{started}/{len(self.shards)} shards started{failed}"
+
+def split_evenly(total: int, shards: int) -> List[int]:
+    """Split `total` into at most `shards` non-empty parts whose sizes differ by at most one."""
+    base, extra = divmod(total, max(1, shards))
+    sizes = [base + 1 if i < extra else base for i in range(max(1, shards))]
+    return [size for size in sizes if size > 0]
+
+def shard_batch(input: P) -> List[P]:
+    """Params for each shard of a synthetic extract: batch_size split across `shards` runs."""
+    return [
+        input.model_copy(update={"batch_size": size, "shards": 1, "shard_index": index})
+        for index, size in enumerate(split_evenly(input.batch_size or 0, input.shards))
+    ]
+
+def shard_files(input: P, files: Sequence[str]) -> List[P]:
+    """Params for each shard of a file extract: the resolved files split across `shards` runs."""
+    shards, start = [], 0
+    for index, size in enumerate(split_evenly(len(files), input.shards)):
+        shards.append(input.model_copy(update={
+            "source_files": list(files[start:start + size]), "shards": 1, "shard_index": index
+        }))
+        start += size
+    return shards
+
+def _temporal_address(config_path: str = "moose.config.toml") -> str:
+    try:
+        temporal_config: Dict[str, Any] = load_moose_config(config_path).get("temporal_config", {})
+    except FileNotFoundError:
+        temporal_config = {}
+    return f"{temporal_config.get('temporal_host', 'localhost')}:{temporal_config.get('temporal_port', 7233)}"
+
+async def _connect(address: str):
+    from temporalio.client import Client
+
+    return await Client.connect(address, namespace="default")
+
+def start_shards(workflow_name: str, shard_inputs: List[BaseModel]) -> FanOutResult:
+    """
+    Start a run of `workflow_name` for each shard's params and return without
+    waiting for them. Raises FanOutError if any shard could not be started, after
+    trying every shard, so the parent workflow fails (a retry of the parent starts
+    its shards again).
+    """
+    from moose_lib.main import WorkflowClient
+
+    cli_log(CliLogData(
+        action="FanOut",
+        message=f"Starting {len(shard_inputs)} shards of {workflow_name}",
+        message_type="Info"
+    ))
+    result = FanOutResult()
+    # On a fresh thread, so the event loops WorkflowClient runs work whether or not the task runs inside one
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        workflow_client = WorkflowClient(executor.submit(asyncio.run, _connect(_temporal_address())).result())
+        for index, shard_input in enumerate(shard_inputs):
+            shard = f"{workflow_name} shard {index}"
+            result.shards.append(shard)
+            response = executor.submit(workflow_client.execute, workflow_name, shard_input).result()
+            if response.get("status") != 200:
+                result.failures[shard] = str(response.get("body"))
+
+    if result.failures:
+        cli_log(CliLogData(
+            action="FanOut",
+            message=f"Fan-out of {workflow_name} failed: {result.summary()}",
+            message_type="Error"
+        ))
+        raise FanOutError(result)
+    return result
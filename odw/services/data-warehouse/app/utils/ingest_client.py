@@ -0,0 +1,379 @@
+from connectors.serialization import JsonFormat, encode_record, encode_records
+from moose_lib import cli_log, CliLogData
+from dataclasses import dataclass, field
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, List, Optional, Tuple
+import requests
+import threading
+import queue
+import time
+import gzip
+import zlib
+
+if TYPE_CHECKING:
+    from app.utils.ingest_controller import AdaptiveController
+
+# Shared client for sending records to the Moose ingest API (/ingest/<Model>).
+# Keeps a pool of keep-alive connections, splits payloads into bounded chunks,
+# optionally compresses request bodies, and retries 429/5xx responses and
+# connection errors with exponential backoff (honouring Retry-After).
+
+# Queue marker telling a sender thread to exit
+_STOP = object()
+
+# Most concurrent senders of one pipelined send, and the default connection pool size to match
+DEFAULT_MAX_SENDERS = 16
+
+class IngestClientConfig:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:4200/ingest",
+        max_chunk_records: int = 1000,
+        max_chunk_bytes: int = 5 * 1024 * 1024,
+        compression: Optional[str] = None,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        pool_size: int = DEFAULT_MAX_SENDERS,
+        timeout: float = 30.0
+    ):
+        self.base_url = base_url.rstrip("/")
+        # A chunk is closed when either limit is reached (a single oversized record is sent alone)
+        self.max_chunk_records = max_chunk_records
+        self.max_chunk_bytes = max_chunk_bytes
+        # Request body compression: None, "gzip" or "zstd"
+        self.compression = compression
+        # Retries on 429, 5xx and connection errors, sleeping backoff_factor * 2^n between attempts
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        # Keep-alive connections kept open per host; send_pipelined() grows the pool to its sender count
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+@dataclass
+class ChunkMetrics:
+    """Timing and outcome of one ingest request."""
+    offset: int            # position of the chunk's first record in the records passed to send()
+    records: int
+    bytes: int             # uncompressed JSON size
+    wire_bytes: int        # size on the wire after compression
+    seconds: float         # wall time including retries
+    attempts: int
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class IngestError(Exception):
+    """Raised when records could not be delivered to the ingest API; `result` has every chunk's outcome."""
+
+    def __init__(self, endpoint: str, result: "IngestResult"):
+        super().__init__(f"Failed to send {result.records_failed} records to {endpoint} ({result.summary()})")
+        self.endpoint = endpoint
+        self.result = result
+
+@dataclass
+class IngestResult:
+    """Outcome of a send() call, with per-chunk metrics."""
+    records_sent: int = 0
+    records_failed: int = 0
+    chunks: List[ChunkMetrics] = field(default_factory=list)
+
+    def extend(self, other: "IngestResult") -> None:
+        """Fold another result into this one, e.g. to total a workflow's sends."""
+        self.records_sent += other.records_sent
+        self.records_failed += other.records_failed
+        self.chunks.extend(other.chunks)
+
+    def summary(self) -> str:
+        if not self.chunks:
+            return "no requests"
+        seconds = sorted(chunk.seconds for chunk in self.chunks)
+        return (
+            f"{len(self.chunks)} chunks, {self.records_failed} records failed, "
+            f"{sum(chunk.wire_bytes for chunk in self.chunks)} bytes sent, "
+            f"chunk latency p50 {seconds[len(seconds) // 2] * 1000:.0f}ms / max {seconds[-1] * 1000:.0f}ms"
+        )
+
+def _compressor(compression: Optional[str]):
+    if compression is None:
+        return None
+    if compression == "gzip":
+        # Level 1: most of the size reduction for a fraction of the CPU of the default level
+        return lambda body: gzip.compress(body, compresslevel=1)
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compress
+    raise ValueError(f"Unsupported compression: {compression}. Expected None, 'gzip' or 'zstd'")
+
+def _stream_compressor(compression: Optional[str]):
+    """Incremental counterpart of _compressor for streamed bodies: an object with compress() and flush()."""
+    if compression is None:
+        return None
+    if compression == "gzip":
+        return zlib.compressobj(1, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    raise ValueError(f"Unsupported compression: {compression}. Expected None, 'gzip' or 'zstd'")
+
+class IngestClient:
+    def __init__(self, config: Optional[IngestClientConfig] = None):
+        self.config = config or IngestClientConfig()
+        self._compress = _compressor(self.config.compression)
+
+        retry = Retry(
+            total=self.config.retries,
+            backoff_factor=self.config.backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False
+        )
+        self._retry = retry
+        self._pool_lock = threading.Lock()
+        self.pool_size = 0
+        self.session = requests.Session()
+        # A streamed body is a one-shot generator that cannot be replayed, so
+        # streaming uploads go through a pool without retries
+        self.stream_session = requests.Session()
+        self.ensure_pool_size(self.config.pool_size)
+
+        self.headers = {"Content-Type": "application/json"}
+        if self.config.compression:
+            self.headers["Content-Encoding"] = self.config.compression
+
+    def ensure_pool_size(self, connections: int) -> None:
+        """
+        Keep at least `connections` pooled connections per host, so that many concurrent
+        requests neither wait for nor discard connections. A larger pool replaces the
+        current adapters; their idle connections are closed when they are released.
+        """
+        with self._pool_lock:
+            if connections <= self.pool_size:
+                return
+            adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections, max_retries=self._retry)
+            stream_adapter = HTTPAdapter(pool_connections=connections, pool_maxsize=connections, max_retries=0)
+            for prefix in ("http://", "https://"):
+                self.session.mount(prefix, adapter)
+                self.stream_session.mount(prefix, stream_adapter)
+            self.pool_size = connections
+
+    def send(self, endpoint: str, records: Iterable[Any], max_chunk_records: Optional[int] = None) -> IngestResult:
+        """
+        Send records (Pydantic models, slotted records or dicts) to /ingest/<endpoint>
+        in chunks bounded by max_chunk_records (default from the config) and
+        max_chunk_bytes. A failed chunk is logged and counted, and the remaining
+        chunks are still sent.
+        """
+        result = IngestResult()
+        for offset, count, body in self._chunks(records, max_chunk_records or self.config.max_chunk_records):
+            metrics = self._post(endpoint, offset, count, body)
+            result.chunks.append(metrics)
+            if metrics.ok:
+                result.records_sent += count
+            else:
+                result.records_failed += count
+                cli_log(CliLogData(
+                    action="IngestClient",
+                    message=f"Failed to send {count} records to {endpoint} after {metrics.attempts} attempts: {metrics.error}",
+                    message_type="Error"
+                ))
+
+        return result
+
+    def send_encoded(self, endpoint: str, body: bytes, records: int) -> ChunkMetrics:
+        """Send one already-encoded JSON array body (e.g. a spooled chunk), with the usual retries."""
+        return self._post(endpoint, 0, records, body)
+
+    def send_pipelined(
+        self,
+        endpoint: str,
+        chunks: Iterable[List[Any]],
+        senders: int = 4,
+        queue_size: Optional[int] = None,
+        controller: Optional["AdaptiveController"] = None
+    ) -> IngestResult:
+        """
+        Send chunks of records while the producer is still generating the next ones.
+        The calling thread iterates `chunks` (e.g. connector.extract_iter()) and puts
+        each chunk on a bounded queue, which `senders` threads drain concurrently.
+        The queue holds at most `queue_size` chunks (default 2 per sender), so a
+        producer that outpaces the ingest API blocks instead of buffering the batch,
+        and wall time approaches max(generate, send) rather than their sum.
+
+        With a controller (see app.utils.ingest_controller), chunks are re-sliced
+        to the controller's current chunk size and sent one request each, and
+        only the controller's current number of senders may have a request in
+        flight; every request's metrics are fed back to adjust both.
+        """
+        work: queue.Queue = queue.Queue(maxsize=queue_size or senders * 2)
+        total = IngestResult()
+        lock = threading.Lock()
+        threads_count = senders
+
+        if controller is not None:
+            chunks = controller.rechunk(chunks)
+            threads_count = controller.config.max_senders
+        # One connection per sender thread, so none of them is discarded when released
+        self.ensure_pool_size(threads_count)
+
+        def send_chunk(chunk: List[Any]) -> IngestResult:
+            if controller is None:
+                return self.send(endpoint, chunk)
+            with controller.slot():
+                result = self.send(endpoint, chunk, max_chunk_records=len(chunk))
+            for metrics in result.chunks:
+                controller.observe(metrics)
+            return result
+
+        def sender() -> None:
+            while True:
+                chunk = work.get()
+                if chunk is _STOP:
+                    return
+                try:
+                    result = send_chunk(chunk)
+                except Exception as e:
+                    # Keep draining: a dead sender would leave the producer blocked on a full queue
+                    result = IngestResult(records_failed=len(chunk))
+                    cli_log(CliLogData(
+                        action="IngestClient",
+                        message=f"Failed to send {len(chunk)} records to {endpoint}: {str(e)}",
+                        message_type="Error"
+                    ))
+                with lock:
+                    total.extend(result)
+
+        threads = [threading.Thread(target=sender, name=f"ingest-sender-{i}", daemon=True) for i in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        try:
+            for chunk in chunks:
+                work.put(chunk)
+        finally:
+            for _ in threads:
+                work.put(_STOP)
+            for thread in threads:
+                thread.join()
+        return total
+
+    def send_stream(self, endpoint: str, chunks: Iterable[List[Any]], ndjson: bool = False) -> IngestResult:
+        """
+        Send chunks of records as they are produced, holding only one chunk in memory.
+
+        By default each chunk is posted as its own JSON array request, one after the
+        other, with the usual retries: the format the ingest API is known to accept.
+
+        With `ndjson` (EXPERIMENTAL: it has not been verified that Moose's
+        /ingest/<Model> endpoints accept newline-delimited JSON), the chunks are
+        uploaded as one NDJSON request with chunked transfer encoding instead. The
+        body is generated while the request is in flight, so the server can start
+        ingesting before the last record is produced. Such a stream is not retried;
+        if the request fails, every record fed into it is counted as failed.
+        """
+        if not ndjson:
+            result = IngestResult()
+            for chunk in chunks:
+                result.extend(self.send(endpoint, chunk))
+            return result
+        return self._send_ndjson_stream(endpoint, chunks)
+
+    def _send_ndjson_stream(self, endpoint: str, chunks: Iterable[List[Any]]) -> IngestResult:
+        metrics = ChunkMetrics(offset=0, records=0, bytes=0, wire_bytes=0, seconds=0.0, attempts=1)
+        compressor = _stream_compressor(self.config.compression)
+
+        def body() -> Iterator[bytes]:
+            for chunk in chunks:
+                lines = encode_records(chunk, JsonFormat.Lines)
+                metrics.records += len(chunk)
+                metrics.bytes += len(lines)
+                data = compressor.compress(lines) if compressor else lines
+                if data:
+                    metrics.wire_bytes += len(data)
+                    yield data
+            if compressor:
+                data = compressor.flush()
+                metrics.wire_bytes += len(data)
+                yield data
+
+        headers = dict(self.headers, **{"Content-Type": "application/x-ndjson"})
+        start = time.perf_counter()
+        try:
+            response = self.stream_session.post(
+                f"{self.config.base_url}/{endpoint}",
+                data=body(),
+                headers=headers,
+                timeout=self.config.timeout
+            )
+            metrics.status = response.status_code
+            response.raise_for_status()
+        except requests.RequestException as e:
+            metrics.error = str(e)
+        metrics.seconds = time.perf_counter() - start
+
+        result = IngestResult(chunks=[metrics])
+        if metrics.ok:
+            result.records_sent = metrics.records
+        else:
+            result.records_failed = metrics.records
+            cli_log(CliLogData(
+                action="IngestClient",
+                message=f"Failed to stream {metrics.records} records to {endpoint}: {metrics.error}",
+                message_type="Error"
+            ))
+        return result
+
+    def _chunks(self, records: Iterable[Any], max_chunk_records: int) -> Iterator[Tuple[int, int, bytes]]:
+        """Yield (offset, record count, JSON array body) for each chunk."""
+        offset = 0
+        encoded: List[bytes] = []
+        size = 2  # the enclosing brackets
+
+        for record in records:
+            row = encode_record(record)
+            if encoded and (len(encoded) >= max_chunk_records
+                            or size + len(row) + 1 > self.config.max_chunk_bytes):
+                yield offset, len(encoded), b"[" + b",".join(encoded) + b"]"
+                offset += len(encoded)
+                encoded, size = [], 2
+            encoded.append(row)
+            size += len(row) + 1
+
+        if encoded:
+            yield offset, len(encoded), b"[" + b",".join(encoded) + b"]"
+
+    def _post(self, endpoint: str, offset: int, count: int, body: bytes) -> ChunkMetrics:
+        data = self._compress(body) if self._compress else body
+        metrics = ChunkMetrics(offset=offset, records=count, bytes=len(body), wire_bytes=len(data), seconds=0.0, attempts=1)
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                f"{self.config.base_url}/{endpoint}",
+                data=data,
+                headers=self.headers,
+                timeout=self.config.timeout
+            )
+            metrics.status = response.status_code
+            retries = getattr(response.raw, "retries", None)
+            metrics.attempts = len(retries.history) + 1 if retries else 1
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if metrics.status is None:
+                metrics.attempts = self.config.retries + 1
+            metrics.error = str(e)
+        metrics.seconds = time.perf_counter() - start
+        return metrics
+
+_ingest_client_lock = threading.Lock()
+_ingest_client_instance = None
+
+def get_ingest_client() -> IngestClient:
+    """Get the shared ingest client, so workflows in a worker reuse one connection pool."""
+    global _ingest_client_instance
+    # Tasks run concurrently in a worker: without the lock two of them could each build a client
+    with _ingest_client_lock:
+        if _ingest_client_instance is None:
+            _ingest_client_instance = IngestClient()
+        return _ingest_client_instance
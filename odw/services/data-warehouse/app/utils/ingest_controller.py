@@ -0,0 +1,237 @@
+from app.utils.ingest_client import ChunkMetrics, DEFAULT_MAX_SENDERS
+from connectors.moose_config import load_moose_config
+from moose_lib import cli_log, CliLogData
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, List, Optional
+import threading
+import time
+
+# Adaptive chunk sizing and concurrency for IngestClient.send_pipelined().
+#
+# The controller follows AIMD (additive increase, multiplicative decrease), as TCP
+# congestion control does: every healthy response grows the chunk size by a fixed
+# step and, once per round of `senders` chunks, adds a sender. Backpressure
+# (BACKOFF_STATUSES, retried requests, connection errors, or Redpanda consumer lag
+# over the limit) halves both; a slow response or a 413 halves only the chunk size.
+# Any other failed chunk (e.g. a 400 for its records) neither grows nor shrinks
+# anything. Decreases are rate-limited to one per cooldown, so the responses
+# already in flight when the ingest service slows down count as a single
+# congestion event.
+
+# Responses meaning the ingest service is overloaded or unavailable: halve both
+BACKOFF_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# Responses meaning the request was too large: halve only the chunk size
+SHRINK_STATUSES = frozenset({413})
+
+class AdaptiveIngestConfig:
+    def __init__(
+        self,
+        initial_chunk_records: int = 1000,
+        min_chunk_records: int = 100,
+        max_chunk_records: int = 20000,
+        chunk_increase: int = 250,
+        initial_senders: int = 4,
+        min_senders: int = 1,
+        max_senders: int = DEFAULT_MAX_SENDERS,
+        target_latency: float = 2.0,
+        decrease_factor: float = 0.5,
+        cooldown: float = 2.0,
+        max_lag: int = 100_000,
+        lag_probe_interval: float = 5.0
+    ):
+        # Records per ingest request: start, bounds, and growth per healthy response
+        self.initial_chunk_records = initial_chunk_records
+        self.min_chunk_records = min_chunk_records
+        self.max_chunk_records = max_chunk_records
+        self.chunk_increase = chunk_increase
+        # Concurrent ingest requests: start and bounds (the ingest client's pool is grown to max_senders)
+        self.initial_senders = initial_senders
+        self.min_senders = min_senders
+        self.max_senders = max_senders
+        # Responses slower than this (seconds) shrink the chunk size
+        self.target_latency = target_latency
+        # Multiplier applied on decrease, and minimum seconds between decreases
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        # Consumer lag (messages) on the endpoint's topic treated as backpressure, and how often to check it
+        self.max_lag = max_lag
+        self.lag_probe_interval = lag_probe_interval
+
+class RedpandaLagProbe:
+    """
+    Measures how far the stream consumers behind the ingest API are lagging: the
+    largest total lag of any consumer group on the given topics (ingest topics are
+    named after their data model, e.g. "EventSource"). Topic names are matched
+    exactly, so "EventSource" does not pick up "EventSourceArchive".
+    """
+
+    def __init__(self, bootstrap_servers: str = "localhost:19092", topics: Iterable[str] = ()):
+        self.bootstrap_servers = bootstrap_servers
+        self.topics = frozenset(topics)
+        self._admin = None
+        self._consumer = None
+
+    def lag(self) -> Optional[int]:
+        if self._admin is None:
+            # kafka-python is only imported when lag is actually probed
+            from kafka import KafkaAdminClient, KafkaConsumer
+
+            self._admin = KafkaAdminClient(bootstrap_servers=self.bootstrap_servers)
+            self._consumer = KafkaConsumer(bootstrap_servers=self.bootstrap_servers)
+
+        max_lag = None
+        for group_id, _ in self._admin.list_consumer_groups():
+            offsets = {
+                partition: metadata.offset
+                for partition, metadata in self._admin.list_consumer_group_offsets(group_id).items()
+                if partition.topic in self.topics and metadata.offset >= 0
+            }
+            if not offsets:
+                continue
+            end_offsets = self._consumer.end_offsets(list(offsets))
+            group_lag = sum(max(0, end_offsets[partition] - offset) for partition, offset in offsets.items())
+            max_lag = group_lag if max_lag is None else max(max_lag, group_lag)
+        return max_lag
+
+    def close(self) -> None:
+        if self._admin is not None:
+            self._admin.close()
+            self._consumer.close()
+            self._admin = self._consumer = None
+
+class AdaptiveController:
+    def __init__(self, config: Optional[AdaptiveIngestConfig] = None, lag_probe: Optional[RedpandaLagProbe] = None):
+        self.config = config or AdaptiveIngestConfig()
+        self.lag_probe = lag_probe
+        self.chunk_records = self.config.initial_chunk_records
+        self.senders = self.config.initial_senders
+        self.decreases = 0
+        self.last_lag: Optional[int] = None
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._next_probe = 0.0
+        self._probing = False
+
+    def rechunk(self, chunks: Iterable[List[Any]]) -> Iterator[List[Any]]:
+        """Regroup the producer's chunks into chunks of the current adaptive size."""
+        buffer: List[Any] = []
+        for chunk in chunks:
+            buffer.extend(chunk)
+            while len(buffer) >= self.chunk_records:
+                size = self.chunk_records
+                yield buffer[:size]
+                buffer = buffer[size:]
+        if buffer:
+            yield buffer
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the `senders` request slots, waiting while all are taken."""
+        with self._condition:
+            while self._in_flight >= self.senders:
+                self._condition.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def observe(self, metrics: ChunkMetrics) -> None:
+        """Adjust chunk size and concurrency from one request's outcome."""
+        overloaded = (
+            metrics.status in BACKOFF_STATUSES
+            or metrics.attempts > 1
+            or (not metrics.ok and metrics.status is None)
+            or self._lagging()
+        )
+        too_large = metrics.status in SHRINK_STATUSES or metrics.seconds > self.config.target_latency
+        with self._condition:
+            now = time.monotonic()
+            cooled_down = now - self._last_decrease >= self.config.cooldown
+            if overloaded or too_large:
+                if cooled_down:
+                    self.chunk_records = max(self.config.min_chunk_records, int(self.chunk_records * self.config.decrease_factor))
+                    if overloaded:
+                        self.senders = max(self.config.min_senders, int(self.senders * self.config.decrease_factor))
+                    self._last_decrease = now
+                    self._successes = 0
+                    self.decreases += 1
+                return
+            if not metrics.ok:
+                # Rejected for its records, not for load: no sign that more would be accepted
+                return
+
+            self.chunk_records = min(self.config.max_chunk_records, self.chunk_records + self.config.chunk_increase)
+            self._successes += 1
+            if self._successes >= self.senders and self.senders < self.config.max_senders:
+                self.senders += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def _lagging(self) -> bool:
+        """Probe consumer lag at most once per interval, from whichever sender gets there first."""
+        with self._condition:
+            lag_probe = self.lag_probe
+            if lag_probe is None:
+                return False
+            if self._probing or time.monotonic() < self._next_probe:
+                return self._over_max_lag()
+            self._probing = True
+        lag = None
+        try:
+            lag = lag_probe.lag()
+        except Exception as e:
+            cli_log(CliLogData(
+                action="AdaptiveController",
+                message=f"Redpanda lag probe failed, continuing without lag signals: {str(e)}",
+                message_type="Error"
+            ))
+            self.close()
+        finally:
+            with self._condition:
+                self.last_lag = lag
+                self._probing = False
+                self._next_probe = time.monotonic() + self.config.lag_probe_interval
+        with self._condition:
+            return self._over_max_lag()
+
+    def _over_max_lag(self) -> bool:
+        # Called with self._condition held
+        return self.last_lag is not None and self.last_lag > self.config.max_lag
+
+    def close(self) -> None:
+        """Close the lag probe's Redpanda clients; the controller keeps working without lag signals."""
+        with self._condition:
+            lag_probe, self.lag_probe = self.lag_probe, None
+        if lag_probe is not None:
+            try:
+                lag_probe.close()
+            except Exception as e:
+                cli_log(CliLogData(
+                    action="AdaptiveController",
+                    message=f"Failed to close Redpanda lag probe: {str(e)}",
+                    message_type="Error"
+                ))
+
+    def summary(self) -> str:
+        with self._condition:
+            lag = f", consumer lag {self.last_lag}" if self.last_lag is not None else ""
+            return f"chunk size {self.chunk_records}, {self.senders} senders, {self.decreases} backoffs{lag}"
+
+def _redpanda_broker(config_path: str = "moose.config.toml") -> str:
+    try:
+        return load_moose_config(config_path).get("redpanda_config", {}).get("broker", "localhost:19092")
+    except FileNotFoundError:
+        return "localhost:19092"
+
+def create_adaptive_controller(endpoint: str, initial_senders: int = 4) -> AdaptiveController:
+    """Controller for one workflow run, probing lag on the endpoint's topic via the configured broker."""
+    return AdaptiveController(
+        AdaptiveIngestConfig(initial_senders=initial_senders),
+        lag_probe=RedpandaLagProbe(_redpanda_broker(), topics=[endpoint])
+    )
@@ -0,0 +1,355 @@
+from app.utils.ingest_client import IngestClient, get_ingest_client
+from connectors.serialization import encode_records
+from moose_lib import cli_log, CliLogData
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import threading
+import fcntl
+import json
+import time
+import os
+
+# Local append-only spool between the extract workflows and the ingest API.
+#
+# Workflows append chunks at generation speed; a background drainer ships them to
+# /ingest/<endpoint> in order, so extraction no longer waits on (or loses data to)
+# a slow or restarting ingest API. Layout under the spool directory:
+#
+#   <endpoint>/<time_ns>-<pid>.new     segment being created, empty until its writer holds the lock
+#   <endpoint>/<time_ns>-<pid>.open    segment being written (one per writer, flock-ed by it)
+#   <endpoint>/<time_ns>-<pid>.seg     sealed segment, ready to drain
+#   rejected/<endpoint>.ndjson         chunks the ingest API refused with a 4xx
+#   index.json                         bytes of each sealed segment already delivered
+#   drain.lock                         held by the one process draining the spool
+#
+# Each segment line is one chunk: its record count, a space, and the JSON array
+# body to POST, so draining is a sequential read with no re-serialization. The
+# index is committed after every delivered chunk: a crash between a POST and its
+# commit resends that one chunk (at-least-once). Every writer holds an exclusive
+# flock on its open segment, which the kernel releases when the writer dies; on
+# start and on every scan, the drainer seals the open segments it can lock (left
+# by dead writers), dropping a torn final line, removes new segments it can lock
+# (writers that died before renaming them), and resumes every segment from the
+# index.
+
+OPEN_SUFFIX = ".open"
+SEALED_SUFFIX = ".seg"
+# A new segment's name until its writer holds the lock; one the drainer can lock is an orphan
+NEW_SUFFIX = ".new"
+
+class IngestSpoolConfig:
+    def __init__(
+        self,
+        directory: str = "ingest_spool",
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        poll_interval: float = 1.0,
+        max_backoff: float = 60.0
+    ):
+        # Spool root, relative to the Moose project directory by default
+        self.directory = directory
+        # A writer seals its segment and starts a new one past this size
+        self.segment_max_bytes = segment_max_bytes
+        # Seconds between scans for new sealed segments when the spool is empty
+        self.poll_interval = poll_interval
+        # Upper bound (seconds) of the doubling wait after a failed delivery
+        self.max_backoff = max_backoff
+
+class SpoolWriter:
+    """Appends chunks for one endpoint to this process's open segment."""
+
+    def __init__(self, directory: str, endpoint: str, segment_max_bytes: int):
+        self.directory = os.path.join(directory, endpoint)
+        self.segment_max_bytes = segment_max_bytes
+        self._lock = threading.Lock()
+        self._file = None
+        self._path: Optional[str] = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def append(self, records: int, body: bytes) -> None:
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._file.write(b"%d %s\n" % (records, body))
+            if self._file.tell() >= self.segment_max_bytes:
+                self._seal()
+
+    def seal(self) -> None:
+        """Make everything appended so far visible to the drainer."""
+        with self._lock:
+            if self._file is not None:
+                self._seal()
+
+    def _open(self) -> None:
+        # Lock before the segment gets its .open name: the lock lives as long as this
+        # process keeps the file open, which tells the drainer the writer is alive
+        while True:
+            path = os.path.join(self.directory, f"{time.time_ns():020d}-{os.getpid()}")
+            f = open(path + NEW_SUFFIX, "ab")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                os.rename(path + NEW_SUFFIX, path + OPEN_SUFFIX)
+            except (BlockingIOError, FileNotFoundError):
+                # The drainer took it for an orphan between the open and the lock; start over
+                f.close()
+                continue
+            self._file = f
+            self._path = path + OPEN_SUFFIX
+            return
+
+    def _seal(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        # Rename while still holding the lock, so the drainer cannot seal it first
+        os.rename(self._path, self._path[:-len(OPEN_SUFFIX)] + SEALED_SUFFIX)
+        self._file.close()
+        self._file = self._path = None
+
+class SpoolDrainer:
+    """
+    Ships sealed segments to the ingest API, oldest first within each endpoint,
+    with one thread per endpoint. Only the process holding drain.lock drains.
+    """
+
+    def __init__(self, config: IngestSpoolConfig, ingest_client: IngestClient):
+        self.config = config
+        self.ingest_client = ingest_client
+        self.index_path = os.path.join(config.directory, "index.json")
+        self._index_lock = threading.Lock()
+        self._index: Dict[str, int] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._stop = threading.Event()
+        self._lock_file = None
+
+    def start(self) -> bool:
+        """Recover and start draining; False if another process already drains this spool."""
+        os.makedirs(self.config.directory, exist_ok=True)
+        self._lock_file = open(os.path.join(self.config.directory, "drain.lock"), "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self._index = json.load(f)
+        self._recover_open_segments()
+
+        scanner = threading.Thread(target=self._scan, name="ingest-spool-scanner", daemon=True)
+        scanner.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        for thread in list(self._threads.values()):
+            thread.join()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def pending(self) -> List[Tuple[str, str]]:
+        """(endpoint, segment path) of every sealed segment not yet fully delivered."""
+        segments = []
+        for endpoint in sorted(os.listdir(self.config.directory)):
+            endpoint_dir = os.path.join(self.config.directory, endpoint)
+            if endpoint == "rejected" or not os.path.isdir(endpoint_dir):
+                continue
+            for name in sorted(os.listdir(endpoint_dir)):
+                if name.endswith(SEALED_SUFFIX):
+                    segments.append((endpoint, os.path.join(endpoint_dir, name)))
+        return segments
+
+    def _recover_open_segments(self) -> None:
+        """
+        Seal segments whose writer is gone (no longer holds their lock), truncating a
+        torn last line, and remove new segments whose writer died before renaming them.
+        """
+        for endpoint in os.listdir(self.config.directory):
+            endpoint_dir = os.path.join(self.config.directory, endpoint)
+            if not os.path.isdir(endpoint_dir):
+                continue
+            for name in os.listdir(endpoint_dir):
+                if name.endswith(NEW_SUFFIX):
+                    self._remove_orphaned_segment(endpoint, os.path.join(endpoint_dir, name))
+                    continue
+                if not name.endswith(OPEN_SUFFIX):
+                    continue
+                path = os.path.join(endpoint_dir, name)
+                try:
+                    f = open(path, "r+b")
+                except FileNotFoundError:
+                    # Sealed by its writer since the listing
+                    continue
+                with f:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        # Its writer is still appending
+                        continue
+                    if not os.path.exists(path):
+                        # Sealed by its writer between the open and the lock
+                        continue
+                    data = f.read()
+                    f.truncate(data.rfind(b"\n") + 1)
+                    os.rename(path, path[:-len(OPEN_SUFFIX)] + SEALED_SUFFIX)
+                cli_log(CliLogData(
+                    action="IngestSpool",
+                    message=f"Recovered unsealed segment {name} for {endpoint}",
+                    message_type="Info"
+                ))
+
+    def _remove_orphaned_segment(self, endpoint: str, path: str) -> None:
+        # Nothing is written to a segment before it is renamed to .open, so an orphan is always empty
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            # Renamed by its writer since the listing
+            return
+        with f:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Its writer is renaming it
+                return
+            try:
+                # A writer that has not locked it yet fails to, or to rename it, and starts over
+                os.remove(path)
+            except FileNotFoundError:
+                return
+        cli_log(CliLogData(
+            action="IngestSpool",
+            message=f"Removed orphaned segment {os.path.basename(path)} for {endpoint}",
+            message_type="Info"
+        ))
+
+    def _scan(self) -> None:
+        # Seal segments of writers that died since the last scan, then start a drain
+        # thread for each endpoint that has sealed segments
+        while not self._stop.is_set():
+            try:
+                self._recover_open_segments()
+            except OSError as e:
+                cli_log(CliLogData(
+                    action="IngestSpool",
+                    message=f"Failed to recover unsealed segments: {str(e)}",
+                    message_type="Error"
+                ))
+            for endpoint in {endpoint for endpoint, _ in self.pending()}:
+                thread = self._threads.get(endpoint)
+                if thread is None or not thread.is_alive():
+                    thread = threading.Thread(
+                        target=self._drain_endpoint, args=(endpoint,), name=f"ingest-spool-{endpoint}", daemon=True
+                    )
+                    self._threads[endpoint] = thread
+                    thread.start()
+            self._stop.wait(self.config.poll_interval)
+
+    def _drain_endpoint(self, endpoint: str) -> None:
+        while not self._stop.is_set():
+            segments = [path for segment_endpoint, path in self.pending() if segment_endpoint == endpoint]
+            if not segments:
+                return
+            for path in segments:
+                if not self._drain_segment(endpoint, path):
+                    return
+
+    def _drain_segment(self, endpoint: str, path: str) -> bool:
+        """Deliver one segment from its committed offset; False if stopped part-way."""
+        name = os.path.basename(path)
+        key = f"{endpoint}/{name}"
+        backoff = self.config.poll_interval
+
+        offset = self._index.get(key, 0)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                records, body = line.rstrip(b"\n").split(b" ", 1)
+                while True:
+                    metrics = self.ingest_client.send_encoded(endpoint, body, int(records))
+                    if metrics.ok:
+                        backoff = self.config.poll_interval
+                        break
+                    if metrics.status is not None and 400 <= metrics.status < 500 and metrics.status != 429:
+                        # The API refuses this chunk and always will: set it aside instead of blocking the spool
+                        self._reject(endpoint, body, metrics.error)
+                        break
+                    cli_log(CliLogData(
+                        action="IngestSpool",
+                        message=f"Ingest API unavailable for {endpoint}, retrying in {backoff:.0f}s: {metrics.error}",
+                        message_type="Error"
+                    ))
+                    if self._stop.wait(backoff):
+                        return False
+                    backoff = min(backoff * 2, self.config.max_backoff)
+                self._commit(key, offset)
+
+        os.remove(path)
+        self._commit(key, None)
+        return True
+
+    def _reject(self, endpoint: str, body: bytes, error: Optional[str]) -> None:
+        rejected_dir = os.path.join(self.config.directory, "rejected")
+        os.makedirs(rejected_dir, exist_ok=True)
+        with open(os.path.join(rejected_dir, f"{endpoint}.ndjson"), "ab") as f:
+            f.write(body + b"\n")
+        cli_log(CliLogData(
+            action="IngestSpool",
+            message=f"Ingest API rejected a chunk for {endpoint}, kept in {rejected_dir}: {error}",
+            message_type="Error"
+        ))
+
+    def _commit(self, key: str, offset: Optional[int]) -> None:
+        # Write-then-rename keeps index.json whole if the process dies mid-write
+        with self._index_lock:
+            if offset is None:
+                self._index.pop(key, None)
+            else:
+                self._index[key] = offset
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._index, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.index_path)
+
+class IngestSpool:
+    def __init__(self, config: Optional[IngestSpoolConfig] = None, ingest_client: Optional[IngestClient] = None):
+        self.config = config or IngestSpoolConfig()
+        self.drainer = SpoolDrainer(self.config, ingest_client or get_ingest_client())
+        self._writers: Dict[str, SpoolWriter] = {}
+        self._lock = threading.Lock()
+        # Replays whatever a previous run left behind
+        self.draining = self.drainer.start()
+
+    def append(self, endpoint: str, records: Iterable[Any]) -> int:
+        """Spool one chunk of records for /ingest/<endpoint>; returns the record count."""
+        records = list(records)
+        if records:
+            self._writer(endpoint).append(len(records), encode_records(records))
+        return len(records)
+
+    def seal(self, endpoint: str) -> None:
+        """Hand everything spooled for `endpoint` to the drainer."""
+        self._writer(endpoint).seal()
+
+    def pending_bytes(self) -> int:
+        return sum(os.path.getsize(path) for _, path in self.drainer.pending())
+
+    def _writer(self, endpoint: str) -> SpoolWriter:
+        with self._lock:
+            if endpoint not in self._writers:
+                self._writers[endpoint] = SpoolWriter(self.config.directory, endpoint, self.config.segment_max_bytes)
+            return self._writers[endpoint]
+
+_ingest_spool_lock = threading.Lock()
+_ingest_spool_instance = None
+
+def get_ingest_spool() -> IngestSpool:
+    """Get the shared spool; the first call in a process starts draining (and replaying) it."""
+    global _ingest_spool_instance
+    # Concurrent tasks must not start two drainers or two writers for one endpoint
+    with _ingest_spool_lock:
+        if _ingest_spool_instance is None:
+            _ingest_spool_instance = IngestSpool()
+        return _ingest_spool_instance
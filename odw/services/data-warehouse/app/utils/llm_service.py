@@ -1,7 +1,11 @@
 import os
 import json
-from typing import Dict, Any, Optional, List
+import tempfile
+from typing import Dict, Any, Optional, List, Tuple
 from moose_lib import cli_log, CliLogData
+from connectors.binary_payload import base64_from_file, is_reference, parse_reference
+from connectors.content_cache import ContentCache
+from connectors.s3_file_reader import S3FileReader
 import anthropic
 from datetime import datetime
 from dotenv import load_dotenv
@@ -1062,43 +1066,75 @@ Return only the JSON array, no additional text."""
 
     def _is_image_content(self, content: str) -> bool:
         """
-        Detect if the content is image data (base64 encoded image).
+        Detect if the content is image data (an S3 object reference or base64 encoded image).
         """
+        if is_reference(content):
+            return parse_reference(content)[0].startswith("image/")
         return content.startswith("[IMAGE_DATA]data:image/") or content.startswith("data:image/")
     
     def _is_document_content(self, content: str) -> bool:
         """
         Detect if the content is document data (PDF or Word document).
         """
+        if is_reference(content):
+            return parse_reference(content)[0].startswith("application/")
         return (content.startswith("[PDF_DATA]data:application/pdf") or 
                 content.startswith("[DOC_DATA]data:application/") or
                 content.startswith("data:application/pdf") or
                 content.startswith("data:application/msword") or
                 content.startswith("data:application/vnd.openxmlformats-officedocument"))
     
+    def _read_referenced_object(self, content: str) -> Tuple[str, str]:
+        """
+        Read the file an [S3_OBJECT] reference points to and return its MIME type and
+        base64 data. Only the version the reference was made from is read (If-Match),
+        so a file overwritten since it was staged fails instead of being extracted in
+        its new version under the old record. The bytes, from the local cache the
+        workflow filled when it staged the file or streamed from S3, spill to a
+        temporary file past REFERENCE_SPOOL_MAX_BYTES and are encoded from there, for
+        the request being built.
+        """
+        reference = parse_reference(content)
+        with tempfile.SpooledTemporaryFile(max_size=REFERENCE_SPOOL_MAX_BYTES) as spool:
+            get_s3_reader().download_to(reference.file_path, spool, reference.etag, if_match=True)
+            size = spool.tell()
+            spool.seek(0)
+            base64_data = base64_from_file(spool)
+        
+        cli_log(CliLogData(
+            action="LLMService",
+            message=f"Read {size} bytes for referenced file: {reference.file_path}",
+            message_type="Info"
+        ))
+        
+        return reference.mime_type, base64_data
+    
     def _extract_from_image(self, content: str, instruction: str, file_path: Optional[str] = None) -> Dict[str, Any]:
         """
         Extract structured data from image content using Anthropic's vision capabilities.
         """
         try:
-            # Extract the base64 image data from the content
-            if content.startswith("[IMAGE_DATA]"):
-                # Remove the [IMAGE_DATA] prefix
-                image_data_url = content[12:]  # Remove "[IMAGE_DATA]" prefix
+            if is_reference(content):
+                mime_type, base64_data = self._read_referenced_object(content)
             else:
-                image_data_url = content
-            
-            # Parse the data URL to get MIME type and base64 data
-            if not image_data_url.startswith("data:"):
-                raise Exception("Invalid image data format")
-            
-            # Extract MIME type and base64 data
-            header_end = image_data_url.find(";base64,")
-            if header_end == -1:
-                raise Exception("Invalid image data URL format")
-            
-            mime_type = image_data_url[5:header_end]  # Remove "data:" prefix
-            base64_data = image_data_url[header_end + 8:]  # Remove ";base64," prefix
+                # Extract the base64 image data from the content
+                if content.startswith("[IMAGE_DATA]"):
+                    # Remove the [IMAGE_DATA] prefix
+                    image_data_url = content[12:]  # Remove "[IMAGE_DATA]" prefix
+                else:
+                    image_data_url = content
+                
+                # Parse the data URL to get MIME type and base64 data
+                if not image_data_url.startswith("data:"):
+                    raise Exception("Invalid image data format")
+                
+                # Extract MIME type and base64 data
+                header_end = image_data_url.find(";base64,")
+                if header_end == -1:
+                    raise Exception("Invalid image data URL format")
+                
+                mime_type = image_data_url[5:header_end]  # Remove "data:" prefix
+                base64_data = image_data_url[header_end + 8:]  # Remove ";base64," prefix
             
             cli_log(CliLogData(
                 action="LLMService",
@@ -1190,28 +1226,32 @@ Return only the JSON array, no additional text."""
         Extract structured data from document content (PDF/Word) using Anthropic's vision capabilities.
         """
         try:
-            # Extract the base64 document data from the content
-            if content.startswith("[PDF_DATA]"):
-                document_data_url = content[10:]  # Remove "[PDF_DATA]" prefix
-                doc_type = "PDF"
-            elif content.startswith("[DOC_DATA]"):
-                document_data_url = content[10:]  # Remove "[DOC_DATA]" prefix
-                doc_type = "Word Document"
+            if is_reference(content):
+                mime_type, base64_data = self._read_referenced_object(content)
+                doc_type = "PDF" if mime_type == "application/pdf" else "Word Document"
             else:
-                document_data_url = content
-                doc_type = "Document"
-            
-            # Parse the data URL to get MIME type and base64 data
-            if not document_data_url.startswith("data:"):
-                raise Exception("Invalid document data format")
-            
-            # Extract MIME type and base64 data
-            header_end = document_data_url.find(";base64,")
-            if header_end == -1:
-                raise Exception("Invalid document data URL format")
-            
-            mime_type = document_data_url[5:header_end]  # Remove "data:" prefix
-            base64_data = document_data_url[header_end + 8:]  # Remove ";base64," prefix
+                # Extract the base64 document data from the content
+                if content.startswith("[PDF_DATA]"):
+                    document_data_url = content[10:]  # Remove "[PDF_DATA]" prefix
+                    doc_type = "PDF"
+                elif content.startswith("[DOC_DATA]"):
+                    document_data_url = content[10:]  # Remove "[DOC_DATA]" prefix
+                    doc_type = "Word Document"
+                else:
+                    document_data_url = content
+                    doc_type = "Document"
+                
+                # Parse the data URL to get MIME type and base64 data
+                if not document_data_url.startswith("data:"):
+                    raise Exception("Invalid document data format")
+                
+                # Extract MIME type and base64 data
+                header_end = document_data_url.find(";base64,")
+                if header_end == -1:
+                    raise Exception("Invalid document data URL format")
+                
+                mime_type = document_data_url[5:header_end]  # Remove "data:" prefix
+                base64_data = document_data_url[header_end + 8:]  # Remove ";base64," prefix
             
             cli_log(CliLogData(
                 action="LLMService",
@@ -1657,6 +1697,22 @@ Return ONLY the JSON array, no additional text or formatting."""
         
         return int(total_estimated_tokens)
 
+# Directory of the local S3 content cache shared with the unstructured data workflow
+S3_CACHE_DIR = "s3_cache"
+
+# Referenced files larger than this are spilled to a temporary file before encoding
+REFERENCE_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# Reader for [S3_OBJECT] references, created on first use
+_s3_reader_instance = None
+
+def get_s3_reader() -> S3FileReader:
+    """Get the S3 reader used to read referenced binary files, backed by the local content cache."""
+    global _s3_reader_instance
+    if _s3_reader_instance is None:
+        _s3_reader_instance = S3FileReader(cache=ContentCache(S3_CACHE_DIR))
+    return _s3_reader_instance
+
 # Singleton instance
 _llm_service_instance = None
 
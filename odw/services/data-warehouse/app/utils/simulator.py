@@ -1,15 +1,15 @@
 import random
-from typing import List, TypeVar
-from pydantic import BaseModel
+import numpy as np
+from typing import Dict, List, TypeVar
 
-T = TypeVar('T', bound=BaseModel)
+T = TypeVar('T')
 
 def simulate_failures(data: List[T], fail_percentage: int) -> int:
     """
     Simulate failures by adding "[DLQ]" prefix to trigger transform failures.
 
     Args:
-        data: List of Pydantic models (BlobSource, LogSource, EventSource)
+        data: List of Pydantic models or slotted connector records (BlobSource, LogSource, EventSource)
         fail_percentage: Percentage of items to mark as failed (0-100)
 
     Returns:
@@ -48,3 +48,31 @@ def simulate_failures(data: List[T], fail_percentage: int) -> int:
                 item.source_file_path = f"[DLQ]{item.source_file_path}"
 
     return len(items_to_fail)
+
+# Column that carries the "[DLQ]" failure marker in each source's column batches
+FAILURE_MARKER_COLUMNS = ["file_name", "message", "distinct_id"]
+
+def simulate_column_failures(columns: Dict[str, np.ndarray], fail_percentage: int) -> int:
+    """
+    Column-batch counterpart of simulate_failures: prefix the failure marker column
+    (file_name for blobs, message for logs, distinct_id for events) with "[DLQ]"
+    in a random fail_percentage of rows.
+
+    Returns:
+        Number of rows that were marked as failed
+    """
+    fail_percentage = max(0, min(100, fail_percentage))
+    marker = next((name for name in FAILURE_MARKER_COLUMNS if name in columns), None)
+    if fail_percentage <= 0 or marker is None:
+        return 0
+
+    size = len(columns[marker])
+    num_to_fail = int(size * (fail_percentage / 100))
+    if num_to_fail <= 0:
+        return 0
+
+    rows = np.array(random.sample(range(size), num_to_fail))
+    column = columns[marker].astype(object)
+    column[rows] = "[DLQ]" + column[rows]
+    columns[marker] = column
+    return num_to_fail
@@ -0,0 +1,94 @@
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+# The Moose app is not installed as a package; import "app" from this project
+# like the Moose worker does. "connectors" comes from requirements.txt (../connectors).
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def moose_config(tmp_path):
+    """Path of a moose.config.toml with S3, ClickHouse and Temporal settings."""
+    path = tmp_path / "moose.config.toml"
+    path.write_text(
+        "[s3_config]\n"
+        "endpoint_url = \"http://localhost:9000\"\n"
+        "access_key_id = \"test\"\n"
+        "secret_access_key = \"secret\"\n"
+        "region_name = \"us-east-1\"\n"
+        "bucket_name = \"warehouse\"\n"
+        "\n"
+        "[clickhouse_config]\n"
+        "host = \"clickhouse\"\n"
+        "host_port = 8123\n"
+        "db_name = \"local\"\n"
+        "\n"
+        "[temporal_config]\n"
+        "temporal_host = \"temporal\"\n"
+        "temporal_port = 7234\n"
+    )
+    return str(path)
+
+
+class FakeIngestServer:
+    """
+    Local HTTP server standing in for the Moose ingest API. Records every request
+    as (path, headers, body) and answers with `respond(path, body)`, 200 by default.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.respond = lambda path, body: 200
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                if self.headers.get("Transfer-Encoding") == "chunked":
+                    body = b""
+                    while True:
+                        size = int(self.rfile.readline().strip(), 16)
+                        body += self.rfile.read(size)
+                        self.rfile.readline()
+                        if size == 0:
+                            break
+                else:
+                    body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with server._lock:
+                    server.requests.append((self.path, dict(self.headers), body))
+                self.send_response(server.respond(self.path, body))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_port}/ingest"
+
+    def bodies(self, path=None):
+        with self._lock:
+            return [body for request_path, _, body in self.requests if path is None or request_path == path]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def ingest_server():
+    server = FakeIngestServer()
+    yield server
+    server.close()
@@ -0,0 +1,179 @@
+import io
+import re
+import subprocess
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+from app.utils.bulk_loader import BULK_LOADS, BulkLoader, BulkLoaderConfig, columns_to_parquet
+from connectors.blob_connector import BlobConnector, BlobConnectorConfig
+from connectors.events_connector import EventsConnector, EventsConnectorConfig
+from connectors.logs_connector import LogsConnector, LogsConnectorConfig
+
+CONNECTORS = {
+    "BlobSource": lambda: BlobConnector(BlobConnectorConfig(batch_size=5)),
+    "LogSource": lambda: LogsConnector(LogsConnectorConfig(batch_size=5)),
+    "EventSource": lambda: EventsConnector(EventsConnectorConfig(batch_size=5)),
+}
+
+
+def _columns(source):
+    return next(CONNECTORS[source]().extract_columns_iter())
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.deleted = []
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def delete_objects(self, Bucket, Delete):
+        self.deleted.extend(obj["Key"] for obj in Delete["Objects"])
+
+
+class FakeClickHouse:
+    def __init__(self, **settings):
+        self.settings = settings
+        self.commands = []
+        self.closed = False
+
+    def command(self, query, parameters):
+        self.commands.append((query, parameters))
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def loader(moose_config):
+    loader = BulkLoader(BulkLoaderConfig(config_path=moose_config))
+    loader.s3_reader.s3_client = FakeS3()
+    return loader
+
+
+@pytest.fixture
+def clickhouse(monkeypatch):
+    clients = []
+
+    def get_client(**settings):
+        clients.append(FakeClickHouse(**settings))
+        return clients[-1]
+
+    monkeypatch.setitem(sys.modules, "clickhouse_connect", types.SimpleNamespace(get_client=get_client))
+    return clients
+
+
+@pytest.mark.parametrize("source", sorted(BULK_LOADS))
+def test_select_reads_exactly_the_generated_columns(source):
+    _, select = BULK_LOADS[source]
+    referenced = {
+        name
+        for expression in select.values()
+        for name in re.findall(r"\b[a-z_]+\b(?!\()", re.sub(r"'[^']*'|%\(\w+\)s", "", expression))
+    }
+
+    assert referenced == set(_columns(source))
+    assert select["transform_timestamp"] == "%(transform_timestamp)s"
+
+
+@pytest.mark.parametrize("source, column", [
+    ("BlobSource", "file_name"), ("LogSource", "message"), ("EventSource", "distinct_id"),
+])
+def test_dlq_marker_is_rewritten_like_the_recovery_transform(source, column):
+    assert BULK_LOADS[source][1][column] == (
+        f"if(startsWith({column}, '[DLQ]'), concat('[RECOVERED]', substring({column}, 6)), {column})"
+    )
+
+
+@pytest.mark.parametrize("source", sorted(BULK_LOADS))
+def test_columns_to_parquet_round_trips(source):
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    columns = _columns(source)
+    table = pq.read_table(io.BytesIO(columns_to_parquet(columns)))
+
+    assert table.column_names == list(columns)
+    assert table.num_rows == 5
+    assert table.column("id").to_pylist() == list(columns["id"])
+
+
+def test_load_uploads_parts_inserts_once_and_deletes_them(loader, clickhouse):
+    pytest.importorskip("pyarrow")
+    batches = [_columns("EventSource"), _columns("EventSource")]
+
+    result = loader.load("EventSource", iter(batches))
+
+    s3 = loader.s3_reader.s3_client
+    keys = sorted(s3.objects)
+    assert [key.rsplit("/", 1)[1] for key in keys] == ["part-00000.parquet", "part-00001.parquet"]
+    assert all(key.startswith("bulk-load/EventSource/") for key in keys)
+    assert (result.rows, result.files) == (10, 2)
+    assert result.bytes == sum(len(body) for body in s3.objects.values())
+    assert sorted(s3.deleted) == keys
+
+    [client] = clickhouse
+    assert client.closed
+    assert (client.settings["host"], client.settings["port"], client.settings["database"]) == ("clickhouse", 8123, "local")
+    [(query, parameters)] = client.commands
+    table, select = BULK_LOADS["EventSource"]
+    assert query.startswith(f"INSERT INTO `{table}` ({', '.join(select)}) SELECT ")
+    assert query.endswith("FROM s3(%(url)s, %(access_key_id)s, %(secret_access_key)s, 'Parquet')")
+    assert parameters["url"] == f"http://localhost:9000/warehouse/{keys[0].rsplit('/', 1)[0]}/*.parquet"
+    assert (parameters["access_key_id"], parameters["secret_access_key"]) == ("test", "secret")
+
+
+def test_load_keeps_files_when_asked_and_uses_the_clickhouse_endpoint(moose_config, clickhouse):
+    pytest.importorskip("pyarrow")
+    loader = BulkLoader(BulkLoaderConfig(
+        config_path=moose_config, keep_files=True, clickhouse_s3_endpoint="http://host.docker.internal:9500/"
+    ))
+    loader.s3_reader.s3_client = FakeS3()
+
+    loader.load("LogSource", [_columns("LogSource")])
+
+    assert loader.s3_reader.s3_client.deleted == []
+    assert clickhouse[0].commands[0][1]["url"].startswith("http://host.docker.internal:9500/warehouse/bulk-load/LogSource/")
+
+
+def test_files_are_deleted_when_the_insert_fails(loader, monkeypatch):
+    pytest.importorskip("pyarrow")
+
+    def failing_insert(source, key_pattern):
+        raise RuntimeError("ClickHouse unavailable")
+
+    monkeypatch.setattr(loader, "_insert_select", failing_insert)
+
+    with pytest.raises(RuntimeError):
+        loader.load("BlobSource", [_columns("BlobSource")])
+    assert loader.s3_reader.s3_client.deleted == list(loader.s3_reader.s3_client.objects)
+
+
+def test_empty_load_runs_no_insert(loader, clickhouse):
+    result = loader.load("EventSource", [])
+
+    assert (result.rows, result.files) == (0, 0)
+    assert clickhouse == []
+
+
+def test_unsupported_source_is_rejected(loader):
+    with pytest.raises(ValueError, match="Bulk load not supported for UnstructuredDataSource"):
+        loader.load("UnstructuredDataSource", [])
+
+
+def test_workflow_helpers_do_not_import_the_s3_stack(moose_config):
+    # In a fresh interpreter, since other tests load the S3 stack into this one
+    script = (
+        "import sys\n"
+        f"sys.path.insert(0, {str(Path(__file__).resolve().parent.parent)!r})\n"
+        "import app.utils.bulk_loader, app.utils.fan_out, app.utils.ingest_controller, app.utils.ingest_spool\n"
+        "from connectors.moose_config import load_moose_config\n"
+        "loaded = [name for name in ('boto3', 'botocore', 'toml') if name in sys.modules]\n"
+        "assert not loaded, loaded\n"
+        f"assert load_moose_config({moose_config!r})['temporal_config']['temporal_port'] == 7234\n"
+        "assert 'boto3' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", script], check=True)
@@ -0,0 +1,126 @@
+import asyncio
+import sys
+import types
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from app.utils import fan_out
+from app.utils.fan_out import FanOutError, shard_batch, shard_files, split_evenly, start_shards
+
+
+class Params(BaseModel):
+    batch_size: Optional[int] = 100
+    source_files: Optional[List[str]] = None
+    shards: Optional[int] = 1
+    shard_index: Optional[int] = None
+
+
+@pytest.mark.parametrize("total, shards, expected", [
+    (10, 3, [4, 3, 3]),
+    (9, 3, [3, 3, 3]),
+    (2, 4, [1, 1]),
+    (0, 3, []),
+    (5, 0, [5]),
+])
+def test_split_evenly(total, shards, expected):
+    assert split_evenly(total, shards) == expected
+
+
+def test_shard_batch_splits_batch_size():
+    shards = shard_batch(Params(batch_size=10, shards=3))
+
+    assert [(shard.batch_size, shard.shards, shard.shard_index) for shard in shards] == [(4, 1, 0), (3, 1, 1), (3, 1, 2)]
+
+
+def test_shard_files_splits_files_in_order():
+    files = [f"s3://bucket/{i}.txt" for i in range(5)]
+
+    shards = shard_files(Params(shards=2), files)
+
+    assert [shard.source_files for shard in shards] == [files[:3], files[3:]]
+    assert [shard.shard_index for shard in shards] == [0, 1]
+    assert shard_files(Params(shards=4), files[:1])[0].source_files == files[:1]
+
+
+def test_temporal_address_from_moose_config(moose_config, tmp_path):
+    assert fan_out._temporal_address(moose_config) == "temporal:7234"
+    assert fan_out._temporal_address(str(tmp_path / "missing.toml")) == "localhost:7233"
+
+
+class FakeTemporal:
+    """temporalio.client.Client.connect, recording the address it was called with."""
+
+    async def connect(self, address, namespace):
+        self.address = address
+        return self
+
+
+class FakeWorkflowClient:
+    """moose_lib.main.WorkflowClient; shards whose index is in `failing` fail to start."""
+
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.started = []
+
+    def __call__(self, temporal_client):
+        self.temporal_client = temporal_client
+        return self
+
+    def execute(self, name, input_data):
+        # Like the real one, it runs its own event loop, so it must not be called from inside one
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        self.started.append((name, input_data))
+        if input_data.shard_index in self.failing:
+            return {"status": 400, "body": "boom"}
+        return {"status": 200, "body": f"Workflow started: {name}"}
+
+
+@pytest.fixture
+def temporal(monkeypatch):
+    def install(failing=()):
+        workflow_client = FakeWorkflowClient(failing)
+        monkeypatch.setitem(sys.modules, "temporalio", types.ModuleType("temporalio"))
+        monkeypatch.setitem(sys.modules, "temporalio.client", types.SimpleNamespace(Client=FakeTemporal()))
+        monkeypatch.setitem(sys.modules, "moose_lib.main", types.SimpleNamespace(WorkflowClient=workflow_client))
+        return workflow_client
+
+    return install
+
+
+def test_start_shards_starts_every_shard_without_waiting(temporal):
+    workflow_client = temporal()
+
+    result = start_shards("events-workflow", shard_batch(Params(batch_size=10, shards=2)))
+
+    assert result.failures == {}
+    assert result.summary() == "2/2 shards started"
+    assert [(name, shard.batch_size, shard.shard_index) for name, shard in workflow_client.started] == [
+        ("events-workflow", 5, 0), ("events-workflow", 5, 1)
+    ]
+    assert workflow_client.temporal_client.address == "localhost:7233"
+
+
+def test_start_shards_raises_when_a_shard_cannot_start(temporal):
+    workflow_client = temporal(failing=(1,))
+
+    with pytest.raises(FanOutError) as raised:
+        start_shards("events-workflow", shard_batch(Params(batch_size=10, shards=3)))
+
+    # Every shard was still tried
+    assert len(workflow_client.started) == 3
+    result = raised.value.result
+    assert result.failures == {"events-workflow shard 1": "boom"}
+    assert "2/3 shards started" in str(raised.value)
+
+
+def test_start_shards_works_inside_an_event_loop(temporal):
+    workflow_client = temporal()
+
+    async def task():
+        return start_shards("logs-workflow", shard_batch(Params(batch_size=4, shards=2)))
+
+    assert asyncio.run(task()).failures == {}
+    assert len(workflow_client.started) == 2
@@ -0,0 +1,237 @@
+import gzip
+import json
+import threading
+
+import pytest
+
+from app.utils import ingest_client
+from app.utils.ingest_client import IngestClient, IngestClientConfig, IngestError, IngestResult, get_ingest_client
+
+
+def _client(server, **settings):
+    settings = {"base_url": server.url, "backoff_factor": 0, "timeout": 5, **settings}
+    return IngestClient(IngestClientConfig(**settings))
+
+
+def _records(count, start=0):
+    return [{"id": str(i)} for i in range(start, start + count)]
+
+
+def _ids(bodies):
+    return [record["id"] for body in bodies for record in json.loads(body)]
+
+
+def test_send_splits_records_into_bounded_chunks(ingest_server):
+    client = _client(ingest_server, max_chunk_records=4)
+
+    result = client.send("EventSource", _records(10))
+
+    assert (result.records_sent, result.records_failed) == (10, 0)
+    assert [chunk.offset for chunk in result.chunks] == [0, 4, 8]
+    assert [chunk.records for chunk in result.chunks] == [4, 4, 2]
+    assert _ids(ingest_server.bodies("/ingest/EventSource")) == [str(i) for i in range(10)]
+
+
+def test_send_closes_chunks_at_the_byte_limit(ingest_server):
+    row = len(json.dumps({"id": "0"}, separators=(",", ":")))
+    # Two rows and their separators fit, a third does not; a single oversized record is sent alone
+    client = _client(ingest_server, max_chunk_bytes=2 + row * 2 + 2)
+
+    result = client.send("EventSource", _records(5) + [{"id": "x" * 100}])
+
+    assert [chunk.records for chunk in result.chunks] == [2, 2, 1, 1]
+    assert all(chunk.bytes == len(body) for chunk, body in zip(result.chunks, ingest_server.bodies()))
+
+
+def test_failed_chunks_are_counted_and_the_rest_still_sent(ingest_server):
+    ingest_server.respond = lambda path, body: 400 if b'"id":"1"' in body else 200
+    client = _client(ingest_server, max_chunk_records=2)
+
+    result = client.send("EventSource", _records(6))
+
+    assert (result.records_sent, result.records_failed) == (4, 2)
+    assert [chunk.ok for chunk in result.chunks] == [False, True, True]
+    assert result.chunks[0].status == 400
+    # Client errors are not retried
+    assert result.chunks[0].attempts == 1 and len(ingest_server.requests) == 3
+
+
+def test_overload_responses_are_retried(ingest_server):
+    statuses = iter([503, 429])
+    ingest_server.respond = lambda path, body: next(statuses, 200)
+
+    metrics = _client(ingest_server).send("EventSource", _records(3)).chunks[0]
+
+    assert metrics.ok and metrics.status == 200
+    assert metrics.attempts == 3
+    assert len(ingest_server.requests) == 3
+
+
+def test_retries_give_up_after_the_configured_attempts(ingest_server):
+    ingest_server.respond = lambda path, body: 503
+
+    result = _client(ingest_server, retries=2).send("EventSource", _records(3))
+
+    assert (result.records_sent, result.records_failed) == (0, 3)
+    assert result.chunks[0].status == 503
+    assert result.chunks[0].attempts == 3
+    assert len(ingest_server.requests) == 3
+
+
+def test_connection_errors_count_every_attempt():
+    client = IngestClient(IngestClientConfig(base_url="http://127.0.0.1:1/ingest", retries=1, backoff_factor=0, timeout=1))
+
+    metrics = client.send("EventSource", _records(2)).chunks[0]
+
+    assert not metrics.ok and metrics.status is None
+    assert metrics.attempts == 2
+
+
+def test_gzip_compression(ingest_server):
+    result = _client(ingest_server, compression="gzip").send("EventSource", _records(50))
+
+    (_, headers, body), = ingest_server.requests
+    assert headers["Content-Encoding"] == "gzip"
+    assert _ids([gzip.decompress(body)]) == [str(i) for i in range(50)]
+    assert result.chunks[0].wire_bytes == len(body) < result.chunks[0].bytes
+
+
+def test_unsupported_compression_is_rejected():
+    with pytest.raises(ValueError):
+        IngestClient(IngestClientConfig(compression="brotli"))
+
+
+def test_send_stream_posts_each_chunk(ingest_server):
+    result = _client(ingest_server).send_stream("LogSource", [_records(2), _records(3, start=2)])
+
+    assert result.records_sent == 5
+    assert _ids(ingest_server.bodies("/ingest/LogSource")) == [str(i) for i in range(5)]
+
+
+def test_ndjson_stream_is_one_request(ingest_server):
+    result = _client(ingest_server).send_stream("LogSource", [_records(2), _records(3, start=2)], ndjson=True)
+
+    (_, headers, body), = ingest_server.requests
+    assert headers["Content-Type"] == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in body.splitlines()] == [str(i) for i in range(5)]
+    assert result.records_sent == 5 and result.chunks[0].records == 5
+
+
+def test_ingest_error_carries_the_result():
+    result = IngestResult(records_sent=3, records_failed=2)
+
+    error = IngestError("EventSource", result)
+
+    assert error.result is result
+    assert "Failed to send 2 records to EventSource" in str(error)
+
+
+def test_shared_client_is_created_once(monkeypatch):
+    created = []
+    started = threading.Barrier(8)
+
+    class CountingClient:
+        def __init__(self):
+            created.append(self)
+
+    def get():
+        started.wait()
+        return get_ingest_client()
+
+    monkeypatch.setattr(ingest_client, "IngestClient", CountingClient)
+    monkeypatch.setattr(ingest_client, "_ingest_client_instance", None)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+
+
+def _sender_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("ingest-sender-")]
+
+
+def test_send_pipelined_delivers_every_chunk_once(ingest_server):
+    chunks = [_records(3, start=i * 3) for i in range(20)]
+
+    result = _client(ingest_server).send_pipelined("EventSource", iter(chunks), senders=4)
+
+    assert (result.records_sent, result.records_failed) == (60, 0)
+    assert len(result.chunks) == 20
+    assert sorted(_ids(ingest_server.bodies()), key=int) == [str(i) for i in range(60)]
+    assert not _sender_threads()
+
+
+def test_send_pipelined_with_one_sender_keeps_order(ingest_server):
+    chunks = [_records(2, start=i * 2) for i in range(10)]
+
+    _client(ingest_server).send_pipelined("EventSource", iter(chunks), senders=1)
+
+    assert _ids(ingest_server.bodies()) == [str(i) for i in range(20)]
+
+
+def test_send_pipelined_counts_a_failing_sender_and_keeps_sending(ingest_server, monkeypatch):
+    client = _client(ingest_server)
+    send = client.send
+
+    def send_or_fail(endpoint, chunk, max_chunk_records=None):
+        if chunk[0]["id"] == "6":
+            raise RuntimeError("encoder crashed")
+        return send(endpoint, chunk, max_chunk_records)
+
+    monkeypatch.setattr(client, "send", send_or_fail)
+    chunks = [_records(3, start=i * 3) for i in range(8)]
+
+    result = client.send_pipelined("EventSource", iter(chunks), senders=3)
+
+    assert (result.records_sent, result.records_failed) == (21, 3)
+    assert sorted(_ids(ingest_server.bodies()), key=int) == [str(i) for i in range(24) if not 6 <= i < 9]
+    assert not _sender_threads()
+
+
+def test_send_pipelined_propagates_producer_errors_and_stops_its_senders(ingest_server):
+    def chunks():
+        for i in range(5):
+            yield _records(2, start=i * 2)
+        raise ValueError("generator failed")
+
+    with pytest.raises(ValueError, match="generator failed"):
+        _client(ingest_server).send_pipelined("EventSource", chunks(), senders=4)
+
+    # The chunks produced before the error were still delivered, and no sender was left running
+    assert sorted(_ids(ingest_server.bodies()), key=int) == [str(i) for i in range(10)]
+    assert not _sender_threads()
+
+
+def test_send_pipelined_bounds_the_chunks_produced_ahead(ingest_server):
+    release = threading.Event()
+    produced = []
+
+    def respond(path, body):
+        release.wait(5)
+        return 200
+
+    def chunks():
+        for i in range(50):
+            produced.append(i)
+            yield _records(1, start=i)
+
+    ingest_server.respond = respond
+    sending = threading.Thread(
+        target=lambda: _client(ingest_server).send_pipelined("EventSource", chunks(), senders=2, queue_size=3)
+    )
+    sending.start()
+    try:
+        # Two chunks in flight, three queued and one blocked on put(): the producer waits
+        threading.Event().wait(0.5)
+        assert len(produced) <= 2 + 3 + 1
+    finally:
+        release.set()
+        sending.join(10)
+    assert len(produced) == 50
+    assert not sending.is_alive()
@@ -0,0 +1,199 @@
+import threading
+from collections import namedtuple
+
+from app.utils.ingest_client import ChunkMetrics
+from app.utils.ingest_controller import AdaptiveController, AdaptiveIngestConfig, RedpandaLagProbe
+
+
+def _metrics(seconds=0.1, status=200, attempts=1, error=None):
+    return ChunkMetrics(offset=0, records=1, bytes=1, wire_bytes=1, seconds=seconds, attempts=attempts, status=status, error=error)
+
+
+def _controller(**settings):
+    settings = {"initial_chunk_records": 1000, "initial_senders": 4, "cooldown": 0, **settings}
+    return AdaptiveController(AdaptiveIngestConfig(**settings))
+
+
+class FakeLagProbe:
+    def __init__(self, lag=0, error=None):
+        self.value = lag
+        self.error = error
+        self.probes = 0
+        self.closed = False
+
+    def lag(self):
+        self.probes += 1
+        if self.error:
+            raise self.error
+        return self.value
+
+    def close(self):
+        self.closed = True
+
+
+def test_rechunk_regroups_into_the_current_size():
+    controller = _controller(initial_chunk_records=3)
+
+    assert list(controller.rechunk([[1, 2], [3, 4, 5, 6, 7], [], [8]])) == [[1, 2, 3], [4, 5, 6], [7, 8]]
+    assert list(controller.rechunk([])) == []
+
+
+def test_rechunk_follows_size_changes_between_chunks():
+    controller = _controller(initial_chunk_records=2)
+    chunks = controller.rechunk([list(range(7))])
+
+    assert next(chunks) == [0, 1]
+    controller.chunk_records = 4
+    assert list(chunks) == [[2, 3, 4, 5], [6]]
+
+
+def test_healthy_responses_grow_chunk_size_and_add_a_sender_per_round():
+    controller = _controller(chunk_increase=250, initial_senders=2, max_senders=3)
+
+    for _ in range(2):
+        controller.observe(_metrics())
+    assert (controller.chunk_records, controller.senders) == (1500, 3)
+
+    for _ in range(10):
+        controller.observe(_metrics())
+    assert controller.senders == 3
+
+
+def test_chunk_size_stays_within_bounds():
+    controller = _controller(max_chunk_records=1100, min_chunk_records=600, chunk_increase=250)
+
+    controller.observe(_metrics())
+    assert controller.chunk_records == 1100
+    for _ in range(3):
+        controller.observe(_metrics(status=503))
+    assert (controller.chunk_records, controller.senders) == (600, 1)
+
+
+def test_slow_response_halves_only_the_chunk_size():
+    controller = _controller(target_latency=1.0)
+
+    controller.observe(_metrics(seconds=5.0))
+
+    assert (controller.chunk_records, controller.senders, controller.decreases) == (500, 4, 1)
+
+
+def test_backpressure_halves_chunk_size_and_senders():
+    overloads = [_metrics(status=status, error=f"HTTP {status}") for status in (408, 429, 500, 502, 503, 504)]
+    for metrics in overloads + [_metrics(attempts=2), _metrics(status=None, error="refused")]:
+        controller = _controller()
+        controller.observe(metrics)
+        assert (controller.chunk_records, controller.senders) == (500, 2)
+
+
+def test_too_large_response_halves_only_the_chunk_size():
+    controller = _controller()
+
+    controller.observe(_metrics(status=413, error="HTTP 413"))
+
+    assert (controller.chunk_records, controller.senders) == (500, 4)
+
+
+def test_other_failed_chunks_neither_grow_nor_shrink():
+    controller = _controller(initial_senders=1)
+
+    for _ in range(3):
+        controller.observe(_metrics(status=400, error="HTTP 400"))
+    controller.observe(_metrics(status=200, error="encoder crashed"))
+
+    assert (controller.chunk_records, controller.senders, controller.decreases) == (1000, 1, 0)
+
+
+def test_decreases_within_the_cooldown_count_once():
+    controller = _controller(cooldown=3600)
+
+    for _ in range(3):
+        controller.observe(_metrics(status=503))
+
+    assert (controller.chunk_records, controller.senders, controller.decreases) == (500, 2, 1)
+
+
+def test_consumer_lag_over_the_limit_is_backpressure():
+    probe = FakeLagProbe(lag=500)
+    controller = AdaptiveController(AdaptiveIngestConfig(cooldown=0, max_lag=100, lag_probe_interval=3600), lag_probe=probe)
+
+    controller.observe(_metrics())
+    controller.observe(_metrics())
+
+    assert controller.decreases == 2
+    assert controller.last_lag == 500
+    # The second response reused the lag measured by the first
+    assert probe.probes == 1
+    assert "consumer lag 500" in controller.summary()
+
+
+def test_failed_lag_probe_is_closed_and_ignored():
+    probe = FakeLagProbe(error=ConnectionError("no broker"))
+    controller = AdaptiveController(AdaptiveIngestConfig(lag_probe_interval=0), lag_probe=probe)
+
+    controller.observe(_metrics())
+    controller.observe(_metrics())
+
+    assert probe.closed and probe.probes == 1
+    assert controller.lag_probe is None and controller.decreases == 0
+
+
+def test_close_releases_the_lag_probe_once():
+    probe = FakeLagProbe()
+    controller = AdaptiveController(lag_probe=probe)
+
+    controller.close()
+    controller.close()
+
+    assert probe.closed and controller.lag_probe is None
+
+
+Partition = namedtuple("Partition", "topic partition")
+Offset = namedtuple("Offset", "offset")
+
+
+class FakeAdmin:
+    def __init__(self, groups):
+        self.groups = groups
+
+    def list_consumer_groups(self):
+        return [(group_id, "consumer") for group_id in self.groups]
+
+    def list_consumer_group_offsets(self, group_id):
+        return {partition: Offset(offset) for partition, offset in self.groups[group_id].items()}
+
+
+class FakeConsumer:
+    def __init__(self, end_offsets):
+        self.ends = end_offsets
+
+    def end_offsets(self, partitions):
+        return {partition: self.ends[partition] for partition in partitions}
+
+
+def test_lag_probe_matches_topic_names_exactly():
+    events, archive = Partition("EventSource", 0), Partition("EventSourceArchive", 0)
+    probe = RedpandaLagProbe(topics=["EventSource"])
+    probe._admin = FakeAdmin({"events": {events: 10, archive: 0}, "archiver": {archive: 0}})
+    probe._consumer = FakeConsumer({events: 25, archive: 1000})
+
+    assert probe.lag() == 15
+
+
+def test_concurrent_senders_probe_without_holding_the_lock():
+    class SlowProbe(FakeLagProbe):
+        def lag(self):
+            # The controller must not hold its lock while the broker is probed
+            assert controller._condition.acquire(timeout=1)
+            controller._condition.release()
+            return super().lag()
+
+    probe = SlowProbe(lag=500)
+    controller = AdaptiveController(AdaptiveIngestConfig(cooldown=0, max_lag=100, lag_probe_interval=0), lag_probe=probe)
+    threads = [threading.Thread(target=lambda: [controller.observe(_metrics()) for _ in range(20)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert controller.last_lag == 500
+    assert controller.decreases == 80
@@ -0,0 +1,198 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app.utils import ingest_spool
+from app.utils.ingest_client import IngestClient, IngestClientConfig
+from app.utils.ingest_spool import IngestSpool, IngestSpoolConfig, get_ingest_spool
+
+
+@pytest.fixture
+def spools(tmp_path, ingest_server):
+    """Start spools on tmp_path that drain to the fake ingest server; stopped after the test."""
+    started = []
+
+    def start(**settings):
+        settings = {"directory": str(tmp_path / "spool"), "poll_interval": 0.02, "max_backoff": 0.05, **settings}
+        client = IngestClient(IngestClientConfig(base_url=ingest_server.url, retries=0, timeout=5))
+        spool = IngestSpool(IngestSpoolConfig(**settings), client)
+        started.append(spool)
+        return spool
+
+    yield start
+    for spool in started:
+        spool.drainer.stop()
+
+
+def _records(count, start=0):
+    return [{"id": str(i)} for i in range(start, start + count)]
+
+
+def _ids(server):
+    return [record["id"] for body in server.bodies() for record in json.loads(body)]
+
+
+def _segment_line(records):
+    return b"%d %s\n" % (len(records), json.dumps(records, separators=(",", ":")).encode())
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_spooled_chunks_are_drained_in_order(spools, ingest_server):
+    spool = spools()
+
+    for i in range(5):
+        assert spool.append("EventSource", _records(2, start=i * 2)) == 2
+    assert spool.pending_bytes() == 0  # nothing is visible to the drainer before seal()
+    spool.seal("EventSource")
+
+    _wait_for(lambda: not spool.drainer.pending())
+    assert _ids(ingest_server) == [str(i) for i in range(10)]
+    assert all(path == "/ingest/EventSource" for path, _, _ in ingest_server.requests)
+    # A delivered segment is removed, then dropped from the index
+    _wait_for(lambda: json.loads(open(spool.drainer.index_path).read()) == {})
+
+
+def test_full_segments_are_sealed_and_drained_without_seal(spools, ingest_server):
+    spool = spools(segment_max_bytes=1)
+
+    spool.append("LogSource", _records(3))
+
+    _wait_for(lambda: len(ingest_server.requests) == 1)
+    assert _ids(ingest_server) == ["0", "1", "2"]
+
+
+def test_segments_of_dead_writers_are_recovered(tmp_path, spools, ingest_server):
+    endpoint_dir = tmp_path / "spool" / "EventSource"
+    endpoint_dir.mkdir(parents=True)
+    # A writer died mid-line: its lock is gone and the torn line is dropped
+    (endpoint_dir / "00000000000000000001-1.open").write_bytes(_segment_line(_records(2)) + b"3 [{\"id\"")
+    # A live writer still holds the lock on its segment
+    live = endpoint_dir / "00000000000000000002-2.open"
+    live.write_bytes(_segment_line(_records(1, start=9)))
+    live_file = open(live, "rb")
+    fcntl.flock(live_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    try:
+        spools()
+
+        _wait_for(lambda: len(ingest_server.requests) == 1)
+        time.sleep(0.1)
+        assert _ids(ingest_server) == ["0", "1"]
+        assert sorted(os.listdir(endpoint_dir)) == [live.name]
+    finally:
+        live_file.close()
+
+
+def test_orphaned_new_segments_are_removed(tmp_path, spools):
+    endpoint_dir = tmp_path / "spool" / "EventSource"
+    endpoint_dir.mkdir(parents=True)
+    # A writer died between creating its segment and renaming it
+    (endpoint_dir / "00000000000000000001-1.new").touch()
+    # A writer is between locking its segment and renaming it
+    renaming = endpoint_dir / "00000000000000000002-2.new"
+    renaming.touch()
+    renaming_file = open(renaming, "rb")
+    fcntl.flock(renaming_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    try:
+        spool = spools()
+
+        assert sorted(os.listdir(endpoint_dir)) == [renaming.name]
+        # The writer of this process opens new segments as usual alongside the scans
+        spool.append("EventSource", _records(1))
+        spool.seal("EventSource")
+        _wait_for(lambda: not spool.drainer.pending())
+        assert sorted(os.listdir(endpoint_dir)) == [renaming.name]
+    finally:
+        renaming_file.close()
+
+
+def test_draining_resumes_from_the_index(tmp_path, spools, ingest_server):
+    spool_dir = tmp_path / "spool"
+    endpoint_dir = spool_dir / "EventSource"
+    endpoint_dir.mkdir(parents=True)
+    lines = [_segment_line(_records(2, start=i * 2)) for i in range(3)]
+    (endpoint_dir / "00000000000000000001-1.seg").write_bytes(b"".join(lines))
+    # The first chunk was delivered before the previous drainer stopped
+    (spool_dir / "index.json").write_text(json.dumps({"EventSource/00000000000000000001-1.seg": len(lines[0])}))
+
+    spool = spools()
+
+    _wait_for(lambda: not spool.drainer.pending())
+    assert _ids(ingest_server) == ["2", "3", "4", "5"]
+
+
+def test_a_stopped_drain_keeps_its_progress(spools, ingest_server):
+    available = threading.Event()
+    ingest_server.respond = lambda path, body: 200 if available.is_set() or b'"id":"0"' in body else 503
+    spool = spools()
+    for i in range(3):
+        spool.append("EventSource", _records(2, start=i * 2))
+    spool.seal("EventSource")
+
+    # The first chunk is delivered, the second keeps failing until the drainer stops
+    _wait_for(lambda: len(ingest_server.requests) >= 3)
+    spool.drainer.stop()
+    assert spool.drainer.pending()
+
+    available.set()
+    restarted = spools()
+    _wait_for(lambda: not restarted.drainer.pending())
+    delivered = [
+        record["id"] for _, _, body in ingest_server.requests for record in json.loads(body)
+    ]
+    # "0" and "1" were delivered once; the retried chunk and the rest follow in order
+    assert delivered.count("0") == 1
+    assert delivered[-4:] == ["2", "3", "4", "5"]
+
+
+def test_refused_chunks_are_set_aside(tmp_path, spools, ingest_server):
+    ingest_server.respond = lambda path, body: 400 if b'"id":"0"' in body else 200
+    spool = spools()
+    spool.append("EventSource", _records(1))
+    spool.append("EventSource", _records(1, start=1))
+    spool.seal("EventSource")
+
+    _wait_for(lambda: not spool.drainer.pending())
+    rejected = (tmp_path / "spool" / "rejected" / "EventSource.ndjson").read_bytes()
+    assert json.loads(rejected) == [{"id": "0"}]
+    assert len(ingest_server.requests) == 2
+
+
+def test_only_one_spool_drains_a_directory(spools):
+    assert spools().draining
+    assert not spools().draining
+
+
+def test_shared_spool_is_created_once(monkeypatch):
+    created = []
+    started = threading.Barrier(8)
+
+    class CountingSpool:
+        def __init__(self):
+            created.append(self)
+
+    def get():
+        started.wait()
+        return get_ingest_spool()
+
+    monkeypatch.setattr(ingest_spool, "IngestSpool", CountingSpool)
+    monkeypatch.setattr(ingest_spool, "_ingest_spool_instance", None)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)